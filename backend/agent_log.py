@@ -0,0 +1,239 @@
+# agent_log.py
+# Bounded, timed activity log and conversation memory for the notebook Agent
+#
+# Usage: python agent_log.py op/agent_log.jsonl   (prints the stage latency summary of an export)
+#
+# AgentLog keeps the most recent ``capacity`` entries in a ring buffer, each
+# stamped with time.monotonic_ns(), and folds every timed stage (model call,
+# tool call, parse, whole chat) into a fixed-size log2 latency histogram.
+# Memory use is constant no matter how many calls go through it, so one log
+# can be shared by every agent of a batch run. ``export`` writes the retained
+# entries plus the histograms as JSONL.
+
+import argparse
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Deque, Dict, Iterator, List, NamedTuple, Optional
+
+DEFAULT_CAPACITY = 10000
+DEFAULT_MAX_MESSAGES = 200
+
+# Bucket i holds latencies below 2**(i + MIN_BUCKET_BITS) ns: ~1us up to ~18 minutes
+MIN_BUCKET_BITS = 10
+BUCKETS = 31
+
+STAGES = ("chat", "model", "tool", "parse")
+
+
+class LogEntry(NamedTuple):
+    time_ns: int        # time.monotonic_ns() when the entry was recorded
+    action: str
+    prompt: str
+    other: dict
+
+    def to_dict(self) -> dict:
+        return self._asdict()
+
+
+class LatencyHistogram:
+    """Log2-bucketed latency distribution with exact count, sum, min and max."""
+
+    def __init__(self):
+        self.buckets = [0] * BUCKETS
+        self.count = 0
+        self.total_ns = 0
+        self.min_ns: Optional[int] = None
+        self.max_ns: Optional[int] = None
+
+    def observe(self, duration_ns: int):
+        bucket = min(max(duration_ns.bit_length() - MIN_BUCKET_BITS, 0), BUCKETS - 1)
+        self.buckets[bucket] += 1
+        self.count += 1
+        self.total_ns += duration_ns
+        self.min_ns = duration_ns if self.min_ns is None else min(self.min_ns, duration_ns)
+        self.max_ns = duration_ns if self.max_ns is None else max(self.max_ns, duration_ns)
+
+    def quantile(self, q: float) -> Optional[int]:
+        """Upper bound (ns) of the bucket holding the q-th quantile, capped at the observed max."""
+        if not self.count:
+            return None
+        target = max(1, round(q * self.count))
+        seen = 0
+        for bucket, n in enumerate(self.buckets):
+            seen += n
+            if seen >= target:
+                return min(2 ** (bucket + MIN_BUCKET_BITS), self.max_ns)
+        return self.max_ns
+
+    def merge(self, other: "LatencyHistogram"):
+        for bucket, n in enumerate(other.buckets):
+            self.buckets[bucket] += n
+        self.count += other.count
+        self.total_ns += other.total_ns
+        for value in (other.min_ns, other.max_ns):
+            if value is not None:
+                self.min_ns = value if self.min_ns is None else min(self.min_ns, value)
+                self.max_ns = value if self.max_ns is None else max(self.max_ns, value)
+
+    def summary(self) -> Dict[str, object]:
+        return {
+            "count": self.count,
+            "total_ms": round(self.total_ns / 1e6, 3),
+            "mean_ms": round(self.total_ns / self.count / 1e6, 3) if self.count else None,
+            "p50_ms": _ms(self.quantile(0.5)),
+            "p90_ms": _ms(self.quantile(0.9)),
+            "p99_ms": _ms(self.quantile(0.99)),
+            "max_ms": _ms(self.max_ns)
+        }
+
+    def to_dict(self) -> dict:
+        return {
+            "buckets": self.buckets,
+            "count": self.count,
+            "total_ns": self.total_ns,
+            "min_ns": self.min_ns,
+            "max_ns": self.max_ns
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "LatencyHistogram":
+        histogram = cls()
+        histogram.buckets = list(data["buckets"])
+        histogram.count = data["count"]
+        histogram.total_ns = data["total_ns"]
+        histogram.min_ns = data["min_ns"]
+        histogram.max_ns = data["max_ns"]
+        return histogram
+
+
+def _ms(ns: Optional[int]) -> Optional[float]:
+    return None if ns is None else round(ns / 1e6, 3)
+
+
+class AgentLog:
+    """Ring buffer of the latest log entries plus per-stage latency histograms.
+
+    Safe to share between agents running on different threads.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self.entries: Deque[LogEntry] = deque(maxlen=capacity)
+        self.histograms: Dict[str, LatencyHistogram] = {stage: LatencyHistogram() for stage in STAGES}
+        self.recorded = 0
+        self._lock = threading.Lock()
+
+    def record(self, action: str, prompt: str = "", other: Optional[dict] = None) -> LogEntry:
+        """Appends an entry, dropping the oldest once the buffer is full."""
+        entry = LogEntry(time.monotonic_ns(), action, prompt, other or {})
+        with self._lock:
+            self.entries.append(entry)
+            self.recorded += 1
+        return entry
+
+    def observe(self, stage: str, duration_ns: int):
+        """Adds one latency sample to a stage's histogram."""
+        with self._lock:
+            histogram = self.histograms.get(stage)
+            if histogram is None:
+                histogram = self.histograms[stage] = LatencyHistogram()
+            histogram.observe(duration_ns)
+
+    @contextmanager
+    def timed(self, stage: str) -> Iterator[None]:
+        """Times the enclosed block into ``stage``, including when it raises."""
+        start = time.monotonic_ns()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.monotonic_ns() - start)
+
+    @property
+    def dropped(self) -> int:
+        """Entries that have been evicted from the ring buffer."""
+        return self.recorded - len(self.entries)
+
+    def summary(self) -> Dict[str, Dict[str, object]]:
+        """Latency summary (ms) of every stage that has samples."""
+        with self._lock:
+            return {stage: h.summary() for stage, h in self.histograms.items() if h.count}
+
+    def __iter__(self) -> Iterator[LogEntry]:
+        with self._lock:
+            return iter(list(self.entries))
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def export(self, path: str) -> int:
+        """Writes the retained entries and the histograms as JSONL; returns the number of entries."""
+        with self._lock:
+            entries = list(self.entries)
+            histograms = {stage: h.to_dict() for stage, h in self.histograms.items()}
+            header = {"type": "header", "capacity": self.capacity, "recorded": self.recorded}
+
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(json.dumps(header) + "\n")
+            for entry in entries:
+                f.write(json.dumps({"type": "entry", **entry.to_dict()}, ensure_ascii=False, default=str) + "\n")
+            for stage, histogram in histograms.items():
+                f.write(json.dumps({"type": "histogram", "stage": stage, **histogram}) + "\n")
+        return len(entries)
+
+
+def load_histograms(path: str) -> Dict[str, LatencyHistogram]:
+    """Reads the stage histograms back from an ``export`` file."""
+    histograms = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            if record["type"] == "histogram":
+                histograms[record["stage"]] = LatencyHistogram.from_dict(record)
+    return histograms
+
+
+class ConversationMemory:
+    """Chat messages with a pinned prefix and a bounded window of recent turns.
+
+    The messages present before the first chat (system prompt and tool
+    instructions) are pinned; after that only the latest ``max_messages``
+    are kept, so long-lived agents do not grow without limit.
+    """
+
+    def __init__(self, messages: Optional[List[dict]] = None, max_messages: int = DEFAULT_MAX_MESSAGES):
+        self.pinned: List[dict] = list(messages or [])
+        self.recent: Deque[dict] = deque(maxlen=max_messages)
+        self.frozen = False
+
+    def append(self, message: dict):
+        if self.frozen:
+            self.recent.append(message)
+        else:
+            self.pinned.append(message)
+
+    def freeze(self):
+        """Pins everything added so far; later messages go to the bounded window."""
+        self.frozen = True
+
+    def messages(self) -> List[dict]:
+        return self.pinned + list(self.recent)
+
+    def __len__(self) -> int:
+        return len(self.pinned) + len(self.recent)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarize stage latencies from an AgentLog export.")
+    parser.add_argument("path", help="JSONL file written by AgentLog.export")
+    args = parser.parse_args(argv)
+
+    for stage, histogram in load_histograms(args.path).items():
+        if histogram.count:
+            print(stage, json.dumps(histogram.summary()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+# ensemble.py
+# Monte Carlo ensembles of epidemic_sim runs on a process pool
+#
+# Usage: python ensemble.py [--runs 1000] [--workers N] [--seed-airport SEA] [-o ensemble.json]
+#
+# Realizations are split into fixed-size batches. Each batch runs vectorized
+# in a worker process (all of its realizations advance together as one
+# (runs, airports) array) and sends back only its arrival steps, which the
+# parent folds into per-airport arrival-time histograms. Every batch draws
+# from its own spawned seed, so results do not depend on the worker count.
+
+import argparse
+import json
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from epidemic_sim import FlightGraph, SEIRParameters, busiest_airport, load_flight_graph, simulate_arrivals
+
+DEFAULT_RUNS = 1000
+BATCH_SIZE = 64
+QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+
+@dataclass
+class EnsembleResult:
+    """Arrival-time distributions of every airport across an ensemble of runs."""
+    graph: FlightGraph
+    params: SEIRParameters
+    runs: int
+    histogram: np.ndarray   # (airports, steps + 1) runs that reached each airport at each step
+
+    def probability(self) -> np.ndarray:
+        """Share of runs that reached each airport within the simulated horizon."""
+        return self.histogram.sum(axis=1) / self.runs
+
+    def cumulative(self) -> np.ndarray:
+        """Share of runs that had reached each airport by each step."""
+        return np.cumsum(self.histogram, axis=1) / self.runs
+
+    def quantiles(self, quantiles: Sequence[float] = QUANTILES) -> np.ndarray:
+        """Arrival-step quantiles among the runs that reached each airport, -1 where none did.
+
+        Returns an array of shape (airports, len(quantiles)).
+        """
+        counts = np.cumsum(self.histogram, axis=1)
+        reached = counts[:, -1:]
+        targets = np.ceil(np.asarray(quantiles)[None, :] * reached).clip(min=1)
+        steps = np.stack([
+            (counts < targets[:, [q]]).sum(axis=1) for q in range(len(quantiles))
+        ], axis=1)
+        return np.where(reached > 0, steps, -1)
+
+    def mean_arrival(self) -> np.ndarray:
+        """Mean arrival step among the runs that reached each airport, NaN where none did."""
+        reached = self.histogram.sum(axis=1)
+        total = self.histogram @ np.arange(self.histogram.shape[1])
+        return np.divide(total, reached, out=np.full(len(reached), np.nan), where=reached > 0)
+
+    def to_dict(self, include_cumulative: bool = False) -> Dict[str, object]:
+        """Returns the ensemble in the /api/simulation/ensemble JSON shape."""
+        quantiles = self.quantiles()
+        mean = self.mean_arrival()
+        result = {
+            'airports': [
+                {'name': code, 'lat': float(lat), 'lng': float(lon)}
+                for code, lat, lon in zip(self.graph.codes, self.graph.lat, self.graph.lon)
+            ],
+            'params': asdict(self.params),
+            'runs': self.runs,
+            'steps': self.params.steps,
+            'probability': self.probability().round(4).tolist(),
+            'mean_arrival': [None if np.isnan(value) else round(float(value), 2) for value in mean],
+            'quantiles': {
+                f'p{round(q * 100)}': [None if step < 0 else int(step) for step in quantiles[:, i]]
+                for i, q in enumerate(QUANTILES)
+            }
+        }
+        if include_cumulative:
+            result['cumulative'] = self.cumulative().round(4).tolist()
+        return result
+
+
+def _run_batch(
+    graph: FlightGraph,
+    seed_airports: Sequence[str],
+    params: SEIRParameters,
+    runs: int,
+    seed: np.random.SeedSequence
+) -> np.ndarray:
+    return simulate_arrivals(graph, seed_airports, params, runs, np.random.default_rng(seed))
+
+
+def _accumulate(histogram: np.ndarray, arrival_step: np.ndarray):
+    """Adds a batch of (runs, airports) arrival steps to the histogram."""
+    airports, width = histogram.shape
+    reached = arrival_step >= 0
+    cells = np.nonzero(reached)[1] * width + arrival_step[reached]
+    histogram += np.bincount(cells, minlength=airports * width).reshape(airports, width)
+
+
+def run_ensemble(
+    graph: FlightGraph,
+    seed_airports: Sequence[str],
+    params: SEIRParameters = SEIRParameters(),
+    runs: int = DEFAULT_RUNS,
+    random_seed: Optional[int] = None,
+    batch_size: int = BATCH_SIZE,
+    executor: Optional[ProcessPoolExecutor] = None
+) -> EnsembleResult:
+    """Runs ``runs`` realizations in batches on a process pool and reduces them."""
+    if runs < 1:
+        raise ValueError("runs must be at least 1")
+
+    sizes = [batch_size] * (runs // batch_size)
+    if runs % batch_size:
+        sizes.append(runs % batch_size)
+    seeds = np.random.SeedSequence(random_seed).spawn(len(sizes))
+
+    executor = executor or get_ensemble_executor()
+    histogram = np.zeros((len(graph), params.steps + 1), dtype="int64")
+    futures = [
+        executor.submit(_run_batch, graph, list(seed_airports), params, size, seed)
+        for size, seed in zip(sizes, seeds)
+    ]
+    for future in as_completed(futures):
+        _accumulate(histogram, future.result())
+
+    return EnsembleResult(graph, params, runs, histogram)
+
+
+_default_executor: Optional[ProcessPoolExecutor] = None
+_default_executor_lock = threading.Lock()
+
+
+def get_ensemble_executor() -> ProcessPoolExecutor:
+    """Returns the process-wide worker pool, one process per CPU by default."""
+    global _default_executor
+    with _default_executor_lock:
+        if _default_executor is None:
+            workers = int(os.environ.get("ENSEMBLE_WORKERS", 0)) or os.cpu_count()
+            _default_executor = ProcessPoolExecutor(max_workers=workers)
+        return _default_executor
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a Monte Carlo ensemble of epidemic simulations.")
+    parser.add_argument("files", nargs="*", help="flight CSVs (default: flight store or data/flights/*_*.csv)")
+    parser.add_argument("--airports", default=None, help="airport coordinates CSV (default: data/flights/airports.csv)")
+    parser.add_argument("--seed-airport", action="append", help="outbreak origin (default: busiest airport)")
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS)
+    parser.add_argument("--steps", type=int, default=SEIRParameters.steps, help="days to simulate")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--random-seed", type=int, default=None)
+    parser.add_argument("-o", "--output", default="ensemble.json", help="where to write the distributions")
+    args = parser.parse_args(argv)
+
+    graph = load_flight_graph(args.files or None, args.airports)
+    seeds: List[str] = args.seed_airport or [busiest_airport(graph)]
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        result = run_ensemble(
+            graph, seeds, SEIRParameters(steps=args.steps), args.runs, args.random_seed, executor=executor
+        )
+
+    with open(args.output, "w") as f:
+        json.dump(result.to_dict(), f)
+    print(f"Ran {args.runs} realizations over {len(graph)} airports -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
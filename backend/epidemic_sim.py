@@ -0,0 +1,326 @@
+# epidemic_sim.py
+# Stochastic SEIR metapopulation model over the flight network
+#
+# Usage: python epidemic_sim.py [--seed-airport SEA] [--steps 180] [-o simulation.json]
+#
+# Every airport is a population with susceptible, exposed, infectious and
+# recovered compartments held in NumPy arrays. Within an airport, infections
+# and progressions are binomial draws; between airports, travellers move
+# along the observed flight routes through a sparse flow matrix. A run is
+# computed up front so the globe only plays back precomputed steps.
+
+import argparse
+import json
+import threading
+from dataclasses import asdict, dataclass, field
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy import sparse
+
+# pandas and flight_risk are imported where routes are read, so a worker
+# running on a prebuilt graph (frontend/snapshot.py) never loads them
+if TYPE_CHECKING:
+    import pandas as pd
+
+COMPARTMENTS = ("S", "E", "I", "R")
+
+
+@dataclass
+class FlightGraph:
+    """Airports with coordinates and a sparse matrix of flights between them."""
+    codes: List[str]
+    lat: np.ndarray
+    lon: np.ndarray
+    flights: sparse.csr_matrix  # flights[i, j]: observed flights from airport i to airport j
+    index: Dict[str, int] = field(init=False)
+
+    def __post_init__(self):
+        self.index = {code: i for i, code in enumerate(self.codes)}
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+
+@dataclass(frozen=True)
+class SEIRParameters:
+    """Epidemic and mobility parameters for one simulation run (rates per day)."""
+    beta: float = 0.3                   # transmission rate
+    sigma: float = 1 / 5.2              # 1 / incubation period
+    gamma: float = 1 / 10               # 1 / infectious period
+    population: int = 1_000_000         # catchment population of each airport
+    passengers_per_flight: float = 150
+    flight_days: float = 365            # days of traffic covered by the flight records
+    initial_infected: int = 10
+    steps: int = 180
+    arrival_threshold: int = 1          # infected (exposed or infectious) people that mark an airport reached
+
+
+@dataclass
+class SimulationResult:
+    """Compartment totals per step, plus when and from where each airport was reached."""
+    graph: FlightGraph
+    params: SEIRParameters
+    totals: Dict[str, np.ndarray]       # compartment -> (steps + 1,) population-wide counts
+    infectious: np.ndarray              # (steps + 1, airports) infectious people per airport
+    arrival_step: np.ndarray            # step each airport was reached, -1 if never
+    source: np.ndarray                  # airport that most likely seeded each one, -1 for seeds/never
+
+    def to_dict(self, include_infectious: bool = False) -> Dict[str, object]:
+        """Returns the run in the /api/simulation JSON shape."""
+        result = {
+            'airports': [
+                {'name': code, 'lat': float(lat), 'lng': float(lon)}
+                for code, lat, lon in zip(self.graph.codes, self.graph.lat, self.graph.lon)
+            ],
+            'params': asdict(self.params),
+            'steps': self.params.steps,
+            'arrival_step': self.arrival_step.tolist(),
+            'source': self.source.tolist(),
+            'totals': {name: values.tolist() for name, values in self.totals.items()}
+        }
+        if include_infectious:
+            result['infectious'] = self.infectious.tolist()
+        return result
+
+
+def read_routes(paths: Optional[Iterable[str]] = None, store_dir: Optional[str] = None) -> "pd.DataFrame":
+    """Counts flights per (origin, destination) route from the flight store or CSVs."""
+    import pandas as pd
+    import flight_store
+    from flight_risk import DESTINATION, default_flight_files
+
+    store_dir = store_dir or flight_store.STORE_DIR
+    if paths is None and flight_store.store_exists(store_dir):
+        frames = (
+            batch.to_pandas()
+            for batch in flight_store.scan_flights(store_dir, columns=["origin", DESTINATION])
+        )
+    else:
+        paths = list(paths) if paths is not None else default_flight_files()
+        if not paths:
+            raise FileNotFoundError("No flight records found to build the flight graph.")
+        frames = (
+            pd.read_csv(path, usecols=[DESTINATION], dtype={DESTINATION: str})
+            .assign(origin=flight_store.source_partition(path)[0])
+            for path in paths
+        )
+
+    counts = [frame.groupby(["origin", DESTINATION]).size() for frame in frames]
+    if not counts:
+        raise FileNotFoundError("No flight records found to build the flight graph.")
+    return pd.concat(counts).groupby(level=[0, 1]).sum().rename("flights").reset_index()
+
+
+def build_flight_graph(routes: "pd.DataFrame", airports: "pd.DataFrame", symmetric: bool = True) -> FlightGraph:
+    """Builds the flight graph over airports with known coordinates.
+
+    With ``symmetric`` every route is also flown in reverse, since BTS
+    departure extracts only list the outbound leg from each origin.
+    """
+    import pandas as pd
+    from flight_risk import DESTINATION
+
+    routes = routes[routes["origin"].isin(airports.index) & routes[DESTINATION].isin(airports.index)]
+    codes = sorted(set(routes["origin"]) | set(routes[DESTINATION]))
+    if not codes:
+        raise ValueError("No routes connect airports with known coordinates.")
+
+    index = pd.Index(codes)
+    rows = index.get_indexer(routes["origin"])
+    cols = index.get_indexer(routes[DESTINATION])
+    values = routes["flights"].to_numpy(dtype="float64")
+    if symmetric:
+        rows, cols, values = np.concatenate([rows, cols]), np.concatenate([cols, rows]), np.concatenate([values, values])
+
+    flights = sparse.csr_matrix((values, (rows, cols)), shape=(len(codes), len(codes)))
+    flights.setdiag(0)
+    flights.eliminate_zeros()
+
+    located = airports.loc[codes]
+    return FlightGraph(codes, located["lat"].to_numpy(), located["lon"].to_numpy(), flights)
+
+
+def load_flight_graph(
+    paths: Optional[Iterable[str]] = None,
+    airports_path: Optional[str] = None,
+    store_dir: Optional[str] = None
+) -> FlightGraph:
+    """Reads the flight records and builds the flight graph."""
+    from flight_risk import AIRPORTS_PATH, load_airports
+
+    return build_flight_graph(read_routes(paths, store_dir), load_airports(airports_path or AIRPORTS_PATH))
+
+
+def travel_matrix(graph: FlightGraph, params: SEIRParameters) -> Tuple[np.ndarray, sparse.csr_matrix]:
+    """Per-airport daily departure probability and row-stochastic destination shares."""
+    daily_travellers = graph.flights * (params.passengers_per_flight / params.flight_days)
+    outbound = np.asarray(daily_travellers.sum(axis=1)).ravel()
+    leave = np.minimum(outbound / params.population, 1.0)
+
+    scale = np.divide(1.0, outbound, out=np.zeros_like(outbound), where=outbound > 0)
+    shares = sparse.diags(scale) @ daily_travellers
+    return leave, shares.tocsr()
+
+
+def _stochastic_round(values: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """Rounds to integers up or down in proportion to the fractional part."""
+    whole = np.floor(values)
+    return (whole + (rng.random(values.shape) < values - whole)).astype("int64")
+
+
+def _travel(counts: np.ndarray, leave: np.ndarray, arrivals_t: sparse.csr_matrix, rng: np.random.Generator) -> np.ndarray:
+    """Moves a binomial share of one compartment along the flight routes.
+
+    ``counts`` is either one realization (airports,) or a batch of them
+    (runs, airports); each row travels independently.
+    """
+    departing = rng.binomial(counts, leave)
+    arriving = _stochastic_round((arrivals_t @ departing.T).T, rng)
+    return np.maximum(counts - departing + arriving, 0)
+
+
+def _seir_step(state, params: SEIRParameters, leave: np.ndarray, arrivals_t: sparse.csr_matrix, rng: np.random.Generator):
+    """Advances (S, E, I, R) by one day: local transmission, progression, then travel."""
+    S, E, I, R = state
+    population = np.maximum(S + E + I + R, 1)
+    infected = rng.binomial(S, 1 - np.exp(-params.beta * I / population))
+    progressed = rng.binomial(E, 1 - np.exp(-params.sigma))
+    recovered = rng.binomial(I, 1 - np.exp(-params.gamma))
+    S = S - infected
+    E = E + infected - progressed
+    I = I + progressed - recovered
+    R = R + recovered
+    return tuple(_travel(counts, leave, arrivals_t, rng) for counts in (S, E, I, R))
+
+
+def _seed_indices(graph: FlightGraph, seed_airports: Sequence[str]) -> np.ndarray:
+    unknown = [code for code in seed_airports if code not in graph.index]
+    if unknown:
+        raise ValueError(f"Unknown seed airports: {', '.join(unknown)}")
+    return np.array([graph.index[code] for code in seed_airports], dtype="int64")
+
+
+def _initial_state(shape, seeds: np.ndarray, params: SEIRParameters):
+    S = np.full(shape, params.population, dtype="int64")
+    E = np.zeros(shape, dtype="int64")
+    I = np.zeros(shape, dtype="int64")
+    R = np.zeros(shape, dtype="int64")
+    I[..., seeds] = params.initial_infected
+    S[..., seeds] -= params.initial_infected
+    return S, E, I, R
+
+
+def simulate(
+    graph: FlightGraph,
+    seed_airports: Sequence[str],
+    params: SEIRParameters = SEIRParameters(),
+    random_seed: Optional[int] = None
+) -> SimulationResult:
+    """Runs one stochastic SEIR realization over the flight graph."""
+    seeds = _seed_indices(graph, seed_airports)
+    rng = np.random.default_rng(random_seed)
+    n = len(graph)
+
+    state = _initial_state(n, seeds, params)
+    leave, shares = travel_matrix(graph, params)
+    arrivals_t = shares.T.tocsr()
+    flights_csc = graph.flights.tocsc()
+
+    totals = {name: np.zeros(params.steps + 1, dtype="int64") for name in COMPARTMENTS}
+    infectious = np.zeros((params.steps + 1, n), dtype="int32")
+    arrival_step = np.full(n, -1, dtype="int32")
+    source = np.full(n, -1, dtype="int32")
+    arrival_step[seeds] = 0
+
+    def record(step):
+        for name, counts in zip(COMPARTMENTS, state):
+            totals[name][step] = counts.sum()
+        infectious[step] = state[2]
+
+    record(0)
+    for step in range(1, params.steps + 1):
+        previous_I = state[2]
+        state = _seir_step(state, params, leave, arrivals_t, rng)
+        _, E, I, _ = state
+
+        reached = np.flatnonzero((arrival_step < 0) & (I + E >= params.arrival_threshold))
+        if len(reached):
+            arrival_step[reached] = step
+            for j in reached:
+                column = flights_csc[:, j]
+                pressure = column.data * previous_I[column.indices]
+                if pressure.any():
+                    source[j] = column.indices[np.argmax(pressure)]
+        record(step)
+
+    return SimulationResult(graph, params, totals, infectious, arrival_step, source)
+
+
+def simulate_arrivals(
+    graph: FlightGraph,
+    seed_airports: Sequence[str],
+    params: SEIRParameters,
+    runs: int,
+    rng: np.random.Generator
+) -> np.ndarray:
+    """Runs a batch of realizations side by side and returns their arrival steps.
+
+    The result has shape (runs, airports), holding the step at which each
+    realization reached each airport, or -1 if it never did.
+    """
+    seeds = _seed_indices(graph, seed_airports)
+    state = _initial_state((runs, len(graph)), seeds, params)
+    leave, shares = travel_matrix(graph, params)
+    arrivals_t = shares.T.tocsr()
+
+    arrival_step = np.full((runs, len(graph)), -1, dtype="int16")
+    arrival_step[:, seeds] = 0
+    for step in range(1, params.steps + 1):
+        state = _seir_step(state, params, leave, arrivals_t, rng)
+        _, E, I, _ = state
+        arrival_step[(arrival_step < 0) & (I + E >= params.arrival_threshold)] = step
+    return arrival_step
+
+
+def busiest_airport(graph: FlightGraph) -> str:
+    """Returns the airport with the most flights, a sensible default outbreak origin."""
+    degree = np.asarray(graph.flights.sum(axis=1)).ravel()
+    return graph.codes[int(np.argmax(degree))]
+
+
+_default_graph: Optional[FlightGraph] = None
+_default_graph_lock = threading.Lock()
+
+
+def get_flight_graph(refresh: bool = False) -> FlightGraph:
+    """Returns the process-wide flight graph, building it on first use."""
+    global _default_graph
+    with _default_graph_lock:
+        if _default_graph is None or refresh:
+            _default_graph = load_flight_graph()
+        return _default_graph
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate epidemic spread over the flight network.")
+    parser.add_argument("files", nargs="*", help="flight CSVs (default: flight store or data/flights/*_*.csv)")
+    parser.add_argument("--airports", default=None, help="airport coordinates CSV (default: data/flights/airports.csv)")
+    parser.add_argument("--seed-airport", action="append", help="outbreak origin (default: busiest airport)")
+    parser.add_argument("--steps", type=int, default=SEIRParameters.steps, help="days to simulate")
+    parser.add_argument("--random-seed", type=int, default=None)
+    parser.add_argument("-o", "--output", default="simulation.json", help="where to write the run")
+    args = parser.parse_args(argv)
+
+    graph = load_flight_graph(args.files or None, args.airports)
+    seeds = args.seed_airport or [busiest_airport(graph)]
+    result = simulate(graph, seeds, SEIRParameters(steps=args.steps), args.random_seed)
+
+    with open(args.output, "w") as f:
+        json.dump(result.to_dict(), f)
+    reached = int((result.arrival_step >= 0).sum())
+    print(f"Reached {reached}/{len(graph)} airports in {args.steps} steps -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+# flight_risk.py
+# Airport transmission-risk scoring, extracted from transmission.ipynb
+#
+# Usage: python flight_risk.py [flight CSV ...] [--store DIR] [-o airport_risk_clusters.csv]
+#
+# Without explicit CSVs, flights are read from the columnar store written by
+# flight_store.py when one exists, and from data/flights/*_*.csv otherwise.
+
+import argparse
+import glob
+import os
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+FLIGHTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "flights")
+AIRPORTS_PATH = os.path.join(FLIGHTS_DIR, "airports.csv")
+OUTPUT_PATH = "airport_risk_clusters.csv"
+
+DESTINATION = "Destination Airport"
+FLIGHT_NUMBER = "Flight Number"
+DEPARTURE_DELAY = "Departure delay (Minutes)"
+
+# Only the columns scoring needs are parsed, with compact dtypes
+FLIGHT_DTYPES: Dict[str, str] = {
+    DESTINATION: "category",
+    FLIGHT_NUMBER: "float32",
+    DEPARTURE_DELAY: "float32"
+}
+
+OUTPUT_COLUMNS = [DESTINATION, "risk_cluster", "risk_score", "lat", "lon"]
+
+# Weighting of the composite risk score
+FLIGHT_COUNT_WEIGHT = 0.6
+DELAY_WEIGHT = 0.4
+N_CLUSTERS = 3
+RANDOM_STATE = 42
+
+# Rows parsed per chunk, so memory stays bounded on multi-year BTS extracts
+CHUNK_SIZE = 1_000_000
+
+
+def default_flight_files(flights_dir: str = FLIGHTS_DIR) -> List[str]:
+    """Returns the per-carrier flight CSVs (e.g. SEA_AA.csv) in a directory."""
+    return sorted(glob.glob(os.path.join(flights_dir, "*_*.csv")))
+
+
+def read_flight_chunks(paths: Iterable[str], chunk_size: int = CHUNK_SIZE) -> Iterable[pd.DataFrame]:
+    """Yields flight records chunk by chunk, parsing only the scored columns."""
+    for path in paths:
+        yield from pd.read_csv(
+            path,
+            usecols=list(FLIGHT_DTYPES),
+            dtype=FLIGHT_DTYPES,
+            chunksize=chunk_size
+        )
+
+
+def partial_aggregates(flights: pd.DataFrame) -> pd.DataFrame:
+    """Per-destination flight count, delay sum and delay count for a batch of flights."""
+    grouped = flights.groupby(DESTINATION, observed=True)
+    partial = pd.DataFrame({
+        "flight_count": grouped[FLIGHT_NUMBER].count(),
+        "delay_sum": grouped[DEPARTURE_DELAY].sum(min_count=1).astype("float64"),
+        "delay_count": grouped[DEPARTURE_DELAY].count()
+    })
+    partial.index = partial.index.astype(str)
+    return partial
+
+
+def combine_aggregates(partials: Iterable[pd.DataFrame]) -> pd.DataFrame:
+    """Sums partial aggregates and derives the mean departure delay."""
+    partials = list(partials)
+    if not partials:
+        raise ValueError("No flight records to aggregate.")
+
+    combined = pd.concat(partials).groupby(level=0).sum(min_count=1)
+    combined.index.name = DESTINATION
+    combined["avg_delay"] = combined["delay_sum"] / combined["delay_count"].replace(0, np.nan)
+    return combined
+
+
+def aggregate_flights(paths: Optional[Iterable[str]] = None, chunk_size: int = CHUNK_SIZE) -> pd.DataFrame:
+    """Aggregates flight CSVs by destination without holding them in memory at once."""
+    paths = list(paths) if paths is not None else default_flight_files()
+    if not paths:
+        raise FileNotFoundError(f"No flight CSVs found in {FLIGHTS_DIR}")
+    return combine_aggregates(partial_aggregates(chunk) for chunk in read_flight_chunks(paths, chunk_size))
+
+
+def aggregate_store(
+    store_dir: Optional[str] = None,
+    origins: Optional[Sequence[str]] = None,
+    carriers: Optional[Sequence[str]] = None,
+    months: Optional[Sequence[str]] = None
+) -> pd.DataFrame:
+    """Aggregates flights from the columnar store, reading only the scored columns."""
+    import flight_store
+
+    store_dir = store_dir or flight_store.STORE_DIR
+    if not flight_store.store_exists(store_dir):
+        raise FileNotFoundError(f"No flight store found in {store_dir}")
+
+    batches = flight_store.scan_flights(
+        store_dir, list(FLIGHT_DTYPES), origins=origins, carriers=carriers, months=months
+    )
+    return combine_aggregates(
+        partial_aggregates(batch.to_pandas().astype({DESTINATION: "category"}))
+        for batch in batches if batch.num_rows
+    )
+
+
+def load_aggregates(paths: Optional[Iterable[str]] = None, store_dir: Optional[str] = None) -> pd.DataFrame:
+    """Aggregates explicit CSVs, else the flight store if ingested, else the default CSVs."""
+    if paths is None:
+        import flight_store
+
+        store_dir = store_dir or flight_store.STORE_DIR
+        if flight_store.store_exists(store_dir):
+            return aggregate_store(store_dir)
+    return aggregate_flights(paths)
+
+
+def min_max(values: np.ndarray) -> np.ndarray:
+    """Scales values to [0, 1] like MinMaxScaler, mapping a constant column to 0."""
+    low = np.nanmin(values)
+    span = np.nanmax(values) - low
+    if not span:
+        return np.zeros_like(values, dtype="float64")
+    return (values - low) / span
+
+
+def cluster_scores(scores: np.ndarray, n_clusters: int = N_CLUSTERS, random_state: int = RANDOM_STATE) -> np.ndarray:
+    """Clusters one-dimensional risk scores with KMeans."""
+    from sklearn.cluster import KMeans
+
+    if len(scores) < n_clusters:
+        return np.zeros(len(scores), dtype="int32")
+    kmeans = KMeans(n_clusters=n_clusters, random_state=random_state, n_init=10)
+    return kmeans.fit_predict(scores.reshape(-1, 1)).astype("int32")
+
+
+def score_airports(
+    aggregates: pd.DataFrame,
+    flight_count_weight: float = FLIGHT_COUNT_WEIGHT,
+    delay_weight: float = DELAY_WEIGHT,
+    n_clusters: int = N_CLUSTERS
+) -> pd.DataFrame:
+    """Adds normalized metrics, the composite risk score and its cluster."""
+    scored = aggregates.copy()
+    scored["flight_count_norm"] = min_max(scored["flight_count"].to_numpy(dtype="float64"))
+    scored["avg_delay_norm"] = min_max(scored["avg_delay"].to_numpy(dtype="float64"))
+    scored["risk_score"] = (
+        flight_count_weight * scored["flight_count_norm"] + delay_weight * scored["avg_delay_norm"]
+    )
+    scored["risk_cluster"] = cluster_scores(scored["risk_score"].fillna(0).to_numpy(), n_clusters)
+    return scored
+
+
+def load_airports(path: str = AIRPORTS_PATH) -> pd.DataFrame:
+    """Loads airport coordinates indexed by airport code."""
+    airports = pd.read_csv(
+        path,
+        sep=";",
+        usecols=["Airport-Code", "Latitude", "Longitude"],
+        dtype={"Airport-Code": str, "Latitude": "float64", "Longitude": "float64"}
+    )
+    return (
+        airports.drop_duplicates("Airport-Code")
+        .set_index("Airport-Code")
+        .rename(columns={"Latitude": "lat", "Longitude": "lon"})
+    )
+
+
+def attach_coordinates(scored: pd.DataFrame, airports: pd.DataFrame) -> pd.DataFrame:
+    """Joins airport coordinates and drops airports without any."""
+    located = scored.join(airports[["lat", "lon"]], how="inner")
+    return located.dropna(subset=["lat", "lon"])
+
+
+def compute_airport_risk(
+    paths: Optional[Iterable[str]] = None,
+    airports_path: str = AIRPORTS_PATH,
+    n_clusters: int = N_CLUSTERS,
+    store_dir: Optional[str] = None
+) -> pd.DataFrame:
+    """Runs the full pipeline and returns one row per scored airport."""
+    scored = score_airports(load_aggregates(paths, store_dir), n_clusters=n_clusters)
+    located = attach_coordinates(scored, load_airports(airports_path))
+    return located.reset_index().rename(columns={"index": DESTINATION})[OUTPUT_COLUMNS]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score destination airports by transmission risk.")
+    parser.add_argument("files", nargs="*", help="flight CSVs (default: data/flights/*_*.csv)")
+    parser.add_argument("--store", default=None, help="columnar flight store (default: data/flights/store)")
+    parser.add_argument("--airports", default=AIRPORTS_PATH, help="airport coordinates CSV")
+    parser.add_argument("-o", "--output", default=OUTPUT_PATH, help="where to write the scores")
+    args = parser.parse_args(argv)
+
+    risk = compute_airport_risk(args.files or None, args.airports, store_dir=args.store)
+    risk.to_csv(args.output, index=False)
+    print(f"Scored {len(risk)} airports -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+# flight_store.py
+# Columnar, memory-mapped store for BTS flight records
+#
+# Usage: python flight_store.py [flight CSV ...] [--store data/flights/store]
+#
+# CSVs are converted once into uncompressed Arrow IPC files partitioned as
+# origin=SEA/carrier=AA/month=2024-01/. Readers memory-map those files and
+# only touch the columns and partitions they ask for, so scoring cost does
+# not grow with the number of carriers or years kept on disk.
+
+import argparse
+import csv
+import glob
+import os
+import re
+from typing import Iterable, Iterator, List, Optional, Sequence
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+import pyarrow.dataset as ds
+import pyarrow.fs as pa_fs
+
+FLIGHTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "flights")
+STORE_DIR = os.path.join(FLIGHTS_DIR, "store")
+
+DESTINATION = "Destination Airport"
+FLIGHT_NUMBER = "Flight Number"
+DEPARTURE_DELAY = "Departure delay (Minutes)"
+DATE = "Date (MM/DD/YYYY)"
+CARRIER = "Carrier Code"
+
+PARTITION_SCHEMA = pa.schema([
+    ("origin", pa.string()),
+    ("carrier", pa.string()),
+    ("month", pa.string())
+])
+
+# Stored flight columns. Destinations stay plain strings: IPC files allow only
+# one dictionary per column, and readers re-encode them as categoricals anyway.
+FLIGHT_SCHEMA = pa.schema([
+    (DESTINATION, pa.string()),
+    (FLIGHT_NUMBER, pa.float32()),
+    (DEPARTURE_DELAY, pa.float32())
+])
+
+STORED_SCHEMA = pa.unify_schemas([FLIGHT_SCHEMA, PARTITION_SCHEMA])
+
+UNKNOWN = "unknown"
+BLOCK_SIZE = 64 << 20
+
+SOURCE_NAME = re.compile(r"^(?P<origin>[A-Za-z0-9]+)_(?P<carrier>[A-Za-z0-9]+)$")
+
+
+def source_partition(path: str):
+    """Reads origin and carrier from a BTS file name such as SEA_AA.csv."""
+    match = SOURCE_NAME.match(os.path.splitext(os.path.basename(path))[0])
+    if not match:
+        return UNKNOWN, UNKNOWN
+    return match.group("origin").upper(), match.group("carrier").upper()
+
+
+def _partitioned_batches(path: str, block_size: int) -> Iterator[pa.RecordBatch]:
+    """Streams a CSV as record batches carrying the stored and partition columns."""
+    origin, carrier = source_partition(path)
+    with open(path, newline="") as f:
+        header = next(csv.reader(f), [])
+    include = [name for name in (DESTINATION, FLIGHT_NUMBER, DEPARTURE_DELAY, DATE, CARRIER) if name in header]
+
+    reader = pa_csv.open_csv(
+        path,
+        read_options=pa_csv.ReadOptions(block_size=block_size),
+        convert_options=pa_csv.ConvertOptions(
+            include_columns=include,
+            column_types={
+                DESTINATION: pa.string(),
+                FLIGHT_NUMBER: pa.float32(),
+                DEPARTURE_DELAY: pa.float32(),
+                DATE: pa.string(),
+                CARRIER: pa.string()
+            }
+        )
+    )
+    for batch in reader:
+        rows = batch.num_rows
+        columns = {
+            DESTINATION: batch.column(DESTINATION),
+            FLIGHT_NUMBER: batch.column(FLIGHT_NUMBER) if FLIGHT_NUMBER in include else pa.nulls(rows, pa.float32()),
+            DEPARTURE_DELAY: batch.column(DEPARTURE_DELAY) if DEPARTURE_DELAY in include else pa.nulls(rows, pa.float32()),
+            "origin": pa.array([origin] * rows, pa.string()),
+            "carrier": batch.column(CARRIER) if CARRIER in include else pa.array([carrier] * rows, pa.string())
+        }
+        if DATE in include:
+            dates = pc.strptime(batch.column(DATE), format="%m/%d/%Y", unit="s", error_is_null=True)
+            columns["month"] = pc.fill_null(pc.strftime(dates, format="%Y-%m"), UNKNOWN)
+        else:
+            columns["month"] = pa.array([UNKNOWN] * rows, pa.string())
+        yield pa.RecordBatch.from_pydict(columns, schema=STORED_SCHEMA)
+
+
+def ingest(paths: Iterable[str], store_dir: str = STORE_DIR, block_size: int = BLOCK_SIZE) -> int:
+    """Converts flight CSVs into the partitioned store and returns the rows written.
+
+    Output files are named after their source CSV. Re-ingesting a file
+    first deletes everything written from its earlier version, including
+    partitions the new version no longer covers.
+    """
+    rows = 0
+    file_format = ds.IpcFileFormat()
+
+    for path in paths:
+        counted = []
+
+        def batches():
+            for batch in _partitioned_batches(path, block_size):
+                counted.append(batch.num_rows)
+                yield batch
+
+        stem = os.path.splitext(os.path.basename(path))[0]
+        remove_ingested(stem, store_dir)
+        ds.write_dataset(
+            batches(),
+            store_dir,
+            schema=STORED_SCHEMA,
+            format=file_format,
+            file_options=file_format.make_write_options(compression=None),
+            partitioning=ds.partitioning(PARTITION_SCHEMA, flavor="hive"),
+            basename_template=f"{stem}-{{i}}.arrow",
+            existing_data_behavior="overwrite_or_ignore"
+        )
+        rows += sum(counted)
+    return rows
+
+
+def remove_ingested(stem: str, store_dir: str = STORE_DIR) -> int:
+    """Deletes the store files written from the CSV named ``stem`` and returns how many."""
+    # Exact names only: "SEA_AA" must not match the files of "SEA_AA-2024"
+    output_name = re.compile(re.escape(stem) + r"-\d+\.arrow")
+    removed = 0
+    for directory, _, files in os.walk(store_dir, topdown=False):
+        for name in files:
+            if output_name.fullmatch(name):
+                os.remove(os.path.join(directory, name))
+                removed += 1
+        if directory != store_dir and not os.listdir(directory):
+            os.rmdir(directory)
+    return removed
+
+
+def open_store(store_dir: str = STORE_DIR) -> ds.Dataset:
+    """Opens the store with memory-mapped, zero-copy file access."""
+    return ds.dataset(
+        store_dir,
+        format="ipc",
+        partitioning=ds.partitioning(PARTITION_SCHEMA, flavor="hive"),
+        filesystem=pa_fs.LocalFileSystem(use_mmap=True)
+    )
+
+
+def store_exists(store_dir: str = STORE_DIR) -> bool:
+    """Checks whether any flight records have been ingested into the store."""
+    return bool(glob.glob(os.path.join(store_dir, "**", "*.arrow"), recursive=True))
+
+
+def scan_flights(
+    store_dir: str = STORE_DIR,
+    columns: Sequence[str] = (DESTINATION, FLIGHT_NUMBER, DEPARTURE_DELAY),
+    origins: Optional[Sequence[str]] = None,
+    carriers: Optional[Sequence[str]] = None,
+    months: Optional[Sequence[str]] = None
+) -> Iterator[pa.RecordBatch]:
+    """Yields record batches holding only the requested columns and partitions."""
+    expression = None
+    for name, values in (("origin", origins), ("carrier", carriers), ("month", months)):
+        if values:
+            condition = ds.field(name).isin(list(values))
+            expression = condition if expression is None else expression & condition
+
+    yield from open_store(store_dir).to_batches(columns=list(columns), filter=expression)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ingest BTS flight CSVs into the columnar flight store.")
+    parser.add_argument("files", nargs="*", help="flight CSVs (default: data/flights/*_*.csv)")
+    parser.add_argument("--store", default=STORE_DIR, help="store directory")
+    args = parser.parse_args(argv)
+
+    files: List[str] = args.files or sorted(glob.glob(os.path.join(FLIGHTS_DIR, "*_*.csv")))
+    rows = ingest(files, args.store)
+    print(f"Ingested {rows} flights from {len(files)} files -> {args.store}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,359 @@
+# genome_fetcher.py
+# Parallel, resumable replacement for get_viral_data in genome_to_symptom.ipynb
+#
+# Usage: python genome_fetcher.py op/sequences_2.csv [--workers 8] [--api-key KEY]
+#
+# Each assembly goes through the same steps as get_viral_data (esearch for
+# the UID, esummary for the FTP path, download the GenBank flat file, write
+# the genome and annotation files), but assemblies are fetched concurrently
+# and every step is recorded in a manifest. An interrupted run picks up each
+# assembly where it stopped. E-utilities calls share one rate limiter, and
+# downloads are decompressed to disk as they stream in.
+
+import argparse
+import json
+import os
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, Iterable, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+EUTILS_URL = os.environ.get("EUTILS_URL", "https://eutils.ncbi.nlm.nih.gov/entrez/eutils")
+
+GENOME_DIR = "op/sequences"
+ANNOTATION_DIR = "op/annotations"
+GENBANK_DIR = "op/genbank"
+MANIFEST_PATH = "op/fetch_manifest.jsonl"
+
+# NCBI allows 3 E-utilities requests per second, or 10 with an API key
+REQUESTS_PER_SECOND = 3
+REQUESTS_PER_SECOND_WITH_KEY = 10
+
+DEFAULT_WORKERS = 8
+DEFAULT_TIMEOUT = (10.0, 120.0)
+RETRIES = 3
+CHUNK_SIZE = 1 << 16
+
+# Manifest states, in the order an assembly moves through them
+PENDING = "pending"
+RESOLVED = "resolved"          # FTP location known
+DOWNLOADED = "downloaded"      # GenBank file decompressed to disk
+DONE = "done"                  # genome and annotation files written
+FAILED = "failed"
+
+
+@dataclass
+class FetchEntry:
+    """Manifest record of one assembly's progress."""
+    assembly: str
+    state: str = PENDING
+    uid: Optional[str] = None
+    url: Optional[str] = None
+    genbank_file: Optional[str] = None
+    genome_file: Optional[str] = None
+    annotation_file: Optional[str] = None
+    attempts: int = 0
+    error: Optional[str] = None
+
+
+class Manifest:
+    """Append-only JSON-lines log of FetchEntry states; the last line per assembly wins.
+
+    Appending keeps each update O(1), and a line cut short by a crash is
+    ignored on the next load.
+    """
+
+    def __init__(self, path: str = MANIFEST_PATH):
+        self.path = path
+        self.entries: Dict[str, FetchEntry] = {}
+        self._lock = threading.Lock()
+
+        if os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    try:
+                        entry = FetchEntry(**json.loads(line))
+                    except (ValueError, TypeError):
+                        continue
+                    self.entries[entry.assembly] = entry
+
+    def get(self, assembly: str) -> FetchEntry:
+        """Returns the latest entry for an assembly, or a fresh pending one."""
+        with self._lock:
+            entry = self.entries.get(assembly)
+            return FetchEntry(**asdict(entry)) if entry else FetchEntry(assembly)
+
+    def update(self, entry: FetchEntry, **changes) -> FetchEntry:
+        """Records a new state for an assembly and returns it."""
+        for name, value in changes.items():
+            setattr(entry, name, value)
+        line = json.dumps(asdict(entry)) + "\n"
+
+        with self._lock:
+            self.entries[entry.assembly] = FetchEntry(**asdict(entry))
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, "a") as f:
+                f.write(line)
+                f.flush()
+        return entry
+
+    def compact(self):
+        """Rewrites the log with only the latest line per assembly."""
+        with self._lock:
+            temporary = self.path + ".tmp"
+            with open(temporary, "w") as f:
+                for entry in self.entries.values():
+                    f.write(json.dumps(asdict(entry)) + "\n")
+            os.replace(temporary, self.path)
+
+
+class RateLimiter:
+    """Spaces calls at least ``1 / rate`` seconds apart across threads."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+def https_url(ftp_path: str) -> str:
+    """NCBI serves the same tree over HTTPS, which streams through requests."""
+    if ftp_path.startswith("ftp://"):
+        return "https://" + ftp_path[len("ftp://"):]
+    return ftp_path
+
+
+class GenomeFetcher:
+    """Fetches assemblies concurrently, recording progress in a manifest.
+
+    ``max_workers`` bounds how many assemblies are in flight; E-utilities
+    calls from all of them go through one rate limiter. Transient network
+    errors are retried with backoff; anything else marks the assembly failed,
+    and failed assemblies are retried on the next run.
+    """
+
+    def __init__(
+        self,
+        genome_dir: str = GENOME_DIR,
+        annotation_dir: str = ANNOTATION_DIR,
+        genbank_dir: str = GENBANK_DIR,
+        manifest_path: str = MANIFEST_PATH,
+        eutils_url: str = EUTILS_URL,
+        email: Optional[str] = None,
+        api_key: Optional[str] = None,
+        max_workers: int = DEFAULT_WORKERS,
+        requests_per_second: Optional[float] = None,
+        timeout=DEFAULT_TIMEOUT,
+        retries: int = RETRIES
+    ):
+        self.genome_dir = genome_dir
+        self.annotation_dir = annotation_dir
+        self.genbank_dir = genbank_dir
+        self.eutils_url = eutils_url.rstrip("/")
+        self.email = email
+        self.api_key = api_key
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.retries = retries
+
+        self.manifest = Manifest(manifest_path)
+        self.limiter = RateLimiter(
+            requests_per_second or (REQUESTS_PER_SECOND_WITH_KEY if api_key else REQUESTS_PER_SECOND)
+        )
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        for directory in (genome_dir, annotation_dir, genbank_dir):
+            os.makedirs(directory, exist_ok=True)
+
+    def fetch_all(
+        self,
+        assemblies: Iterable[str],
+        progress: Optional[Callable[[FetchEntry], None]] = None
+    ) -> Dict[str, FetchEntry]:
+        """Fetches every assembly not already done and returns their final entries."""
+        assemblies = list(dict.fromkeys(assemblies))
+        results: Dict[str, FetchEntry] = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="genome") as executor:
+            futures = {executor.submit(self.fetch, assembly): assembly for assembly in assemblies}
+            for future in as_completed(futures):
+                entry = future.result()
+                results[entry.assembly] = entry
+                if progress:
+                    progress(entry)
+        return results
+
+    def fetch(self, assembly: str) -> FetchEntry:
+        """Advances one assembly as far as it will go, never raising."""
+        entry = self.manifest.get(assembly)
+        if entry.state == DONE:
+            return entry
+
+        # Output from an earlier get_viral_data run counts as done
+        genome_file, annotation_file = self._output_paths(assembly)
+        if entry.state == PENDING and os.path.exists(genome_file) and os.path.exists(annotation_file):
+            return self.manifest.update(entry, state=DONE, genome_file=genome_file, annotation_file=annotation_file)
+
+        entry.attempts += 1
+        try:
+            if entry.url is None:
+                self._resolve(entry)
+            if entry.genbank_file is None or not os.path.exists(entry.genbank_file):
+                self._download(entry)
+            self._write_outputs(entry)
+        except Exception as e:
+            return self.manifest.update(entry, state=FAILED, error=f"{type(e).__name__}: {e}")
+        return entry
+
+    def close(self):
+        """Releases pooled connections."""
+        self.session.close()
+
+    def _output_paths(self, assembly: str):
+        return (
+            os.path.join(self.genome_dir, f"{assembly}.txt"),
+            os.path.join(self.annotation_dir, f"{assembly}.csv")
+        )
+
+    def _eutils(self, tool: str, **params) -> dict:
+        params["retmode"] = "json"
+        if self.email:
+            params["email"] = self.email
+        if self.api_key:
+            params["api_key"] = self.api_key
+
+        def call():
+            self.limiter.wait()
+            response = self.session.get(f"{self.eutils_url}/{tool}.fcgi", params=params, timeout=self.timeout)
+            response.raise_for_status()
+            return response.json()
+        return self._with_retries(call)
+
+    def _with_retries(self, call):
+        for attempt in range(self.retries):
+            try:
+                return call()
+            except requests.RequestException:
+                if attempt == self.retries - 1:
+                    raise
+                time.sleep(2 ** attempt)
+
+    def _resolve(self, entry: FetchEntry):
+        """esearch + esummary: assembly accession -> UID -> GenBank download URL."""
+        ids = self._eutils("esearch", db="assembly", term=entry.assembly)["esearchresult"]["idlist"]
+        if not ids:
+            raise ValueError(f"Assembly {entry.assembly} not found.")
+        uid = ids[0]
+
+        doc = self._eutils("esummary", db="assembly", id=uid)["result"][uid]
+        ftp_path = doc.get("ftppath_refseq") or doc.get("ftppath_genbank")
+        if not ftp_path:
+            raise ValueError(f"No FTP path found for {entry.assembly}")
+
+        base = ftp_path.rstrip("/").split("/")[-1]
+        url = https_url(f"{ftp_path.rstrip('/')}/{base}_genomic.gbff.gz")
+        self.manifest.update(entry, state=RESOLVED, uid=uid, url=url, error=None)
+
+    def _download(self, entry: FetchEntry):
+        """Streams the gzipped GenBank file through a decompressor straight to disk."""
+        path = os.path.join(self.genbank_dir, f"{entry.assembly}.gbff")
+        partial = path + ".part"
+
+        def call():
+            decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            with self.session.get(entry.url, stream=True, timeout=self.timeout) as response:
+                response.raise_for_status()
+                with open(partial, "wb") as f:
+                    for chunk in response.iter_content(CHUNK_SIZE):
+                        f.write(decompressor.decompress(chunk))
+                    f.write(decompressor.flush())
+            if not decompressor.eof:
+                raise requests.RequestException(f"Truncated download for {entry.assembly}")
+
+        self._with_retries(call)
+        os.replace(partial, path)
+        self.manifest.update(entry, state=DOWNLOADED, genbank_file=path, error=None)
+
+    def _write_outputs(self, entry: FetchEntry):
+        """Writes the genome and annotation files in get_viral_data's formats."""
+        import pandas as pd
+        from Bio import SeqIO
+
+        with open(entry.genbank_file) as handle:
+            record = next(SeqIO.parse(handle, "genbank"), None)
+        if record is None:
+            raise ValueError("No GenBank records found.")
+
+        genome_file, annotation_file = self._output_paths(entry.assembly)
+        with open(genome_file + ".part", "w") as f:
+            f.write(f">{record.id}\n{record.seq}")
+        os.replace(genome_file + ".part", genome_file)
+
+        annotations = []
+        for feature in record.features:
+            feat = {"type": feature.type, "location": str(feature.location)}
+            for key, value in feature.qualifiers.items():
+                feat[key] = "; ".join(value)
+            annotations.append(feat)
+        pd.DataFrame(annotations).to_csv(annotation_file + ".part", index=False)
+        os.replace(annotation_file + ".part", annotation_file)
+
+        self.manifest.update(
+            entry, state=DONE, genome_file=genome_file, annotation_file=annotation_file, error=None
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fetch genomes and annotations for the assemblies in a sequences CSV.")
+    parser.add_argument("sequences", help="sequences CSV with Species and Assembly columns")
+    parser.add_argument("--all", action="store_true", help="fetch every assembly, not one per species")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--email", default=os.environ.get("ENTREZ_EMAIL"))
+    parser.add_argument("--api-key", default=os.environ.get("NCBI_API_KEY"))
+    parser.add_argument("--manifest", default=MANIFEST_PATH)
+    args = parser.parse_args(argv)
+
+    import pandas as pd
+
+    sequences = pd.read_csv(args.sequences)
+    if not args.all:
+        # One assembly per species, as in genome_to_symptom.ipynb
+        sequences = sequences.groupby("Species", group_keys=False).head(1)
+
+    fetcher = GenomeFetcher(
+        manifest_path=args.manifest, email=args.email, api_key=args.api_key, max_workers=args.workers
+    )
+    try:
+        results = fetcher.fetch_all(
+            sequences["Assembly"],
+            progress=lambda entry: print(f"[{entry.state.upper()}] {entry.assembly}" + (f": {entry.error}" if entry.error else ""))
+        )
+    finally:
+        fetcher.manifest.compact()
+        fetcher.close()
+
+    failed = sum(entry.state == FAILED for entry in results.values())
+    print(f"Fetched {len(results) - failed}/{len(results)} assemblies ({failed} failed)")
+
+
+if __name__ == "__main__":
+    main()
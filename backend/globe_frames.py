@@ -0,0 +1,102 @@
+# globe_frames.py
+# Binary frame stream of a simulation run for the globe: one keyframe, then per-step deltas
+#
+# Usage: python globe_frames.py [--seed-airport SEA] [--random-seed 0]   (frame sizes vs. the JSON shape)
+#
+# The keyframe carries what never changes (airport names and coordinates);
+# every later frame carries only what changed during one step: the airports
+# reached, the airport that seeded each (the new arcs), and the airports whose
+# infectious level moved. The level is the bit length of the infectious
+# count, so a frame lists an airport only when its count roughly doubles or
+# halves rather than on every new case.
+#
+# Every frame is a little-endian uint32 byte length followed by that many
+# bytes. Inside, fields are uint32 unless noted and arrays start on 4-byte
+# boundaries, so the browser can view them as typed arrays in place:
+#
+#   keyframe  FRAME_KEY, airports n, steps, name bytes b,
+#             lat float32[n], lng float32[n], names utf-8[b] ("\n"-joined, padded)
+#   delta     FRAME_DELTA, step, reached k, level changes m,
+#             reached[k], source int32[k] (-1 = seed), changed[m], level uint8[m] (padded)
+
+import argparse
+import json
+import struct
+from typing import Iterator
+
+import numpy as np
+
+FRAME_KEY = 0
+FRAME_DELTA = 1
+
+CONTENT_TYPE = "application/octet-stream"
+
+
+def _pad(data: bytes) -> bytes:
+    return data + b"\0" * (-len(data) % 4)
+
+
+def _frame(*parts: bytes) -> bytes:
+    body = b"".join(parts)
+    return struct.pack("<I", len(body)) + body
+
+
+def infectious_levels(infectious: np.ndarray) -> np.ndarray:
+    """0 for no infectious people, else the bit length of the count (1 -> 1, 2-3 -> 2, ...)."""
+    return np.frexp(infectious.astype(np.float64))[1].astype(np.uint8)
+
+
+def keyframe(result) -> bytes:
+    graph = result.graph
+    names = _pad("\n".join(graph.codes).encode("utf-8"))
+    return _frame(
+        struct.pack("<4I", FRAME_KEY, len(graph), result.params.steps, len(names)),
+        np.asarray(graph.lat, dtype="<f4").tobytes(),
+        np.asarray(graph.lon, dtype="<f4").tobytes(),
+        names
+    )
+
+
+def delta_frame(step: int, reached: np.ndarray, source: np.ndarray, changed: np.ndarray, levels: np.ndarray) -> bytes:
+    return _frame(
+        struct.pack("<4I", FRAME_DELTA, step, len(reached), len(changed)),
+        reached.astype("<u4").tobytes(),
+        source.astype("<i4").tobytes(),
+        changed.astype("<u4").tobytes(),
+        _pad(levels.astype(np.uint8).tobytes())
+    )
+
+
+def encode_frames(result) -> Iterator[bytes]:
+    """Yields the keyframe, then one delta frame per step (step 0 holds the seeds)."""
+    yield keyframe(result)
+
+    previous = np.zeros(len(result.graph), dtype=np.uint8)
+    for step in range(result.params.steps + 1):
+        reached = np.flatnonzero(result.arrival_step == step)
+        levels = infectious_levels(result.infectious[step])
+        changed = np.flatnonzero(levels != previous)
+        previous = levels
+        yield delta_frame(step, reached, result.source[reached], changed, levels[changed])
+
+
+def main(argv=None):
+    from epidemic_sim import busiest_airport, get_flight_graph, simulate
+
+    parser = argparse.ArgumentParser(description="Compare the frame stream of a simulation run with its JSON.")
+    parser.add_argument("--seed-airport", action="append", help="outbreak origin (default: busiest airport)")
+    parser.add_argument("--random-seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    graph = get_flight_graph()
+    result = simulate(graph, args.seed_airport or [busiest_airport(graph)], random_seed=args.random_seed)
+    frames = list(encode_frames(result))
+    stream_bytes = sum(len(frame) for frame in frames)
+    json_bytes = len(json.dumps(result.to_dict(include_infectious=True)))
+    print(f"{len(graph)} airports, {len(frames) - 1} steps")
+    print(f"keyframe {len(frames[0])} B, deltas {stream_bytes - len(frames[0])} B, total {stream_bytes} B")
+    print(f"JSON with infectious counts {json_bytes} B ({json_bytes / stream_bytes:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
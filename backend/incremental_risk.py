@@ -0,0 +1,174 @@
+# incremental_risk.py
+# Keeps airport risk scores current as new flight records arrive
+#
+# Usage: python incremental_risk.py [flight CSV ...] [--state risk_state.csv] [-o airport_risk_clusters.csv]
+#
+# Instead of regrouping every flight on each update, the scorer keeps the
+# per-destination sums that scoring is built from and folds new batches
+# into them. Normalization and clustering are then redone over airports
+# (hundreds of rows) rather than flights (millions), and only the airports
+# whose score or cluster moved are reported back.
+
+import argparse
+import os
+import threading
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from flight_risk import (
+    AIRPORTS_PATH, DELAY_WEIGHT, DESTINATION, FLIGHT_COUNT_WEIGHT, N_CLUSTERS, OUTPUT_COLUMNS,
+    OUTPUT_PATH, RANDOM_STATE, attach_coordinates, combine_aggregates, load_aggregates,
+    load_airports, min_max, partial_aggregates, read_flight_chunks
+)
+
+STATE_PATH = "risk_state.csv"
+AGGREGATE_COLUMNS = ["flight_count", "delay_sum", "delay_count"]
+
+# Scores closer than this to the published value are not republished
+SCORE_TOLERANCE = 1e-9
+
+
+class IncrementalRiskScorer:
+    """Airport risk scores maintained from running per-destination aggregates.
+
+    ``update`` folds a batch of flights into the aggregates, rescales and
+    reclusters the airports, and returns only the rows that changed since
+    the last publish. Clusters come from a mini-batch KMeans that is refined
+    with every update rather than refit, and are relabelled by centre so
+    that cluster 0 is always the lowest-risk group.
+    """
+
+    def __init__(
+        self,
+        airports: Optional[pd.DataFrame] = None,
+        flight_count_weight: float = FLIGHT_COUNT_WEIGHT,
+        delay_weight: float = DELAY_WEIGHT,
+        n_clusters: int = N_CLUSTERS,
+        random_state: int = RANDOM_STATE
+    ):
+        self.airports = airports
+        self.flight_count_weight = flight_count_weight
+        self.delay_weight = delay_weight
+        self.n_clusters = n_clusters
+        self.random_state = random_state
+
+        self.aggregates = pd.DataFrame(columns=AGGREGATE_COLUMNS + ["avg_delay"], dtype="float64")
+        self.aggregates.index.name = DESTINATION
+        self.published = pd.DataFrame(columns=OUTPUT_COLUMNS).set_index(DESTINATION)
+        self._kmeans = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_aggregates(cls, aggregates: pd.DataFrame, **kwargs) -> "IncrementalRiskScorer":
+        """Starts a scorer from aggregates computed in one full pass."""
+        scorer = cls(**kwargs)
+        scorer.fold_aggregates(aggregates)
+        return scorer
+
+    def update(self, flights: pd.DataFrame) -> pd.DataFrame:
+        """Folds in a batch of flight records and returns the airports that changed."""
+        if flights.empty:
+            return self.published.iloc[:0].reset_index()
+        return self.fold_aggregates(partial_aggregates(flights))
+
+    def fold_aggregates(self, partial: pd.DataFrame) -> pd.DataFrame:
+        """Folds in precomputed per-destination aggregates and returns the airports that changed."""
+        with self._lock:
+            if self.aggregates.empty:
+                self.aggregates = combine_aggregates([partial[AGGREGATE_COLUMNS]])
+            else:
+                self.aggregates = combine_aggregates([self.aggregates[AGGREGATE_COLUMNS], partial[AGGREGATE_COLUMNS]])
+
+            scores = self._score()
+            changed = self._changed(scores)
+            self.published = scores
+            return changed.reset_index()
+
+    def snapshot(self) -> pd.DataFrame:
+        """Returns every published airport in the airport_risk_clusters.csv layout."""
+        with self._lock:
+            return self.published.reset_index()[OUTPUT_COLUMNS]
+
+    def save(self, path: str = STATE_PATH):
+        """Writes the running aggregates so a later process can resume from them."""
+        with self._lock:
+            self.aggregates[AGGREGATE_COLUMNS].to_csv(path)
+
+    @classmethod
+    def load(cls, path: str = STATE_PATH, **kwargs) -> "IncrementalRiskScorer":
+        """Resumes a scorer from aggregates written by ``save``."""
+        aggregates = pd.read_csv(path, index_col=DESTINATION, dtype={DESTINATION: str})
+        return cls.from_aggregates(aggregates, **kwargs)
+
+    def _score(self) -> pd.DataFrame:
+        scored = self.aggregates.copy()
+        flight_count_norm = min_max(scored["flight_count"].to_numpy(dtype="float64"))
+        avg_delay_norm = min_max(scored["avg_delay"].to_numpy(dtype="float64"))
+        scored["risk_score"] = self.flight_count_weight * flight_count_norm + self.delay_weight * avg_delay_norm
+        scored["risk_cluster"] = self._cluster(scored["risk_score"].fillna(0).to_numpy())
+
+        if self.airports is not None:
+            scored = attach_coordinates(scored, self.airports)
+        else:
+            scored["lat"] = np.nan
+            scored["lon"] = np.nan
+        return scored[OUTPUT_COLUMNS[1:]]
+
+    def _cluster(self, scores: np.ndarray) -> np.ndarray:
+        """Refines the mini-batch KMeans with the current scores and labels them by centre."""
+        if len(scores) < self.n_clusters:
+            return np.zeros(len(scores), dtype="int32")
+
+        if self._kmeans is None:
+            from sklearn.cluster import MiniBatchKMeans
+            self._kmeans = MiniBatchKMeans(
+                n_clusters=self.n_clusters, random_state=self.random_state, n_init=3
+            )
+
+        points = scores.reshape(-1, 1)
+        self._kmeans.partial_fit(points)
+        rank = np.argsort(np.argsort(self._kmeans.cluster_centers_.ravel()))
+        return rank[self._kmeans.predict(points)].astype("int32")
+
+    def _changed(self, scores: pd.DataFrame) -> pd.DataFrame:
+        """Rows of ``scores`` that are new or whose score or cluster moved."""
+        previous = self.published.reindex(scores.index)
+        moved = (
+            previous["risk_score"].isna() != scores["risk_score"].isna()
+        ) | (
+            (previous["risk_score"] - scores["risk_score"]).abs() > SCORE_TOLERANCE
+        ) | (
+            previous["risk_cluster"] != scores["risk_cluster"]
+        )
+        return scores[moved]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fold new flight CSVs into running airport risk scores.")
+    parser.add_argument("files", nargs="*", help="flight CSVs to fold in, in arrival order")
+    parser.add_argument("--state", default=STATE_PATH, help="running aggregates to resume from and update")
+    parser.add_argument("--airports", default=AIRPORTS_PATH, help="airport coordinates CSV")
+    parser.add_argument("-o", "--output", default=OUTPUT_PATH, help="where to write the scores")
+    args = parser.parse_args(argv)
+
+    airports = load_airports(args.airports)
+    if os.path.exists(args.state):
+        scorer = IncrementalRiskScorer.load(args.state, airports=airports)
+    else:
+        # No saved state: start from everything currently on disk
+        scorer = IncrementalRiskScorer.from_aggregates(load_aggregates(), airports=airports)
+
+    for chunk in read_flight_chunks(args.files):
+        changed = scorer.update(chunk)
+        print(f"{len(changed)} airports changed")
+
+    scorer.save(args.state)
+    risk = scorer.snapshot()
+    risk.to_csv(args.output, index=False)
+    print(f"Scored {len(risk)} airports -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
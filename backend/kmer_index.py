@@ -0,0 +1,232 @@
+# kmer_index.py
+# Memory-mapped k-mer count index over the genomes fetched by genome_fetcher.py
+#
+# Usage: python kmer_index.py [--genomes op/sequences] [--out op/kmer_index] [-k 6]
+#
+# The build step reads every op/sequences/{assembly}.txt once, packs the
+# sequence at 2 bits per base and counts its k-mers with NumPy. It writes:
+#   genomes.2bit   all packed sequences back to back
+#   counts_k{k}.npy one (assemblies, 4**k) uint32 count matrix
+#   index.json     assembly ids, sequence lengths and offsets into genomes.2bit
+# Readers open the matrix with mmap_mode="r", so loading features is
+# zero-copy regardless of how many genomes are indexed.
+
+import argparse
+import glob
+import json
+import os
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+GENOME_DIR = "op/sequences"
+INDEX_DIR = "op/kmer_index"
+DEFAULT_K = 6
+FORMAT_VERSION = 1
+
+BASES = "ACGT"
+INVALID = 255
+
+# ASCII -> 2-bit code; anything other than A/C/G/T (N, IUPAC codes, gaps) is invalid
+_CODES = np.full(256, INVALID, dtype=np.uint8)
+for _code, _base in enumerate(BASES):
+    _CODES[ord(_base)] = _code
+    _CODES[ord(_base.lower())] = _code
+
+
+def encode(sequence: str) -> np.ndarray:
+    """Maps a nucleotide string to codes 0-3, with 255 for ambiguous bases."""
+    return _CODES[np.frombuffer(sequence.encode("ascii", "replace"), dtype=np.uint8)]
+
+
+def pack(codes: np.ndarray) -> np.ndarray:
+    """Packs codes four bases per byte, first base in the high bits.
+
+    Ambiguous bases are stored as A; their positions are not needed once
+    k-mers have been counted.
+    """
+    codes = np.where(codes == INVALID, 0, codes).astype(np.uint8)
+    padded = np.zeros(-(-len(codes) // 4) * 4, dtype=np.uint8)
+    padded[:len(codes)] = codes
+    quads = padded.reshape(-1, 4)
+    return (quads[:, 0] << 6) | (quads[:, 1] << 4) | (quads[:, 2] << 2) | quads[:, 3]
+
+
+def unpack(packed: np.ndarray, length: int) -> np.ndarray:
+    """Inverse of ``pack``: returns the first ``length`` codes."""
+    packed = np.asarray(packed, dtype=np.uint8)
+    quads = np.stack([(packed >> shift) & 3 for shift in (6, 4, 2, 0)], axis=1)
+    return quads.ravel()[:length]
+
+
+def decode(codes: np.ndarray) -> str:
+    """Maps codes 0-3 back to a nucleotide string."""
+    return np.frombuffer(BASES.encode(), dtype=np.uint8)[codes].tobytes().decode("ascii")
+
+
+def kmer_counts(codes: np.ndarray, k: int = DEFAULT_K) -> np.ndarray:
+    """Counts every k-mer of a code array into a vector of length 4**k.
+
+    k-mer ids are base-4 numbers with the first base most significant, so
+    they sort like ``itertools.product("ACGT", repeat=k)``. Windows that
+    contain an ambiguous base are skipped.
+    """
+    windows = len(codes) - k + 1
+    if windows <= 0:
+        return np.zeros(4 ** k, dtype=np.uint32)
+
+    ids = np.zeros(windows, dtype=np.int64)
+    for offset in range(k):
+        ids = ids * 4 + (codes[offset:offset + windows] & 3)
+
+    invalid = np.concatenate([[0], np.cumsum(codes == INVALID)])
+    valid = invalid[k:] == invalid[:windows]
+    return np.bincount(ids[valid], minlength=4 ** k).astype(np.uint32)
+
+
+def kmer_names(k: int = DEFAULT_K) -> List[str]:
+    """Column labels of a count matrix, in k-mer id order."""
+    ids = np.arange(4 ** k)
+    digits = (ids[:, None] >> (2 * np.arange(k - 1, -1, -1))) & 3
+    return ["".join(BASES[d] for d in row) for row in digits]
+
+
+def read_genome(path: str) -> str:
+    """Reads a genome file written by get_viral_data (a header line, then the sequence)."""
+    with open(path) as f:
+        lines = f.read().splitlines()
+    return "".join(line.strip() for line in lines if not line.startswith(">"))
+
+
+class KmerIndex:
+    """Read-only view of a built index; the count matrix stays memory-mapped."""
+
+    def __init__(self, index_dir: str = INDEX_DIR):
+        with open(os.path.join(index_dir, "index.json")) as f:
+            meta = json.load(f)
+
+        self.index_dir = index_dir
+        self.k: int = meta["k"]
+        self.assemblies: List[str] = meta["assemblies"]
+        self.lengths = np.asarray(meta["lengths"], dtype=np.int64)
+        self.offsets = np.asarray(meta["offsets"], dtype=np.int64)
+        self.positions: Dict[str, int] = {assembly: i for i, assembly in enumerate(self.assemblies)}
+
+        self.counts = np.load(os.path.join(index_dir, meta["counts"]), mmap_mode="r")
+        self._packed = np.memmap(os.path.join(index_dir, meta["genomes"]), dtype=np.uint8, mode="r") \
+            if self.offsets[-1] else np.zeros(0, dtype=np.uint8)
+
+    def __len__(self) -> int:
+        return len(self.assemblies)
+
+    def __contains__(self, assembly) -> bool:
+        return assembly in self.positions
+
+    def vector(self, assembly: str) -> np.ndarray:
+        """k-mer counts of one assembly (a view into the mapped matrix)."""
+        return self.counts[self.positions[assembly]]
+
+    def rows(self, assemblies: Iterable[str], normalize: bool = False) -> np.ndarray:
+        """Count (or frequency) rows for assemblies in order; unknown ones get zeros."""
+        assemblies = list(assemblies)
+        found = np.array([self.positions.get(assembly, -1) for assembly in assemblies], dtype=np.int64)
+        matrix = np.zeros((len(assemblies), self.counts.shape[1]), dtype=np.float32)
+        matrix[found >= 0] = self.counts[found[found >= 0]]
+        if normalize:
+            totals = matrix.sum(axis=1, keepdims=True)
+            np.divide(matrix, totals, out=matrix, where=totals > 0)
+        return matrix
+
+    def sequence(self, assembly: str) -> str:
+        """Unpacks an assembly's sequence (ambiguous bases come back as A)."""
+        i = self.positions[assembly]
+        start, stop = self.offsets[i], self.offsets[i + 1]
+        return decode(unpack(self._packed[start:stop], int(self.lengths[i])))
+
+
+def build_index(
+    genome_dir: str = GENOME_DIR,
+    index_dir: str = INDEX_DIR,
+    k: int = DEFAULT_K,
+    assemblies: Optional[Sequence[str]] = None
+) -> KmerIndex:
+    """Packs and counts every genome in ``genome_dir`` (or just ``assemblies``)."""
+    if assemblies is None:
+        assemblies = sorted(
+            os.path.splitext(os.path.basename(path))[0]
+            for path in glob.glob(os.path.join(genome_dir, "*.txt"))
+        )
+    assemblies = list(assemblies)
+    os.makedirs(index_dir, exist_ok=True)
+
+    counts_path = os.path.join(index_dir, f"counts_k{k}.npy")
+    genomes_path = os.path.join(index_dir, "genomes.2bit")
+    meta_path = os.path.join(index_dir, "index.json")
+    lengths: List[int] = []
+    offsets = [0]
+
+    # Everything is written to .part files and renamed into place afterwards
+    counts = np.lib.format.open_memmap(
+        counts_path + ".part", mode="w+", dtype=np.uint32, shape=(len(assemblies), 4 ** k)
+    )
+    with open(genomes_path + ".part", "wb") as genomes:
+        for row, assembly in enumerate(assemblies):
+            codes = encode(read_genome(os.path.join(genome_dir, f"{assembly}.txt")))
+            counts[row] = kmer_counts(codes, k)
+            packed = pack(codes)
+            genomes.write(packed.tobytes())
+            lengths.append(len(codes))
+            offsets.append(offsets[-1] + len(packed))
+    counts.flush()
+    del counts
+
+    meta = {
+        "version": FORMAT_VERSION,
+        "k": k,
+        "counts": os.path.basename(counts_path),
+        "genomes": os.path.basename(genomes_path),
+        "assemblies": assemblies,
+        "lengths": lengths,
+        "offsets": offsets
+    }
+    with open(meta_path + ".part", "w") as f:
+        json.dump(meta, f)
+
+    # index.json goes last, so readers never see it pointing at half-written files
+    os.replace(counts_path + ".part", counts_path)
+    os.replace(genomes_path + ".part", genomes_path)
+    os.replace(meta_path + ".part", meta_path)
+    return KmerIndex(index_dir)
+
+
+def load_or_build_index(genome_dir: str = GENOME_DIR, index_dir: str = INDEX_DIR, k: int = DEFAULT_K) -> KmerIndex:
+    """Opens the index, rebuilding it first if it is missing, stale or built with another k."""
+    meta_path = os.path.join(index_dir, "index.json")
+    genome_paths = glob.glob(os.path.join(genome_dir, "*.txt"))
+
+    if os.path.exists(meta_path):
+        index = KmerIndex(index_dir)
+        built = os.path.getmtime(meta_path)
+        current = {os.path.splitext(os.path.basename(path))[0] for path in genome_paths}
+        if (
+            index.k == k
+            and set(index.assemblies) == current
+            and all(os.path.getmtime(path) <= built for path in genome_paths)
+        ):
+            return index
+    return build_index(genome_dir, index_dir, k)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the memory-mapped k-mer index over fetched genomes.")
+    parser.add_argument("--genomes", default=GENOME_DIR, help="directory of {assembly}.txt genomes")
+    parser.add_argument("--out", default=INDEX_DIR, help="index directory")
+    parser.add_argument("-k", type=int, default=DEFAULT_K, help="k-mer length")
+    args = parser.parse_args(argv)
+
+    index = build_index(args.genomes, args.out, args.k)
+    print(f"Indexed {len(index)} genomes ({4 ** index.k} {index.k}-mers) -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+# symptom_matrix.py
+# Sparse species x symptom severity matrix with an interned symptom vocabulary
+#
+# The classifier names a handful of symptoms per species out of an open-ended
+# vocabulary, so the matrix is stored in CSR form: row i's symptoms are
+# indices[indptr[i]:indptr[i + 1]] with severities in the same slice of data.
+# Building, saving, loading and row lookups all scale with the number of
+# non-zeros. SciPy is only needed when a caller asks for ``.csr``.
+
+import re
+from typing import Dict, Iterable, List, Mapping, Optional
+
+import numpy as np
+
+SYMPTOM_MATRIX_PATH = "op/symptom_matrix.npz"
+
+
+def normalize_symptom(name: str) -> str:
+    """Canonical vocabulary key: trimmed, case-folded, single-spaced."""
+    return re.sub(r"\s+", " ", name.strip()).casefold()
+
+
+class SymptomVocabulary:
+    """Interns symptom names to dense integer ids, merging case and spacing variants."""
+
+    def __init__(self, names: Iterable[str] = ()):
+        self.names: List[str] = []
+        self.ids: Dict[str, int] = {}
+        for name in names:
+            self.intern(name)
+
+    def intern(self, name: str) -> int:
+        """Returns the id for a symptom, assigning the next one if it is new."""
+        key = normalize_symptom(name)
+        symptom_id = self.ids.get(key)
+        if symptom_id is None:
+            symptom_id = self.ids[key] = len(self.names)
+            self.names.append(key)
+        return symptom_id
+
+    def get(self, name: str) -> Optional[int]:
+        return self.ids.get(normalize_symptom(name))
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __contains__(self, name) -> bool:
+        return normalize_symptom(name) in self.ids
+
+
+class SymptomMatrix:
+    """CSR matrix of symptom severities, one row per species."""
+
+    def __init__(
+        self,
+        species: List[str],
+        vocabulary: SymptomVocabulary,
+        indptr: np.ndarray,
+        indices: np.ndarray,
+        data: np.ndarray
+    ):
+        self.species = species
+        self.vocabulary = vocabulary
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+        self.rows_by_species: Dict[str, int] = {name: i for i, name in enumerate(species)}
+
+    @classmethod
+    def from_results(
+        cls,
+        results: Mapping[str, Mapping[str, float]],
+        vocabulary: Optional[SymptomVocabulary] = None
+    ) -> "SymptomMatrix":
+        """Builds the matrix from {species: {symptom: severity}}.
+
+        Symptoms that normalize to the same name are summed, like the
+        lower-cased column aggregation the notebook used to do; zero
+        severities are dropped.
+        """
+        vocabulary = vocabulary or SymptomVocabulary()
+        species = list(results)
+        indptr = [0]
+        indices: List[int] = []
+        data: List[float] = []
+
+        for name in species:
+            row: Dict[int, float] = {}
+            for symptom, severity in results[name].items():
+                symptom_id = vocabulary.intern(symptom)
+                row[symptom_id] = row.get(symptom_id, 0.0) + float(severity)
+            for symptom_id in sorted(row):
+                if row[symptom_id]:
+                    indices.append(symptom_id)
+                    data.append(row[symptom_id])
+            indptr.append(len(indices))
+
+        return cls(
+            species,
+            vocabulary,
+            np.asarray(indptr, dtype=np.int64),
+            np.asarray(indices, dtype=np.int32),
+            np.asarray(data, dtype=np.float32)
+        )
+
+    @property
+    def shape(self):
+        return (len(self.species), len(self.vocabulary))
+
+    @property
+    def nnz(self) -> int:
+        return len(self.data)
+
+    @property
+    def symptoms(self) -> List[str]:
+        """Column labels, in id order."""
+        return self.vocabulary.names
+
+    @property
+    def csr(self):
+        """The matrix as a scipy.sparse.csr_matrix (shares the underlying arrays)."""
+        from scipy import sparse
+        return sparse.csr_matrix((self.data, self.indices, self.indptr), shape=self.shape)
+
+    def __len__(self) -> int:
+        return len(self.species)
+
+    def __contains__(self, species) -> bool:
+        return species in self.rows_by_species
+
+    def row(self, species: str) -> Dict[str, float]:
+        """Non-zero {symptom: severity} of one species; empty if unknown.
+
+        Severities are rounded to 6 places to drop float32 noise.
+        """
+        i = self.rows_by_species.get(species)
+        if i is None:
+            return {}
+        start, stop = self.indptr[i], self.indptr[i + 1]
+        names = self.vocabulary.names
+        return {names[j]: round(float(value), 6) for j, value in zip(self.indices[start:stop], self.data[start:stop])}
+
+    def dense_row(self, i: int) -> np.ndarray:
+        """Row ``i`` as a dense vector over the whole vocabulary."""
+        vector = np.zeros(len(self.vocabulary), dtype=np.float32)
+        start, stop = self.indptr[i], self.indptr[i + 1]
+        vector[self.indices[start:stop]] = self.data[start:stop]
+        return vector
+
+    def take(self, species: Iterable[str]) -> "SymptomMatrix":
+        """Rows for ``species`` in the given order, sharing the vocabulary; unknown species get empty rows."""
+        species = list(species)
+        rows = [self.rows_by_species.get(name) for name in species]
+        lengths = np.array([0 if i is None else self.indptr[i + 1] - self.indptr[i] for i in rows], dtype=np.int64)
+        indptr = np.concatenate([[0], np.cumsum(lengths)])
+        picks = [np.arange(self.indptr[i], self.indptr[i + 1]) for i in rows if i is not None]
+        picked = np.concatenate(picks) if picks else np.zeros(0, dtype=np.int64)
+        return SymptomMatrix(species, self.vocabulary, indptr, self.indices[picked], self.data[picked])
+
+    def to_frame(self, name_column: str = "Organism_Name"):
+        """Dense DataFrame view (species x symptom, zeros filled) for small inspections."""
+        import pandas as pd
+
+        frame = pd.DataFrame(self.csr.toarray(), columns=self.symptoms)
+        frame.insert(0, name_column, self.species)
+        return frame
+
+    def save(self, path: str = SYMPTOM_MATRIX_PATH):
+        """Writes the matrix and its labels to one .npz file."""
+        np.savez(
+            path,
+            species=np.array(self.species, dtype=str),
+            symptoms=np.array(self.vocabulary.names, dtype=str),
+            indptr=self.indptr,
+            indices=self.indices,
+            data=self.data
+        )
+
+    @classmethod
+    def load(cls, path: str = SYMPTOM_MATRIX_PATH) -> "SymptomMatrix":
+        """Reads a matrix written by ``save``."""
+        with np.load(path, allow_pickle=False) as saved:
+            return cls(
+                saved["species"].tolist(),
+                SymptomVocabulary(saved["symptoms"].tolist()),
+                saved["indptr"],
+                saved["indices"],
+                saved["data"]
+            )
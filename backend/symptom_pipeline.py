@@ -0,0 +1,231 @@
+# symptom_pipeline.py
+# Cached, concurrent species -> symptom extraction for genome_to_symptom.ipynb
+#
+# Two on-disk caches sit under op/symptom_cache/:
+#   pages/    search results and scraped page text, keyed by query / URL
+#   results/  the classifier's response and parsed symptom dict per species
+# A rerun only scrapes pages and queries the model for species it has not
+# seen with the same model and system prompt.
+
+import hashlib
+import json
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, Iterable, List, Optional
+
+import requests
+
+CACHE_DIR = "op/symptom_cache"
+DEFAULT_WORKERS = 4
+REQUEST_TIMEOUT = 20
+
+SYMPTOM_FORMAT_REMINDER = """Remember that you are an AI agent designed to determine disease symptoms. Make sure you respond in the following format: ```
+- symptom1: severity1
+- symptom2: severity2
+...
+
+Use a 0 to 1 severity scale:
+- 0 = symptom not present
+- 0.33 ≈ mild presence
+- 0.67 ≈ moderate presence
+- 1 = severe symptom
+Only use the number. Do not include the description.
+
+If a symptom is very specific, ignore it. If a symptom is more than a few words or describes in great detail, just use a simple one-word description. USE ONE WORD DESCRIPTIONS WHENEVER POSSIBLE
+```"""
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _write_json(path: str, value):
+    """Writes JSON via a temporary file so readers never see a partial file."""
+    partial = f"{path}.{threading.get_ident()}.part"
+    with open(partial, "w", encoding="utf-8") as f:
+        json.dump(value, f, ensure_ascii=False)
+    os.replace(partial, path)
+
+
+def _read_json(path: str):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+class PageCache:
+    """Search results and scraped page text, one JSON file per query or URL."""
+
+    def __init__(self, cache_dir: str = CACHE_DIR):
+        self.directory = os.path.join(cache_dir, "pages")
+        os.makedirs(self.directory, exist_ok=True)
+        self.session = requests.Session()
+
+    def _path(self, kind: str, key: str) -> str:
+        return os.path.join(self.directory, f"{kind}-{_digest(key)}.json")
+
+    def search(self, query: str) -> List[str]:
+        """First Google result for a query, cached (an empty list is cached too)."""
+        path = self._path("search", query)
+        cached = _read_json(path)
+        if cached is not None:
+            return cached
+
+        from googlesearch import search
+        urls = list(search(query, num=1, stop=1, pause=2))
+        _write_json(path, urls)
+        return urls
+
+    def page_text(self, url: str) -> Optional[str]:
+        """Paragraph text of a page, cached; None when the page could not be fetched."""
+        path = self._path("page", url)
+        cached = _read_json(path)
+        if cached is not None:
+            return cached["text"]
+
+        response = self.session.get(url, timeout=REQUEST_TIMEOUT)
+        if response.status_code != 200:
+            return None
+
+        from bs4 import BeautifulSoup
+        soup = BeautifulSoup(response.text, "html.parser")
+        text = " ".join(para.get_text() for para in soup.find_all("p"))
+        _write_json(path, {"url": url, "text": text})
+        return text
+
+
+_default_page_cache: Optional[PageCache] = None
+_default_page_cache_lock = threading.Lock()
+
+
+def get_page_cache() -> PageCache:
+    """Returns the process-wide page cache, creating it on first use."""
+    global _default_page_cache
+    with _default_page_cache_lock:
+        if _default_page_cache is None:
+            _default_page_cache = PageCache()
+        return _default_page_cache
+
+
+def get_symptom_info(species: str, limit: int = 5000) -> str:
+    '''
+    Retrieve symptom information for a given virus species by searching:
+    1. Wikipedia
+    2. ICTV (International Committee on Taxonomy of Viruses)
+    3. Scientific literature (e.g., PubMed)
+    If no information is found, indicate that no symptom data is available.
+    Searches and pages are served from the on-disk cache when available.
+    '''
+    cache = get_page_cache()
+    queries = [
+        f"{species} symptoms site:en.wikipedia.org",
+        f"{species} symptoms site:ictv.global",
+        f"{species} symptoms site:pubmed.ncbi.nlm.nih.gov"
+    ]
+
+    for query in queries:
+        try:
+            for url in cache.search(query):
+                content = cache.page_text(url)
+                if content is not None:
+                    return content[1:2500] + SYMPTOM_FORMAT_REMINDER
+        except Exception as e:
+            print(f"An error occurred while searching with query '{query}': {e}")
+            continue
+
+    return f"No symptom information found for '{species}'. Treat this virus as having no known symptoms."
+
+
+def extract_symptom_dict(text: str) -> dict:
+    """Parses "- symptom: severity" lines from a classifier response."""
+    symptom_dict = {}
+
+    # Find lines with a colon, typically symptoms
+    for line in text.splitlines():
+        if ':' in line:
+            symptom, severity = line.split(':', 1)
+            symptom = symptom.strip().lstrip("- ").strip()
+
+            # Extract the first float number from severity string
+            match = re.search(r"\d*\.?\d+", severity)
+            if match:
+                symptom_dict[symptom] = float(match.group())
+
+    return symptom_dict
+
+
+def prompt_fingerprint(model: str, memory: List[dict]) -> str:
+    """Identifies a classifier setup, so cached results are reused only for the same model and prompt."""
+    return _digest(model + json.dumps(memory, sort_keys=True, ensure_ascii=False))[:16]
+
+
+class SymptomStore:
+    """Per-species classifier results for one classifier setup."""
+
+    def __init__(self, fingerprint: str, cache_dir: str = CACHE_DIR):
+        self.directory = os.path.join(cache_dir, "results", fingerprint)
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, species: str) -> str:
+        return os.path.join(self.directory, f"{_digest(species)}.json")
+
+    def get(self, species: str) -> Optional[dict]:
+        """Returns the cached {"species", "response", "symptoms"} record, or None."""
+        return _read_json(self._path(species))
+
+    def set(self, species: str, response: str, symptoms: Dict[str, float]):
+        _write_json(self._path(species), {"species": species, "response": response, "symptoms": symptoms})
+
+
+def run_symptom_pipeline(
+    species: Iterable[str],
+    classify: Callable[[str], str],
+    store: SymptomStore,
+    workers: int = DEFAULT_WORKERS,
+    refresh: bool = False,
+    progress: Optional[Callable[[str, Dict[str, float], bool], None]] = None
+) -> Dict[str, Dict[str, float]]:
+    """Returns {species: symptom dict}, classifying only species missing from the store.
+
+    ``classify`` maps a species name to the classifier's raw response and is
+    called from ``workers`` threads at once. A species whose classification
+    raises gets an empty dict and is not cached, so the next run retries it.
+    ``progress`` is called with (species, symptoms, cached) as each finishes.
+    """
+    species = list(dict.fromkeys(species))
+    results: Dict[str, Dict[str, float]] = {}
+    missing = []
+
+    for name in species:
+        cached = None if refresh else store.get(name)
+        if cached is None:
+            missing.append(name)
+        else:
+            results[name] = cached["symptoms"]
+            if progress:
+                progress(name, results[name], True)
+
+    def run(name):
+        response = classify(name)
+        symptoms = extract_symptom_dict(response)
+        store.set(name, response, symptoms)
+        return symptoms
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="symptoms") as executor:
+        futures = {executor.submit(run, name): name for name in missing}
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                print(f"[WARN] Failed on {name}: {e}")
+                results[name] = {}
+            if progress:
+                progress(name, results[name], False)
+
+    return {name: results[name] for name in species}
+
@@ -0,0 +1,64 @@
+# test_flight_store.py
+# Tests for ingesting flight CSVs into the columnar store
+#
+# Usage: python -m pytest backend
+
+import os
+
+import pytest
+
+import flight_store
+
+HEADER = "Carrier Code,Date (MM/DD/YYYY),Flight Number,Destination Airport,Departure delay (Minutes)\n"
+
+def write_flights(path, months, per_month=200, destination="JFK"):
+    with open(path, "w") as f:
+        f.write(HEADER)
+        for month in months:
+            for i in range(per_month):
+                f.write(f"AA,{month:02d}/{i % 28 + 1:02d}/2024,{i},{destination},{i % 30}\n")
+    return str(path)
+
+def stored_files(store):
+    return sorted(
+        os.path.relpath(os.path.join(directory, name), store)
+        for directory, _, names in os.walk(store) for name in names
+    )
+
+@pytest.fixture
+def store(tmp_path):
+    return str(tmp_path / "store")
+
+def test_ingest_partitions_by_origin_carrier_and_month(tmp_path, store):
+    source = write_flights(tmp_path / "SEA_AA.csv", [1, 2])
+
+    assert flight_store.ingest([source], store) == 400
+    assert stored_files(store) == [
+        "origin=SEA/carrier=AA/month=2024-01/SEA_AA-0.arrow",
+        "origin=SEA/carrier=AA/month=2024-02/SEA_AA-0.arrow"
+    ]
+    assert flight_store.open_store(store).count_rows() == 400
+
+def test_reingest_drops_partitions_the_new_file_no_longer_covers(tmp_path, store):
+    source = write_flights(tmp_path / "SEA_AA.csv", [1, 2])
+    flight_store.ingest([source], store)
+
+    write_flights(tmp_path / "SEA_AA.csv", [1])
+    assert flight_store.ingest([source], store) == 200
+
+    assert flight_store.open_store(store).count_rows() == 200
+    assert stored_files(store) == ["origin=SEA/carrier=AA/month=2024-01/SEA_AA-0.arrow"]
+    assert not os.path.exists(os.path.join(store, "origin=SEA", "carrier=AA", "month=2024-02"))
+
+def test_reingest_keeps_files_of_sources_with_a_longer_name(tmp_path, store):
+    flight_store.ingest([write_flights(tmp_path / "SEA_AA.csv", [1])], store)
+    flight_store.ingest([write_flights(tmp_path / "SEA_AA-2024.csv", [3], per_month=50)], store)
+
+    assert flight_store.remove_ingested("SEA_AA", store) == 1
+
+    assert stored_files(store) == ["origin=unknown/carrier=AA/month=2024-03/SEA_AA-2024-0.arrow"]
+    assert flight_store.open_store(store).count_rows() == 50
+
+def test_remove_ingested_on_a_missing_store_removes_nothing(tmp_path):
+    assert flight_store.remove_ingested("SEA_AA", str(tmp_path / "missing")) == 0
+    assert not flight_store.store_exists(str(tmp_path / "missing"))
@@ -0,0 +1,241 @@
+# test_genome_fetcher.py
+# Tests for the resumable genome fetcher against a local stand-in for NCBI
+#
+# Usage: python -m pytest backend
+#
+# The stand-in answers esearch and esummary like E-utilities and serves the
+# gzipped GenBank file that esummary's FTP path points at, so the fetcher
+# runs end to end without the network.
+
+import gzip
+import json
+import os
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+import genome_fetcher
+from genome_fetcher import DONE, DOWNLOADED, FAILED, RESOLVED, GenomeFetcher, Manifest
+
+ASSEMBLY = "GCF_000001405.1"
+UID = "1405"
+
+def genbank_record(length=20000):
+    bases = random.Random(0).choices("acgt", k=length)
+    lines = [
+        f"LOCUS       {'NC_000001':<16} {length:>11} bp    DNA     linear   VRL 01-JAN-2024",
+        "DEFINITION  Test virus, complete genome.",
+        "ACCESSION   NC_000001",
+        "VERSION     NC_000001.1",
+        "FEATURES             Location/Qualifiers",
+        f"     source          1..{length}",
+        '                     /organism="Test virus"',
+        "     gene            10..90",
+        '                     /gene="ORF1"',
+        "ORIGIN"
+    ]
+    for start in range(0, length, 60):
+        row = "".join(bases[start:start + 60])
+        blocks = " ".join(row[i:i + 10] for i in range(0, len(row), 10))
+        lines.append(f"{start + 1:>9} {blocks}")
+    lines.append("//")
+    return "\n".join(lines) + "\n"
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """E-utilities and the genomes tree, as far as the fetcher uses them."""
+
+    def do_GET(self):
+        server = self.server
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        server.requests.append(url.path)
+
+        if url.path == "/esearch.fcgi":
+            ids = [UID] if query["term"] == [ASSEMBLY] else []
+            self._send_json({"esearchresult": {"idlist": ids}})
+        elif url.path == "/esummary.fcgi":
+            ftp_path = f"{server.url}/genomes/{ASSEMBLY}_test/"
+            self._send_json({"result": {"uids": [UID], UID: {"ftppath_refseq": ftp_path}}})
+        elif url.path == f"/genomes/{ASSEMBLY}_test/{ASSEMBLY}_test_genomic.gbff.gz":
+            self._send_download()
+        else:
+            self.send_error(404)
+
+    def _send_json(self, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_download(self):
+        server = self.server
+        if server.download_status != 200:
+            self.send_error(server.download_status)
+            return
+        body = server.gzipped[:server.truncate_at] if server.truncate_at else server.gzipped
+        half = len(body) // 2
+
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body[:half])
+        self.wfile.flush()
+        # Hold the rest back until the test has looked at the file on disk
+        server.first_half_sent.set()
+        server.release_rest.wait(10)
+        self.wfile.write(body[half:])
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def ncbi():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    server.requests = []
+    server.genbank = genbank_record()
+    server.gzipped = gzip.compress(server.genbank.encode())
+    server.download_status = 200
+    server.truncate_at = None
+    server.first_half_sent = threading.Event()
+    server.release_rest = threading.Event()
+    server.release_rest.set()
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield server
+    server.release_rest.set()
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def make_fetcher(ncbi, tmp_path):
+    fetchers = []
+
+    def make():
+        fetcher = GenomeFetcher(
+            genome_dir=str(tmp_path / "sequences"),
+            annotation_dir=str(tmp_path / "annotations"),
+            genbank_dir=str(tmp_path / "genbank"),
+            manifest_path=str(tmp_path / "fetch_manifest.jsonl"),
+            eutils_url=ncbi.url,
+            max_workers=2,
+            requests_per_second=1000,
+            retries=1
+        )
+        fetchers.append(fetcher)
+        return fetcher
+
+    yield make
+    for fetcher in fetchers:
+        fetcher.close()
+
+def test_fetch_writes_genome_and_annotations(ncbi, make_fetcher, tmp_path):
+    entry = make_fetcher().fetch(ASSEMBLY)
+
+    assert entry.state == DONE and entry.uid == UID and entry.error is None
+    with open(entry.genbank_file) as f:
+        assert f.read() == ncbi.genbank
+    with open(entry.genome_file) as f:
+        header, sequence = f.read().split("\n")
+    assert header == ">NC_000001.1" and len(sequence) == 20000
+    with open(entry.annotation_file) as f:
+        assert "ORF1" in f.read()
+    assert ncbi.requests[:2] == ["/esearch.fcgi", "/esummary.fcgi"]
+
+def test_unknown_assembly_fails_without_downloading(ncbi, make_fetcher):
+    entry = make_fetcher().fetch("GCF_999999999.1")
+
+    assert entry.state == FAILED and "not found" in entry.error
+    assert ncbi.requests == ["/esearch.fcgi"]
+
+def test_download_is_decompressed_to_disk_as_it_streams(ncbi, make_fetcher, monkeypatch):
+    monkeypatch.setattr(genome_fetcher, "CHUNK_SIZE", 256)
+    ncbi.release_rest.clear()
+    fetcher = make_fetcher()
+    partial = os.path.join(fetcher.genbank_dir, f"{ASSEMBLY}.gbff.part")
+    result = []
+    thread = threading.Thread(target=lambda: result.append(fetcher.fetch(ASSEMBLY)))
+    thread.start()
+
+    try:
+        assert ncbi.first_half_sent.wait(10)
+        # Half the compressed bytes have arrived; their text is already on disk
+        for _ in range(200):
+            if os.path.exists(partial) and os.path.getsize(partial) > 0:
+                break
+            threading.Event().wait(0.05)
+        with open(partial) as f:
+            written = f.read()
+        assert written and ncbi.genbank.startswith(written)
+        assert len(written) < len(ncbi.genbank)
+    finally:
+        ncbi.release_rest.set()
+        thread.join(10)
+
+    assert result[0].state == DONE
+    assert not os.path.exists(partial)
+
+def test_interrupted_run_resumes_where_it_stopped(ncbi, make_fetcher, tmp_path):
+    ncbi.download_status = 503
+    first = make_fetcher().fetch(ASSEMBLY)
+
+    assert first.state == FAILED and first.url and first.uid == UID
+    assert Manifest(str(tmp_path / "fetch_manifest.jsonl")).get(ASSEMBLY).state == FAILED
+
+    # A new run resolves nothing again and only downloads
+    ncbi.download_status = 200
+    ncbi.requests.clear()
+    second = make_fetcher().fetch(ASSEMBLY)
+
+    assert second.state == DONE and second.attempts == 2
+    assert ncbi.requests == [f"/genomes/{ASSEMBLY}_test/{ASSEMBLY}_test_genomic.gbff.gz"]
+
+def test_truncated_download_is_not_kept(ncbi, make_fetcher):
+    ncbi.truncate_at = len(ncbi.gzipped) - 100
+    fetcher = make_fetcher()
+
+    entry = fetcher.fetch(ASSEMBLY)
+
+    assert entry.state == FAILED and "Truncated download" in entry.error
+    assert not os.path.exists(os.path.join(fetcher.genbank_dir, f"{ASSEMBLY}.gbff"))
+
+    ncbi.truncate_at = None
+    assert fetcher.fetch(ASSEMBLY).state == DONE
+
+def test_finished_and_downloaded_assemblies_are_not_fetched_again(ncbi, make_fetcher, tmp_path):
+    fetcher = make_fetcher()
+    assert fetcher.fetch_all([ASSEMBLY, ASSEMBLY])[ASSEMBLY].state == DONE
+    ncbi.requests.clear()
+
+    assert make_fetcher().fetch(ASSEMBLY).state == DONE
+    assert ncbi.requests == []
+
+    # A run that stopped after the download only rewrites the outputs
+    manifest = Manifest(str(tmp_path / "fetch_manifest.jsonl"))
+    entry = manifest.get(ASSEMBLY)
+    genome_file = entry.genome_file
+    manifest.update(entry, state=DOWNLOADED, genome_file=None, annotation_file=None)
+    os.remove(genome_file)
+
+    assert make_fetcher().fetch(ASSEMBLY).state == DONE
+    assert ncbi.requests == []
+    assert os.path.exists(genome_file)
+
+def test_manifest_ignores_a_line_cut_short(tmp_path):
+    path = tmp_path / "fetch_manifest.jsonl"
+    manifest = Manifest(str(path))
+    entry = manifest.update(manifest.get(ASSEMBLY), state=RESOLVED, uid=UID)
+    with open(path, "a") as f:
+        f.write('{"assembly": "' + ASSEMBLY + '", "state": "do')
+
+    reloaded = Manifest(str(path))
+
+    assert reloaded.get(ASSEMBLY) == entry
+    reloaded.compact()
+    with open(path) as f:
+        assert len(f.readlines()) == 1
@@ -0,0 +1,91 @@
+# test_globe_frames.py
+# Round-trip tests for the binary simulation frame stream
+#
+# Usage: python -m pytest backend
+#
+# decode_frames reads the stream the way static/js/simulation.js does and
+# replays the deltas, so the tests compare the replay with the run itself.
+
+import struct
+
+import numpy as np
+import pytest
+from scipy import sparse
+
+from epidemic_sim import FlightGraph, SEIRParameters, simulate
+from globe_frames import FRAME_DELTA, FRAME_KEY, encode_frames, infectious_levels
+
+CODES = ["ATL", "JFK", "LAX", "SEA", "ZRH"]
+
+def decode_frames(stream):
+    """Replays a frame stream into airports, arrival steps, sources and per-step levels."""
+    frames = []
+    offset = 0
+    while offset < len(stream):
+        (length,) = struct.unpack_from("<I", stream, offset)
+        frames.append(memoryview(stream)[offset + 4:offset + 4 + length])
+        assert length % 4 == 0
+        offset += 4 + length
+
+    kind, n, steps, name_bytes = struct.unpack_from("<4I", frames[0])
+    assert kind == FRAME_KEY
+    lat = np.frombuffer(frames[0], "<f4", n, 16)
+    lng = np.frombuffer(frames[0], "<f4", n, 16 + 4 * n)
+    names = bytes(frames[0][16 + 8 * n:16 + 8 * n + name_bytes]).rstrip(b"\0").decode("utf-8").split("\n")
+
+    arrival_step = np.full(n, -1)
+    source = np.full(n, -1)
+    levels = np.zeros((steps + 1, n), dtype=np.uint8)
+    current = np.zeros(n, dtype=np.uint8)
+    for expected_step, frame in enumerate(frames[1:]):
+        kind, step, k, m = struct.unpack_from("<4I", frame)
+        assert (kind, step) == (FRAME_DELTA, expected_step)
+        reached = np.frombuffer(frame, "<u4", k, 16)
+        arrival_step[reached] = step
+        source[reached] = np.frombuffer(frame, "<i4", k, 16 + 4 * k)
+        changed = np.frombuffer(frame, "<u4", m, 16 + 8 * k)
+        current[changed] = np.frombuffer(frame, np.uint8, m, 16 + 8 * k + 4 * m)
+        levels[step] = current
+        assert len(frame) == 16 + 8 * k + 4 * m + (-m % 4) + m
+    assert len(frames) == steps + 2
+
+    return names, lat, lng, arrival_step, source, levels
+
+@pytest.fixture
+def graph():
+    rows = [0, 0, 1, 2, 3]
+    cols = [1, 2, 3, 4, 4]
+    flights = sparse.csr_matrix((np.full(5, 500.0), (rows, cols)), shape=(5, 5))
+    flights = (flights + flights.T).tocsr()
+    return FlightGraph(
+        CODES,
+        np.array([33.64, 40.64, 33.94, 47.45, 47.46]),
+        np.array([-84.43, -73.78, -118.41, -122.31, 8.55]),
+        flights
+    )
+
+def test_infectious_levels_are_bit_lengths():
+    assert infectious_levels(np.array([0, 1, 2, 3, 4, 1023, 1024])).tolist() == [0, 1, 2, 2, 3, 10, 11]
+
+def test_replayed_frames_match_the_run(graph):
+    result = simulate(graph, ["ATL"], SEIRParameters(beta=0.6, steps=60), random_seed=7)
+
+    names, lat, lng, arrival_step, source, levels = decode_frames(b"".join(encode_frames(result)))
+
+    assert names == CODES
+    np.testing.assert_allclose(lat, graph.lat, atol=1e-4)
+    np.testing.assert_allclose(lng, graph.lon, atol=1e-4)
+    assert arrival_step.tolist() == result.arrival_step.tolist()
+    assert source.tolist() == result.source.tolist()
+    assert (levels == infectious_levels(result.infectious)).all()
+    assert (arrival_step >= 0).sum() > 1
+
+def test_deltas_only_list_what_changed(graph):
+    result = simulate(graph, ["SEA"], SEIRParameters(steps=20), random_seed=1)
+
+    frames = list(encode_frames(result))
+    _, step, reached, changed = struct.unpack_from("<4I", frames[1], 4)
+
+    assert (step, reached) == (0, 1)
+    assert changed == np.count_nonzero(infectious_levels(result.infectious[0]))
+    assert sum(struct.unpack_from("<I", frame, 12)[0] for frame in frames[1:]) == (result.arrival_step >= 0).sum()
@@ -0,0 +1,259 @@
+# benchmark.py
+# Throughput and latency benchmarks for the misinformation and reply pipeline
+#
+# Usage: python benchmark.py [--profile quick|full] [--latency 0.0] [--save NAME] [--compare NAME]
+#
+# Runs the social agent's prompt builders and fact checker, its
+# generate-and-verify path, the frontend fact checker and the two Flask
+# endpoints over synthetic corpora (corpus.py). Every language model call is
+# answered by StubModel: deterministic text chosen by prompt hash, after an
+# optional fixed ``--latency``. Results can be saved as a JSON baseline under
+# baselines/ and later runs compared against it; a case whose p50 grew by
+# more than ``--threshold`` is reported as a regression (exit status 1).
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import time
+import zlib
+from dataclasses import asdict
+from typing import Callable, Dict, Iterable, List, Optional
+
+from corpus import Corpus, CorpusSpec, make_corpus
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+for directory in ("social agent", "frontend"):
+    path = os.path.join(ROOT, directory)
+    if path not in sys.path:
+        sys.path.append(path)
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines")
+DEFAULT_THRESHOLD = 0.2
+MODEL_CALLS_WITH_LATENCY = 20
+
+PROFILES = {
+    "quick": [CorpusSpec()],
+    "full": [
+        CorpusSpec(),
+        CorpusSpec(post_words=20),
+        CorpusSpec(post_words=400),
+        CorpusSpec(symptoms=2),
+        CorpusSpec(symptoms=15),
+        CorpusSpec(locations=1),
+        CorpusSpec(locations=5),
+        CorpusSpec(misinformation=0.0),
+        CorpusSpec(misinformation=1.0)
+    ]
+}
+
+
+class StubModel:
+    """Deterministic stand-in for the language model.
+
+    The reply to a prompt is always the same corpus post, picked by a hash
+    of the prompt, so generated summaries carry the corpus' misinformation
+    rate into the fact checker.
+    """
+
+    def __init__(self, corpus: Corpus, latency: float = 0.0):
+        self.corpus = corpus
+        self.latency = latency
+        self.calls = 0
+
+    def reply(self, prompt: str) -> str:
+        self.calls += 1
+        return self.corpus.posts[zlib.crc32(prompt.encode("utf-8")) % len(self.corpus.posts)].text
+
+    def __call__(self, prompt: str, model: Optional[str] = None) -> str:
+        if self.latency:
+            time.sleep(self.latency)
+        return self.reply(prompt)
+
+    async def generate(self, prompt: str, model: Optional[str] = None) -> str:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self.reply(prompt)
+
+
+def percentile(sorted_values: List[int], q: float) -> int:
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def measure(fn: Callable, inputs: Iterable) -> Dict[str, float]:
+    """Calls ``fn`` once per input (after one warm-up call) and summarizes the timings."""
+    inputs = list(inputs)
+    fn(inputs[0])
+    timings = []
+    for value in inputs:
+        start = time.perf_counter_ns()
+        fn(value)
+        timings.append(time.perf_counter_ns() - start)
+
+    timings.sort()
+    total = sum(timings)
+    return {
+        "calls": len(timings),
+        "ops_per_s": round(len(timings) / (total / 1e9), 2) if total else None,
+        "mean_us": round(total / len(timings) / 1e3, 2),
+        "p50_us": round(percentile(timings, 0.5) / 1e3, 2),
+        "p90_us": round(percentile(timings, 0.9) / 1e3, 2),
+        "p99_us": round(percentile(timings, 0.99) / 1e3, 2)
+    }
+
+
+def run_spec(spec: CorpusSpec, latency: float) -> Dict[str, Dict[str, float]]:
+    """Benchmarks every case on one corpus."""
+    import app as frontend_app
+    import disease_misinformation as frontend
+    import generate_response as agent
+
+    corpus = make_corpus(spec, agent.COMMON_SYMPTOMS, agent.COMMON_LOCATIONS)
+    stub = StubModel(corpus, latency)
+    texts = corpus.texts()
+
+    agent_disease = agent.DiseaseVector(
+        corpus.disease_name, dict(corpus.symptoms),
+        agent.normalize_transmission_data(corpus.origins, corpus.affected)
+    )
+    frontend_disease = frontend.DiseaseVector(
+        corpus.disease_name, dict(corpus.symptoms),
+        frontend.normalize_transmission_data(corpus.origins, corpus.affected)
+    )
+    correct_symptoms = list(corpus.symptoms)
+    correction_inputs = [
+        (
+            [(f"symptom '{s}'", f"actual symptoms: {', '.join(correct_symptoms)}") for s in post.wrong_symptoms]
+            + [(f"origin '{o}'", f"actual origin: {', '.join(corpus.origins)}") for o in post.wrong_origins]
+            + [(f"affected area '{a}'", f"actual affected area: {', '.join(corpus.affected)}") for a in post.wrong_affected]
+            + ([(f"disease name '{post.wrong_name}'", f"'{corpus.disease_name}'")] if post.wrong_name else []),
+            post.wrong_symptoms
+        )
+        for post in corpus.posts
+    ]
+    post_bodies = [
+        {
+            "post_text": text,
+            "disease": corpus.disease_name,
+            "symptoms": correct_symptoms,
+            "origins": corpus.origins,
+            "affected": corpus.affected
+        }
+        for text in texts
+    ]
+
+    # Route every model call through the stub, bypassing the response caches
+    patched = [
+        (agent, "call_ollama_api", stub),
+        (agent, "call_ollama_api_async", stub.generate),
+        (frontend, "call_language_model", stub)
+    ]
+    originals = [(module, name, getattr(module, name)) for module, name, _ in patched]
+    for module, name, replacement in patched:
+        setattr(module, name, replacement)
+
+    client = frontend_app.app.test_client()
+    # Cases that call the model run fewer times when there is latency to wait out
+    model_posts = texts[:MODEL_CALLS_WITH_LATENCY] if latency else texts
+    try:
+        return {
+            "agent.build_disease_prompt": measure(agent.build_disease_prompt, [agent_disease] * len(texts)),
+            "agent.create_correction_prompt": measure(
+                lambda args: agent.create_correction_prompt(agent_disease, args[0], args[1], correct_symptoms),
+                correction_inputs
+            ),
+            "agent.fact_check_disease_info": measure(
+                lambda text: agent.fact_check_disease_info(text, agent_disease), model_posts
+            ),
+            "agent.generate_and_verify_disease_summary": measure(
+                lambda i: agent.generate_and_verify_disease_summary(
+                    corpus.disease_name, dict(corpus.symptoms), corpus.origins, corpus.affected
+                ),
+                range(len(model_posts))
+            ),
+            "frontend.fact_check_disease_info": measure(
+                lambda text: frontend.fact_check_disease_info(text, frontend_disease), texts
+            ),
+            "endpoint.analyze_post": measure(
+                lambda body: _ok(client.post("/api/analyze-post", json=body)), post_bodies
+            ),
+            "endpoint.generate_reply": measure(
+                lambda body: _ok(client.post("/api/generate-reply", json=body)), post_bodies[:len(model_posts)]
+            )
+        }
+    finally:
+        for module, name, original in originals:
+            setattr(module, name, original)
+
+
+def _ok(response):
+    if response.status_code != 200:
+        raise RuntimeError(f"{response.status_code}: {response.get_data(as_text=True)[:200]}")
+    return response
+
+
+def run_benchmarks(specs: Iterable[CorpusSpec], latency: float = 0.0) -> Dict[str, object]:
+    results = {}
+    for spec in specs:
+        for case, stats in run_spec(spec, latency).items():
+            results[f"{case}[{spec.label()}]"] = stats
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "latency_s": latency,
+            "specs": [asdict(spec) for spec in specs]
+        },
+        "results": results
+    }
+
+
+def compare(current: Dict[str, object], baseline: Dict[str, object], threshold: float) -> List[str]:
+    """Returns a line per case whose p50 grew by more than ``threshold`` (a fraction)."""
+    regressions = []
+    for case, stats in current["results"].items():
+        before = baseline["results"].get(case)
+        if before and before["p50_us"] and stats["p50_us"] > before["p50_us"] * (1 + threshold):
+            change = stats["p50_us"] / before["p50_us"] - 1
+            regressions.append(f"{case}: p50 {before['p50_us']}us -> {stats['p50_us']}us (+{change:.0%})")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the misinformation and reply pipeline.")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="quick", help="corpus grid to run")
+    parser.add_argument("--posts", type=int, default=None, help="posts per corpus (overrides the profile)")
+    parser.add_argument("--latency", type=float, default=0.0, help="stub model latency in seconds")
+    parser.add_argument("--save", metavar="NAME", help="write results to baselines/NAME.json")
+    parser.add_argument("--compare", metavar="NAME", help="compare against baselines/NAME.json")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="allowed p50 slowdown")
+    args = parser.parse_args(argv)
+
+    specs = PROFILES[args.profile]
+    if args.posts:
+        specs = [CorpusSpec(**{**asdict(spec), "posts": args.posts}) for spec in specs]
+
+    report = run_benchmarks(specs, args.latency)
+    for case, stats in report["results"].items():
+        print(f"{case:70s} {stats['ops_per_s']:>12} ops/s  p50 {stats['p50_us']:>10}us  p99 {stats['p99_us']:>10}us")
+
+    if args.save:
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        path = os.path.join(BASELINE_DIR, f"{args.save}.json")
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved baseline -> {path}")
+
+    if args.compare:
+        with open(os.path.join(BASELINE_DIR, f"{args.compare}.json")) as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
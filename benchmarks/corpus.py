@@ -0,0 +1,129 @@
+# corpus.py
+# Deterministic synthetic posts for the misinformation pipeline benchmarks
+#
+# A corpus is one disease definition plus posts about it. Each post is filler
+# text with a symptom list, an origin claim and an affected-area claim; with
+# probability ``misinformation`` each claim (and the disease name) is wrong.
+# The same spec and seed always produce the same corpus.
+
+import random
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
+
+DISEASE_NAME = "Benchmark Fever"
+WRONG_NAMES = ("Benchmark Flu", "Benchmark Pox", "Benchmark Cough")
+
+FILLER = (
+    "people", "say", "this", "is", "spreading", "fast", "and", "doctors", "are", "worried",
+    "about", "the", "new", "cases", "reported", "today", "so", "stay", "safe", "everyone",
+    "wash", "your", "hands", "my", "cousin", "heard", "that", "it", "gets", "worse", "at", "night"
+)
+
+
+@dataclass(frozen=True)
+class CorpusSpec:
+    """Knobs of a synthetic corpus."""
+    posts: int = 200
+    post_words: int = 80          # approximate words per post
+    symptoms: int = 6             # symptoms in the disease definition
+    locations: int = 2            # origin and affected locations, each
+    misinformation: float = 0.3   # chance each claim in a post is wrong
+    seed: int = 0
+
+    def label(self) -> str:
+        return (
+            f"w{self.post_words}-s{self.symptoms}-l{self.locations}"
+            f"-m{round(self.misinformation * 100)}"
+        )
+
+
+@dataclass
+class SyntheticPost:
+    text: str
+    wrong_name: Optional[str] = None
+    wrong_symptoms: List[str] = field(default_factory=list)
+    wrong_origins: List[str] = field(default_factory=list)
+    wrong_affected: List[str] = field(default_factory=list)
+
+
+@dataclass
+class Corpus:
+    spec: CorpusSpec
+    disease_name: str
+    symptoms: Dict[str, float]
+    origins: List[str]
+    affected: List[str]
+    posts: List[SyntheticPost]
+
+    def texts(self) -> List[str]:
+        return [post.text for post in self.posts]
+
+
+def _pick_locations(rng, vocabulary: Sequence[str], count: int) -> List[str]:
+    """``count`` locations, topped up with made-up regions when the vocabulary runs out."""
+    locations = rng.sample(list(vocabulary), min(count, len(vocabulary)))
+    locations += [f"Region {i}" for i in range(count - len(locations))]
+    return locations
+
+
+def _filler(rng, words: int) -> str:
+    return " ".join(rng.choice(FILLER) for _ in range(max(words, 0)))
+
+
+def make_corpus(
+    spec: CorpusSpec,
+    symptom_vocabulary: Sequence[str],
+    location_vocabulary: Sequence[str]
+) -> Corpus:
+    """Builds the disease and its posts from the checker's own vocabularies."""
+    rng = random.Random(spec.seed)
+
+    # The disease uses the first symptoms of a shuffled vocabulary; wrong claims come from the rest
+    shuffled = rng.sample(list(symptom_vocabulary), len(symptom_vocabulary))
+    own = shuffled[:spec.symptoms]
+    own += [f"benchmark symptom {i}" for i in range(spec.symptoms - len(own))]
+    other_symptoms = shuffled[spec.symptoms:] or list(symptom_vocabulary)
+    symptoms = {symptom: round(rng.uniform(0.2, 1.0), 2) for symptom in own}
+
+    origins = _pick_locations(rng, location_vocabulary, spec.locations)
+    affected = _pick_locations(rng, location_vocabulary, spec.locations)
+    wrong_origins = [loc for loc in location_vocabulary if loc not in origins] or list(location_vocabulary)
+    wrong_affected = [loc for loc in location_vocabulary if loc not in affected] or list(location_vocabulary)
+
+    posts = []
+    for _ in range(spec.posts):
+        post = SyntheticPost(text="")
+        name = DISEASE_NAME
+        if rng.random() < spec.misinformation:
+            name = post.wrong_name = rng.choice(WRONG_NAMES)
+
+        listed = rng.sample(own, min(3, len(own)))
+        if rng.random() < spec.misinformation:
+            post.wrong_symptoms = rng.sample(other_symptoms, min(2, len(other_symptoms)))
+            listed += post.wrong_symptoms
+
+        origin = rng.choice(origins)
+        if rng.random() < spec.misinformation:
+            origin = rng.choice(wrong_origins)
+            post.wrong_origins.append(origin)
+
+        area = rng.choice(affected)
+        if rng.random() < spec.misinformation:
+            area = rng.choice(wrong_affected)
+            post.wrong_affected.append(area)
+
+        claims = [
+            f"{name} is going around.",
+            f"The symptoms are {', '.join(listed)}.",
+            f"It originated in {origin}.",
+            f"Now it is spreading to {area}."
+        ]
+        claim_words = sum(len(claim.split()) for claim in claims)
+        gap = max(spec.post_words - claim_words, 0) // (len(claims) + 1)
+        parts = [_filler(rng, gap)]
+        for claim in claims:
+            parts += [claim, _filler(rng, gap)]
+        post.text = " ".join(part for part in parts if part)
+        posts.append(post)
+
+    return Corpus(spec, DISEASE_NAME, symptoms, origins, affected, posts)
@@ -1,11 +1,94 @@
-from flask import Flask, render_template, request, jsonify
-from disease_misinformation import (
-    DiseaseVector, TransmissionInfo, normalize_transmission_data,
-    generate_and_verify_disease_summary, fact_check_disease_info
-)
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from flask import Flask, Response, g, render_template, request, jsonify, stream_with_context
+from disease_misinformation import fact_check_disease_info, summarize_and_verify_stream
+from claim_index import get_claim_index
+from disease_registry import disease_id_for, get_disease_registry
+from metrics import CONTENT_TYPE, HTTP_LATENCY, HTTP_REQUESTS, REGISTRY, stage_timer
+from response_cache import get_response_cache
+from scheduler import DONE, FAILED, FINISHED, get_generation_scheduler, job_priority
+from serving import GENERATION_TIMEOUT, Saturated, get_generation_limiter
+from snapshot import get_snapshot
 
 app = Flask(__name__)
 
+# Backend analysis modules (flight risk scoring) live next to the notebooks
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir, 'backend'))
+if BACKEND_DIR not in sys.path:
+    sys.path.append(BACKEND_DIR)
+
+# Attach the precompiled startup snapshot (python snapshot.py build) at import.
+# Workers map the same file and share the pages of its arrays (each unpickles
+# its own matchers); with it, the known diseases and claim index are ready
+# before the first request
+if get_snapshot() is not None:
+    get_disease_registry()
+    get_claim_index()
+
+# Airport risk scorer, built on first request and kept current by posted flights
+airport_risk_scorer = None
+airport_risk_scorer_lock = threading.Lock()
+
+# Flight graph for simulations, from the snapshot until a refresh rebuilds it
+simulation_graph = None
+simulation_graph_lock = threading.Lock()
+
+# Simulation parameters a request may override, and the longest run it may ask for
+SIMULATION_PARAMETERS = (
+    'beta', 'sigma', 'gamma', 'population', 'passengers_per_flight',
+    'flight_days', 'initial_infected', 'steps', 'arrival_threshold'
+)
+MAX_SIMULATION_STEPS = 1000
+MAX_ENSEMBLE_RUNS = 10000
+
+# Posts of a batch request that are checked together, with one claim search
+ANALYZE_BATCH = 256
+
+# The sampling profiler is only served when debugging or explicitly enabled
+PROFILER_ENABLED = os.environ.get('ENABLE_PROFILER') == '1'
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    endpoint = request.endpoint or 'unmatched'
+    HTTP_REQUESTS.inc(endpoint=endpoint, method=request.method, status=response.status_code)
+    if 'request_start' in g:
+        HTTP_LATENCY.observe(time.perf_counter() - g.request_start, endpoint=endpoint)
+    return response
+
+def cache_metrics():
+    """Response cache, generation limiter and scheduler counters, read at scrape time"""
+    cache = get_response_cache().stats()
+    limiter = get_generation_limiter().stats()
+    scheduler = get_generation_scheduler().stats()
+    return [
+        ('llm_cache_hits_total', 'counter', 'Response cache hits by tier.', [
+            ({'tier': 'memory'}, cache['memory_hits']), ({'tier': 'disk'}, cache['disk_hits'])
+        ]),
+        ('llm_cache_misses_total', 'counter', 'Response cache misses.', [({}, cache['misses'])]),
+        ('llm_cache_hit_ratio', 'gauge', 'Share of response cache lookups that hit.', [({}, cache['hit_ratio'])]),
+        ('generation_in_flight', 'gauge', 'Reply generations currently running.', [({}, limiter['in_flight'])]),
+        ('generation_rejected_total', 'counter', 'Reply generations shed with 503.', [
+            ({'path': 'stream'}, limiter['rejected']), ({'path': 'queue'}, scheduler['rejected'])
+        ]),
+        ('generation_queue_depth', 'gauge', 'Reply jobs waiting for a scheduler worker.', [({}, scheduler['queued'])]),
+        ('generation_jobs_total', 'counter', 'Finished reply jobs by outcome.', [
+            ({'status': status}, scheduler[status]) for status in FINISHED
+        ]),
+        ('generation_batches_total', 'counter', 'Model calls made by the scheduler (one per disease batch).', [
+            ({}, scheduler['batches'])
+        ])
+    ]
+
+REGISTRY.add_collector(cache_metrics)
+
 @app.route('/')
 def index():
     return render_template('index.html')
@@ -22,6 +105,102 @@ def social_monitor():
 def simulation():
     return render_template('simulation.html')
 
+def disease_field(data, field):
+    """A symptoms/origins/affected value: a name, a list of names or {name: confidence}"""
+    values = data.get(field)
+    if values is None or isinstance(values, str):
+        return values
+    if isinstance(values, list) and all(isinstance(value, str) for value in values):
+        return values
+    if isinstance(values, dict) and all(
+        isinstance(value, (int, float)) and not isinstance(value, bool) for value in values.values()
+    ):
+        return values
+    raise ValueError(f"'{field}' must be a name, a list of names or an object of name: confidence")
+
+def resolve_disease(data):
+    """Returns the compiled disease a request body refers to, by id or inline definition
+    
+    Raises ValueError for a malformed body and LookupError for an unknown id.
+    """
+    if not isinstance(data, dict):
+        raise ValueError('Expected a JSON object')
+    
+    registry = get_disease_registry()
+    disease_id = data.get('disease_id')
+    
+    if disease_id is not None:
+        if not isinstance(disease_id, str):
+            raise ValueError("'disease_id' must be a string")
+        record = registry.get(disease_id)
+        if record is None:
+            raise LookupError(f"Unknown disease id '{disease_id}'")
+        return record
+    
+    disease_name = data.get('disease', '')
+    if not isinstance(disease_name, str):
+        raise ValueError("'disease' must be a string")
+    return registry.intern(
+        disease_name,
+        disease_field(data, 'symptoms'),
+        disease_field(data, 'origins'),
+        disease_field(data, 'affected')
+    )
+
+def claim_disease_id(disease):
+    """The disease whose known false claims a post is searched against"""
+    return disease.disease_id or disease_id_for(disease.disease_name)
+
+def analysis_response(data, disease, corrected_text, matches=None):
+    """Builds the analysis result for one post, searching known claims unless matches are given"""
+    post_text = data.get('post_text', '')
+    
+    # Check if corrections were made
+    has_corrections = len(corrected_text) > len(post_text)
+    
+    # Generate corrections list
+    corrections = []
+    
+    # Simple parsing to extract corrections
+    if has_corrections:
+        correction_part = corrected_text.split("\n\n")[-1] if "\n\n" in corrected_text else ""
+        if correction_part:
+            # Extract individual corrections
+            if "disease name" in correction_part:
+                corrections.append("Incorrect disease name detected")
+            if "symptoms" in correction_part:
+                corrections.append("Incorrect symptoms listed")
+            if "originated" in correction_part or "origin" in correction_part:
+                corrections.append("Incorrect origin location")
+            if "affects" in correction_part or "affecting" in correction_part:
+                corrections.append("Incorrect affected areas")
+    
+    # Paraphrases of known false claims, searched within the post's disease
+    if matches is None:
+        with stage_timer('claim_match'):
+            matches = get_claim_index().search([post_text], disease_id=claim_disease_id(disease))[0]
+    for match in matches:
+        corrections.append(f"Known false claim: {match.claim.claim}")
+    
+    return {
+        'original_text': post_text,
+        'corrected_text': corrected_text,
+        'has_misinformation': has_corrections or bool(matches),
+        'corrections': corrections,
+        'matched_claims': [match.to_dict() for match in matches],
+        'disease_data': disease.to_dict()
+    }
+
+def read_posts(req):
+    """Returns post objects from a JSON array or a lazily parsed NDJSON body"""
+    if req.mimetype in ('application/x-ndjson', 'application/jsonl'):
+        return (json.loads(line) for line in req.stream if line.strip())
+    
+    posts = req.get_json(silent=True)
+    if not isinstance(posts, list):
+        raise ValueError('Expected a JSON array or NDJSON stream of posts')
+    return posts
+
 @app.route('/api/analyze-post', methods=['POST'])
 def analyze_post():
     """API endpoint to analyze a post for misinformation"""
@@ -31,70 +210,110 @@ def analyze_post():
         return jsonify({'error': 'No data provided'}), 400
     
     try:
-        # Extract data from the request
-        disease_name = data.get('disease', '')
-        symptoms_list = data.get('symptoms', [])
-        origins_list = data.get('origins', [])
-        affected_list = data.get('affected', [])
-        post_text = data.get('post_text', '')
-        
-        # Convert symptoms list to dictionary format with confidence scores
-        symptoms = {symptom: 0.9 for symptom in symptoms_list}
-        
-        # Create disease vector
-        disease_data = DiseaseVector(
-            disease_name=disease_name,
-            symptoms=symptoms,
-            transmission=normalize_transmission_data(
-                from_locations=origins_list,
-                to_locations=affected_list
-            )
-        )
-        
+        disease = resolve_disease(data)
+    except LookupError as e:
+        return jsonify({'error': str(e)}), 404
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
         # Check the post for misinformation
-        corrected_text = fact_check_disease_info(post_text, disease_data)
+        corrected_text = fact_check_disease_info(data.get('post_text', ''), disease.vector, disease.matcher)
         
-        # Check if corrections were made
-        has_corrections = len(corrected_text) > len(post_text)
-        
-        # Generate corrections list
-        corrections = []
-        
-        # Simple parsing to extract corrections
-        if has_corrections:
-            correction_part = corrected_text.split("\n\n")[-1] if "\n\n" in corrected_text else ""
-            if correction_part:
-                # Extract individual corrections
-                if "disease name" in correction_part:
-                    corrections.append("Incorrect disease name detected")
-                if "symptoms" in correction_part:
-                    corrections.append("Incorrect symptoms listed")
-                if "originated" in correction_part or "origin" in correction_part:
-                    corrections.append("Incorrect origin location")
-                if "affects" in correction_part or "affecting" in correction_part:
-                    corrections.append("Incorrect affected areas")
-        
-        # Generate a response
-        response = {
-            'original_text': post_text,
-            'corrected_text': corrected_text,
-            'has_misinformation': has_corrections,
-            'corrections': corrections,
-            'disease_data': {
-                'name': disease_name,
-                'symptoms': symptoms_list,
-                'origins': origins_list,
-                'affected': affected_list
-            }
-        }
-        
-        return jsonify(response)
+        return jsonify(analysis_response(data, disease, corrected_text))
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def analyze_batch(batch):
+    """Analyzes (index, post) pairs and yields their NDJSON lines, searching known claims once for all of them"""
+    # Disease models come compiled from the registry, once per distinct disease
+    results = {}
+    checked = []
+    for index, data in batch:
+        try:
+            disease = resolve_disease(data)
+            corrected_text = fact_check_disease_info(data.get('post_text', ''), disease.vector, disease.matcher)
+            checked.append((index, data, disease, corrected_text))
+        except Exception as e:
+            results[index] = {'error': str(e)}
+    
+    with stage_timer('claim_match'):
+        matches = get_claim_index().search(
+            [data.get('post_text', '') for _, data, _, _ in checked],
+            disease_ids=[claim_disease_id(disease) for _, _, disease, _ in checked]
+        )
+    for (index, data, disease, corrected_text), post_matches in zip(checked, matches):
+        results[index] = analysis_response(data, disease, corrected_text, post_matches)
+    
+    for index, _ in batch:
+        result = results[index]
+        result['index'] = index
+        yield json.dumps(result) + "\n"
+
+@app.route('/api/analyze-posts', methods=['POST'])
+def analyze_posts():
+    """API endpoint to analyze a batch of posts, streamed back as NDJSON"""
+    try:
+        posts = read_posts(request)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    def generate():
+        numbered = enumerate(posts)
+        while True:
+            batch = []
+            try:
+                for index, data in numbered:
+                    batch.append((index, data))
+                    if len(batch) == ANALYZE_BATCH:
+                        break
+            except ValueError as e:
+                # Malformed NDJSON line; report it and stop reading the stream
+                yield from analyze_batch(batch)
+                yield json.dumps({'error': str(e)}) + "\n"
+                return
+            
+            if not batch:
+                return
+            yield from analyze_batch(batch)
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+def wants_event_stream(data):
+    """Checks whether the client asked for a server-sent event stream"""
+    return bool(data.get('stream')) or 'text/event-stream' in request.headers.get('Accept', '')
+
+def sse_event(event, data):
+    """Formats one server-sent event with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def stream_reply(disease):
+    """Streams reply tokens as they are generated, then the verified reply"""
+    def generate():
+        try:
+            for event, text in summarize_and_verify_stream(disease.vector, disease.matcher):
+                yield sse_event(event, {'text': text})
+        except Exception as e:
+            yield sse_event('error', {'error': str(e)})
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+def submit_reply_job(data, disease, timeout):
+    """Queues a reply generation, prioritized by the post's reach and urgency"""
+    return get_generation_scheduler().submit(
+        disease,
+        priority=job_priority(data.get('reach', 0), data.get('urgency', 0)),
+        timeout=timeout,
+        post_text=data.get('post_text', '')
+    )
+
 @app.route('/api/generate-reply', methods=['POST'])
-def generate_reply():
+async def generate_reply():
     """API endpoint to generate a reply to misinformation"""
     data = request.json
     
@@ -102,45 +321,288 @@ def generate_reply():
         return jsonify({'error': 'No data provided'}), 400
     
     try:
-        # Extract data from the request
-        disease_name = data.get('disease', '')
-        symptoms_list = data.get('symptoms', [])
-        origins_list = data.get('origins', [])
-        affected_list = data.get('affected', [])
-        post_text = data.get('post_text', '')
+        disease = resolve_disease(data)
+    except LookupError as e:
+        return jsonify({'error': str(e)}), 404
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    if wants_event_stream(data):
+        # Token streams bypass the queue but still take a generation slot,
+        # held until the stream ends or the client goes away
+        limiter = get_generation_limiter()
+        try:
+            limiter.acquire()
+        except Saturated as e:
+            return jsonify({'error': str(e)}), 503, {'Retry-After': str(e.retry_after)}
+        response = stream_reply(disease)
+        response.call_on_close(limiter.release)
+        return response
+    
+    try:
+        # Wait for the scheduler to generate a verified summary and correction.
+        # The wait holds a generation slot, so callers beyond the limit get a
+        # 503 instead of parking server threads behind the whole queue
+        with get_generation_limiter().slot():
+            job = submit_reply_job(data, disease, GENERATION_TIMEOUT)
+            await asyncio.to_thread(job.wait, GENERATION_TIMEOUT)
+    except Saturated as e:
+        return jsonify({'error': str(e)}), 503, {'Retry-After': str(e.retry_after)}
+    
+    if job.status == DONE:
+        return jsonify({
+            'reply': job.result,
+            'post_text': data.get('post_text', ''),
+            'disease_data': disease.to_dict()
+        })
+    if job.status == FAILED:
+        return jsonify({'error': job.error}), 500
+    return jsonify({'error': f'Generation took longer than {GENERATION_TIMEOUT:g}s'}), 504
+
+def job_response(job):
+    """Job status with its queue position and links"""
+    result = job.to_dict()
+    result['queue_position'] = get_generation_scheduler().queue_position(job)
+    result['status_url'] = f'/api/reply-jobs/{job.id}'
+    result['events_url'] = f'/api/reply-jobs/{job.id}/events'
+    return result
+
+@app.route('/api/reply-jobs', methods=['POST'])
+def create_reply_job():
+    """API endpoint queueing a reply; poll the returned status_url or subscribe to events_url"""
+    data = request.json
+    
+    if not data:
+        return jsonify({'error': 'No data provided'}), 400
+    
+    try:
+        disease = resolve_disease(data)
+        timeout = float(data.get('timeout', GENERATION_TIMEOUT))
+        job = submit_reply_job(data, disease, timeout)
+    except LookupError as e:
+        return jsonify({'error': str(e)}), 404
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    except Saturated as e:
+        return jsonify({'error': str(e)}), 503, {'Retry-After': str(e.retry_after)}
+    
+    return jsonify(job_response(job)), 202, {'Location': f'/api/reply-jobs/{job.id}'}
+
+@app.route('/api/reply-jobs/<job_id>')
+def reply_job_status(job_id):
+    """API endpoint returning a reply job's status, and its reply once done"""
+    job = get_generation_scheduler().get(job_id)
+    if job is None:
+        return jsonify({'error': f"Unknown reply job '{job_id}'"}), 404
+    return jsonify(job_response(job))
+
+@app.route('/api/reply-jobs/<job_id>/events')
+def reply_job_events(job_id):
+    """Server-sent events with the job's status on every change, until it finishes"""
+    scheduler = get_generation_scheduler()
+    job = scheduler.get(job_id)
+    if job is None:
+        return jsonify({'error': f"Unknown reply job '{job_id}'"}), 404
+    
+    def generate():
+        sent = -1
+        while True:
+            # Looking the job up again expires it if its deadline passed in the queue
+            scheduler.get(job_id)
+            if job.version != sent:
+                sent = job.version
+                yield sse_event('status', job_response(job))
+                if job.status in FINISHED:
+                    return
+            job.wait_for_change(sent, timeout=1.0)
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/api/diseases')
+def list_diseases():
+    """API endpoint listing the known diseases that requests can refer to by id"""
+    return jsonify([disease.to_dict() for disease in get_disease_registry().known()])
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus scrape endpoint"""
+    return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
+
+@app.route('/debug/profile')
+def debug_profile():
+    """Samples every thread for a few seconds and returns folded stacks"""
+    if not (app.debug or PROFILER_ENABLED):
+        return jsonify({'error': 'Profiler disabled; set ENABLE_PROFILER=1'}), 404
+    
+    from profiler import DEFAULT_INTERVAL, DEFAULT_SECONDS, folded, sample_stacks
+    try:
+        seconds = float(request.args.get('seconds', DEFAULT_SECONDS))
+        interval = float(request.args.get('interval', DEFAULT_INTERVAL))
+        return Response(folded(sample_stacks(seconds, interval)), mimetype='text/plain')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except RuntimeError as e:
+        return jsonify({'error': str(e)}), 409
+
+def get_airport_risk_scorer(refresh=False):
+    """Returns the shared incremental scorer, building it from the stored flights if needed"""
+    global airport_risk_scorer
+    
+    # Held while building so concurrent first requests share one scorer
+    with airport_risk_scorer_lock:
+        if airport_risk_scorer is None or refresh:
+            # Imported lazily so pandas/sklearn only load when scores are needed
+            from flight_risk import load_aggregates, load_airports
+            from incremental_risk import IncrementalRiskScorer
+            snapshot = get_snapshot()
+            airports = snapshot.airports_frame() if snapshot is not None else None
+            airport_risk_scorer = IncrementalRiskScorer.from_aggregates(
+                load_aggregates(), airports=airports if airports is not None else load_airports()
+            )
+        return airport_risk_scorer
+
+def json_records(frame):
+    """DataFrame rows as dicts, with missing values (airports without delays or coordinates) as null"""
+    return frame.astype(object).where(frame.notna(), None).to_dict(orient='records')
+
+@app.route('/api/airport-risk', methods=['GET'])
+def airport_risk():
+    """API endpoint returning destination airports scored by transmission risk"""
+    try:
+        refresh = bool(request.args.get('refresh'))
+        snapshot = get_snapshot()
+        if airport_risk_scorer is None and not refresh and snapshot is not None:
+            # Scores precomputed in the snapshot, without loading pandas or the flights
+            records = snapshot.risk_records()
+            if records is not None:
+                return jsonify(records)
         
-        # Convert symptoms list to dictionary format with confidence scores
-        symptoms = {symptom: 0.9 for symptom in symptoms_list}
+        scorer = get_airport_risk_scorer(refresh=refresh)
+        return jsonify(json_records(scorer.snapshot()))
+    except FileNotFoundError as e:
+        return jsonify({'error': str(e)}), 404
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/airport-risk', methods=['POST'])
+def update_airport_risk():
+    """API endpoint folding new flight records into the scores and returning the airports that changed"""
+    try:
+        import pandas as pd
+        from flight_risk import FLIGHT_DTYPES
         
-        # Create disease vector
-        disease_data = DiseaseVector(
-            disease_name=disease_name,
-            symptoms=symptoms,
-            transmission=normalize_transmission_data(
-                from_locations=origins_list,
-                to_locations=affected_list
-            )
-        )
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({'error': 'Expected a JSON object with a flights list'}), 400
         
-        # Generate a verified summary and correction
-        response_text = generate_and_verify_disease_summary(
-            disease_name=disease_name,
-            symptoms=symptoms,
-            transmission_from=origins_list,
-            transmission_to=affected_list
-        )
+        flights = data.get('flights', [])
+        if not isinstance(flights, list):
+            return jsonify({'error': 'flights must be a list of flight records'}), 400
         
-        return jsonify({
-            'reply': response_text,
-            'post_text': post_text,
-            'disease_data': {
-                'name': disease_name,
-                'symptoms': symptoms_list,
-                'origins': origins_list,
-                'affected': affected_list
-            }
-        })
+        frame = pd.DataFrame(flights, columns=list(FLIGHT_DTYPES)).astype(FLIGHT_DTYPES)
+        changed = get_airport_risk_scorer().update(frame)
+        return jsonify({'changed': json_records(changed)})
+    except FileNotFoundError as e:
+        return jsonify({'error': str(e)}), 404
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def get_simulation_graph(refresh=False):
+    """Returns the shared flight graph, from the startup snapshot unless a rebuild is asked for"""
+    global simulation_graph
     
+    # Held while building so concurrent first requests share one graph
+    with simulation_graph_lock:
+        if simulation_graph is None or refresh:
+            from epidemic_sim import get_flight_graph
+            snapshot = get_snapshot()
+            graph = snapshot.flight_graph() if snapshot is not None and not refresh else None
+            simulation_graph = graph if graph is not None else get_flight_graph(refresh=refresh)
+        return simulation_graph
+
+def simulation_params(data):
+    """Builds SEIRParameters from the overrides in a request body, raising ValueError on bad input"""
+    from epidemic_sim import SEIRParameters
+    
+    defaults = SEIRParameters()
+    overrides = {
+        name: type(getattr(defaults, name))(data[name])
+        for name in SIMULATION_PARAMETERS if name in data
+    }
+    params = SEIRParameters(**overrides)
+    if not 0 < params.steps <= MAX_SIMULATION_STEPS:
+        raise ValueError(f'steps must be between 1 and {MAX_SIMULATION_STEPS}')
+    return params
+
+@app.route('/api/simulation', methods=['POST'])
+def run_simulation():
+    """API endpoint simulating epidemic spread over the flight network"""
+    try:
+        from epidemic_sim import busiest_airport, simulate
+        
+        data = request.json or {}
+        params = simulation_params(data)
+        graph = get_simulation_graph(refresh=bool(data.get('refresh')))
+        seeds = data.get('seeds') or [busiest_airport(graph)]
+        result = simulate(graph, seeds, params, data.get('random_seed'))
+        return jsonify(result.to_dict(include_infectious=bool(data.get('include_infectious'))))
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    except FileNotFoundError as e:
+        return jsonify({'error': str(e)}), 404
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/simulation/frames', methods=['POST'])
+def stream_simulation_frames():
+    """API endpoint streaming a simulation run as binary frames: a keyframe, then one delta per step"""
+    try:
+        from epidemic_sim import busiest_airport, simulate
+        from globe_frames import CONTENT_TYPE as FRAMES_CONTENT_TYPE, encode_frames
+        
+        data = request.json or {}
+        params = simulation_params(data)
+        graph = get_simulation_graph(refresh=bool(data.get('refresh')))
+        seeds = data.get('seeds') or [busiest_airport(graph)]
+        result = simulate(graph, seeds, params, data.get('random_seed'))
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    except FileNotFoundError as e:
+        return jsonify({'error': str(e)}), 404
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    
+    return Response(
+        encode_frames(result),
+        mimetype=FRAMES_CONTENT_TYPE,
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/api/simulation/ensemble', methods=['POST'])
+def run_simulation_ensemble():
+    """API endpoint returning per-airport arrival-time distributions over many stochastic runs"""
+    try:
+        from epidemic_sim import busiest_airport
+        from ensemble import DEFAULT_RUNS, run_ensemble
+        
+        data = request.json or {}
+        params = simulation_params(data)
+        runs = int(data.get('runs', DEFAULT_RUNS))
+        if not 0 < runs <= MAX_ENSEMBLE_RUNS:
+            return jsonify({'error': f'runs must be between 1 and {MAX_ENSEMBLE_RUNS}'}), 400
+        
+        graph = get_simulation_graph(refresh=bool(data.get('refresh')))
+        seeds = data.get('seeds') or [busiest_airport(graph)]
+        result = run_ensemble(graph, seeds, params, runs, data.get('random_seed'))
+        return jsonify(result.to_dict(include_cumulative=bool(data.get('include_cumulative'))))
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    except FileNotFoundError as e:
+        return jsonify({'error': str(e)}), 404
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -0,0 +1,321 @@
+# claim_index.py
+# Vector index of known false claims, for catching paraphrased misinformation
+#
+# Claims and posts are embedded offline by HashingEmbedder: character
+# n-grams (2-4 by default) are hashed into a fixed number of signed buckets,
+# weighted by inverse document frequency over the claims, and the vector is
+# L2-normalized so cosine similarity is a dot product. A batch of texts is
+# hashed together, with one bincount over all of their n-grams. Claims live in
+# one contiguous float32 matrix, grouped by disease. Posts are split into
+# sentences, and a batch of sentences is matched with one matrix product per
+# block of claims and a partial sort for the top k. Corpora of at least
+# IVF_MIN_CLAIMS claims are clustered by ``build_ivf`` (inverted file) so a
+# query only scores the ``nprobe`` closest lists.
+
+import json
+import os
+import re
+import threading
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+CLAIMS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "claims.json")
+
+DEFAULT_DIM = 512
+DEFAULT_NGRAMS = (2, 4)
+MATCH_THRESHOLD = float(os.environ.get("CLAIM_MATCH_THRESHOLD", 0.35))
+BLOCK_SIZE = 65536
+EMBED_BATCH = 4096
+
+# Searches over at least this many claims use the inverted file
+IVF_MIN_CLAIMS = int(os.environ.get("CLAIM_IVF_MIN_CLAIMS", 50000))
+DEFAULT_NPROBE = int(os.environ.get("CLAIM_IVF_NPROBE", 8))
+
+_NON_WORD = re.compile(r"[^\w]+")
+_SENTENCE_END = re.compile(r"[.!?;\n]+")
+_PRIME = np.uint64(1099511628211)
+_MIX = np.uint64(0xff51afd7ed558ccd)
+
+
+@dataclass(frozen=True)
+class Claim:
+    disease_id: str
+    claim: str
+    correction: str = ""
+
+
+@dataclass(frozen=True)
+class ClaimMatch:
+    claim: Claim
+    score: float
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            'claim': self.claim.claim,
+            'correction': self.claim.correction,
+            'score': round(self.score, 4)
+        }
+
+
+class HashingEmbedder:
+    """Signed feature hashing of character n-grams; needs no vocabulary or model files."""
+
+    def __init__(self, dim: int = DEFAULT_DIM, ngrams: Tuple[int, int] = DEFAULT_NGRAMS):
+        self.dim = dim
+        self.ngrams = ngrams
+        self.idf: Optional[np.ndarray] = None
+
+    def fit(self, texts: Iterable[str]) -> "HashingEmbedder":
+        """Learns per-bucket IDF weights, so n-grams shared by many claims count less."""
+        self.idf = None
+        counts = self.embed(texts, normalize=False)
+        document_frequency = np.count_nonzero(counts, axis=0)
+        self.idf = (np.log((1 + len(counts)) / (1 + document_frequency)) + 1).astype(np.float32)
+        return self
+
+    def embed_one(self, text: str, normalize: bool = True) -> np.ndarray:
+        return self.embed([text], normalize)[0]
+
+    def embed(self, texts: Iterable[str], normalize: bool = True) -> np.ndarray:
+        """(len(texts), dim) float32 matrix of unit vectors (zero rows for empty texts)."""
+        texts = list(texts)
+        matrix = np.empty((len(texts), self.dim), dtype=np.float32)
+        for start in range(0, len(texts), EMBED_BATCH):
+            matrix[start:start + EMBED_BATCH] = self._counts(texts[start:start + EMBED_BATCH])
+
+        if not normalize:
+            return matrix
+        if self.idf is not None:
+            matrix *= self.idf
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return np.divide(matrix, norms, out=matrix, where=norms > 0)
+
+    def _counts(self, texts: List[str]) -> np.ndarray:
+        """Signed n-gram counts of every text, hashed and summed in one pass over their bytes."""
+        # Pad with spaces so word starts and ends form their own n-grams
+        encoded = [f" {_NON_WORD.sub(' ', text.casefold()).strip()} ".encode("utf-8") for text in texts]
+        lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded))
+        ends = np.cumsum(lengths)
+        owners = np.repeat(np.arange(len(encoded), dtype=np.int64), lengths)
+        codes = np.frombuffer(b"".join(encoded), dtype=np.uint8).astype(np.uint64)
+        counts = np.zeros(len(encoded) * self.dim, dtype=np.float64)
+
+        with np.errstate(over="ignore"):
+            for n in range(self.ngrams[0], self.ngrams[1] + 1):
+                windows = len(codes) - n + 1
+                if windows <= 0:
+                    break
+                # Polynomial hash of every n-gram at once, then a bit mix (all mod 2**64)
+                hashes = np.full(windows, n, dtype=np.uint64)
+                for offset in range(n):
+                    hashes = hashes * _PRIME + codes[offset:offset + windows]
+                hashes ^= hashes >> np.uint64(33)
+                hashes *= _MIX
+                hashes ^= hashes >> np.uint64(33)
+
+                # Drop the windows that run from one text into the next
+                rows = owners[:windows]
+                inside = np.arange(n, windows + n) <= ends[rows]
+                hashes, rows = hashes[inside], rows[inside]
+                signs = np.where(hashes >> np.uint64(63), -1.0, 1.0)
+                buckets = rows * self.dim + (hashes % np.uint64(self.dim)).astype(np.int64)
+                counts += np.bincount(buckets, weights=signs, minlength=counts.size)
+
+        return counts.reshape(len(encoded), self.dim)
+
+
+def split_sentences(text: str) -> List[str]:
+    """Sentences of a post; a claim is usually made within one."""
+    return [sentence.strip() for sentence in _SENTENCE_END.split(text) if sentence.strip()]
+
+
+def _top_k(scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Column indices and scores of the k best entries of each row, best first."""
+    k = min(k, scores.shape[1])
+    if k == 0:
+        empty = np.zeros((scores.shape[0], 0))
+        return empty.astype(np.int64), empty
+    part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    part_scores = np.take_along_axis(scores, part, axis=1)
+    order = np.argsort(-part_scores, axis=1)
+    return np.take_along_axis(part, order, axis=1), np.take_along_axis(part_scores, order, axis=1)
+
+
+class ClaimIndex:
+    """Known false claims as a contiguous matrix, grouped by disease."""
+
+    def __init__(
+        self,
+        claims: Sequence[Claim],
+        embedder: Optional[HashingEmbedder] = None,
+        vectors: Optional[np.ndarray] = None
+    ):
+        """``vectors`` are the claims' precomputed embeddings (e.g. from the startup snapshot)."""
+        self.claims: List[Claim] = sorted(claims, key=lambda claim: claim.disease_id)
+        self.embedder = embedder or HashingEmbedder().fit(claim.claim for claim in self.claims)
+        if vectors is None:
+            vectors = np.ascontiguousarray(self.embedder.embed(claim.claim for claim in self.claims))
+        self.vectors = vectors
+
+        # Each disease's claims are one contiguous row range
+        self.ranges: Dict[str, Tuple[int, int]] = {}
+        for i, claim in enumerate(self.claims):
+            start, _ = self.ranges.get(claim.disease_id, (i, i))
+            self.ranges[claim.disease_id] = (start, i + 1)
+
+        self.centroids: Optional[np.ndarray] = None
+        self.list_offsets: Optional[np.ndarray] = None
+        self.list_rows: Optional[np.ndarray] = None
+        self.list_vectors: Optional[np.ndarray] = None
+
+    @classmethod
+    def load(cls, path: str = CLAIMS_PATH, embedder: Optional[HashingEmbedder] = None) -> "ClaimIndex":
+        """Builds the index from a JSON list of {disease_id, claim, correction}."""
+        with open(path, encoding="utf-8") as f:
+            entries = json.load(f)
+        return cls([Claim(e["disease_id"], e["claim"], e.get("correction", "")) for e in entries], embedder)
+
+    def __len__(self) -> int:
+        return len(self.claims)
+
+    def build_ivf(self, n_lists: Optional[int] = None, iterations: int = 10, seed: int = 0):
+        """Clusters the claims with spherical k-means for approximate search.
+
+        Keeps a second copy of the vectors ordered by list.
+        """
+        n = len(self.claims)
+        n_lists = n_lists or max(1, int(np.sqrt(n)))
+        rng = np.random.default_rng(seed)
+        sample = self.vectors[rng.choice(n, size=min(n, max(n_lists * 40, 10000)), replace=False)]
+        centroids = sample[rng.choice(len(sample), size=n_lists, replace=False)].copy()
+
+        for _ in range(iterations):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            for c in range(n_lists):
+                members = sample[assignment == c]
+                if len(members):
+                    centroid = members.sum(axis=0)
+                    centroids[c] = centroid / (np.linalg.norm(centroid) or 1.0)
+
+        assignment = np.concatenate([
+            np.argmax(self.vectors[start:start + BLOCK_SIZE] @ centroids.T, axis=1)
+            for start in range(0, n, BLOCK_SIZE)
+        ])
+        self.list_rows = np.argsort(assignment, kind="stable")
+        self.list_vectors = np.ascontiguousarray(self.vectors[self.list_rows])
+        self.list_offsets = np.concatenate([[0], np.cumsum(np.bincount(assignment, minlength=n_lists))])
+        self.centroids = centroids
+
+    def search(
+        self,
+        texts: Sequence[str],
+        k: int = 3,
+        disease_id: Optional[str] = None,
+        threshold: float = MATCH_THRESHOLD,
+        nprobe: int = DEFAULT_NPROBE,
+        disease_ids: Optional[Sequence[Optional[str]]] = None
+    ) -> List[List[ClaimMatch]]:
+        """Top-k known claims per text, scoring at least ``threshold``.
+
+        A text's score for a claim is its best-matching sentence's. With
+        ``disease_id`` only that disease's claims are considered, and
+        ``disease_ids`` gives each text its own disease. Every sentence of
+        the batch is embedded at once. Once ``build_ivf`` has run, searches
+        over at least IVF_MIN_CLAIMS claims probe ``nprobe`` lists; pass
+        ``nprobe=0`` to search exactly.
+        """
+        if disease_ids is None:
+            disease_ids = [disease_id] * len(texts)
+
+        sentences, owners = [], []
+        for owner, text in enumerate(texts):
+            for sentence in split_sentences(text):
+                sentences.append(sentence)
+                owners.append(owner)
+
+        # Sentences searched over the same claim rows share one matrix product
+        groups: Dict[Tuple[int, int], List[int]] = {}
+        for i, owner in enumerate(owners):
+            claim_range = self._claim_range(disease_ids[owner])
+            if claim_range[1] > claim_range[0]:
+                groups.setdefault(claim_range, []).append(i)
+
+        if not groups:
+            return [[] for _ in texts]
+        queries = self.embedder.embed(sentences)
+
+        best: List[Dict[int, float]] = [{} for _ in texts]
+
+        for (start, stop), members in groups.items():
+            if nprobe and self.centroids is not None and stop - start >= IVF_MIN_CLAIMS:
+                rows, scores = self._search_ivf(queries[members], k, start, stop, nprobe)
+            else:
+                rows, scores = self._search_exact(queries[members], k, start, stop)
+
+            # Keep each claim's best sentence score per text
+            for i, row_list, score_list in zip(members, rows, scores):
+                hits = best[owners[i]]
+                for row, score in zip(row_list.tolist(), score_list.tolist()):
+                    if score >= threshold and score > hits.get(row, -1.0):
+                        hits[row] = score
+
+        return [
+            [ClaimMatch(self.claims[row], score) for row, score in sorted(hits.items(), key=lambda item: -item[1])[:k]]
+            for hits in best
+        ]
+
+    def _claim_range(self, disease_id: Optional[str]) -> Tuple[int, int]:
+        if disease_id is None:
+            return 0, len(self.claims)
+        return self.ranges.get(disease_id, (0, 0))
+
+    def _search_exact(self, queries, k, start, stop):
+        best_rows = np.zeros((len(queries), 0), dtype=np.int64)
+        best_scores = np.zeros((len(queries), 0), dtype=np.float32)
+        for block in range(start, stop, BLOCK_SIZE):
+            scores = queries @ self.vectors[block:min(block + BLOCK_SIZE, stop)].T
+            rows, top = _top_k(scores, k)
+            best_rows = np.concatenate([best_rows, rows + block], axis=1)
+            best_scores = np.concatenate([best_scores, top], axis=1)
+            if best_rows.shape[1] > k:
+                keep, best_scores = _top_k(best_scores, k)
+                best_rows = np.take_along_axis(best_rows, keep, axis=1)
+        return best_rows, best_scores
+
+    def _search_ivf(self, queries, k, start, stop, nprobe):
+        lists, _ = _top_k(queries @ self.centroids.T, nprobe)
+        results_rows, results_scores = [], []
+        for query, probe in zip(queries, lists):
+            # Each list is a contiguous slice of list_vectors, so probing copies nothing
+            rows = np.concatenate([self.list_rows[self.list_offsets[c]:self.list_offsets[c + 1]] for c in probe])
+            scores = np.concatenate([
+                self.list_vectors[self.list_offsets[c]:self.list_offsets[c + 1]] @ query for c in probe
+            ])
+            if start > 0 or stop < len(self.claims):
+                inside = (rows >= start) & (rows < stop)
+                rows, scores = rows[inside], scores[inside]
+            top_rows, top = _top_k(scores[None, :], k)
+            results_rows.append(rows[top_rows[0]])
+            results_scores.append(top[0])
+        return results_rows, results_scores
+
+
+_default_index: Optional[ClaimIndex] = None
+_default_index_lock = threading.Lock()
+
+
+def get_claim_index() -> ClaimIndex:
+    """Returns the process-wide claim index, from the startup snapshot or data/claims.json."""
+    global _default_index
+    with _default_index_lock:
+        if _default_index is None:
+            from snapshot import get_snapshot
+            snapshot = get_snapshot()
+            _default_index = snapshot.claim_index() if snapshot is not None else None
+            if _default_index is None:
+                _default_index = ClaimIndex.load() if os.path.exists(CLAIMS_PATH) else ClaimIndex([])
+            if _default_index.centroids is None and len(_default_index) >= IVF_MIN_CLAIMS:
+                _default_index.build_ivf()
+        return _default_index
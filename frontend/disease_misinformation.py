@@ -1,12 +1,33 @@
 # disease_misinformation.py
 # Import from your existing code file for use in the Flask app
 
-import json
+import os
 import re
-import requests
-from typing import Dict, List, Optional, Union
+import sys
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
 from dataclasses import dataclass, field
 
+# The fact matcher, model client and response cache are the social agent's
+# modules, shared rather than copied
+SOCIAL_AGENT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir, 'social agent'))
+if SOCIAL_AGENT_DIR not in sys.path:
+    sys.path.append(SOCIAL_AGENT_DIR)
+
+from fact_matcher import DiseaseMatcher, apply_edits, get_disease_matcher
+from metrics import observe_generation, stage_timer
+from response_cache import get_response_cache
+
+# Vocabulary the fact checker looks for in posts
+COMMON_SYMPTOMS = (
+    "fever", "cough", "fatigue", "shortness of breath", "loss of taste", "loss of smell",
+    "headache", "sore throat", "chills", "muscle pain", "nausea", "vomiting", "diarrhea",
+    "rash", "joint pain", "confusion", "dizziness", "fainting", "seizures", "paralysis"
+)
+COMMON_LOCATIONS = ("Africa", "South America", "North America", "Europe", "Asia", "Australia")
+ORIGIN_CUES = ("from", "in")
+AFFECTED_CUES = ("affecting", "to")
+
 @dataclass
 class TransmissionInfo:
     """Represents disease transmission locations."""
@@ -53,9 +74,55 @@ def build_disease_prompt(disease_data: DiseaseVector) -> str:
     - do not say anuthing like "meets your requirements" or "fulfills your criteria" etc at the beginning of the text
     """
 
-# In a real implementation, this would use your Ollama API
-# Here we'll provide a simulated version that doesn't require Ollama
+# Set OLLAMA_MODEL (and OLLAMA_URL) to generate with a local Ollama server;
+# otherwise a simulated version that doesn't require Ollama is used
+OLLAMA_MODEL = os.environ.get("OLLAMA_MODEL")
+LANGUAGE_MODEL = OLLAMA_MODEL or "simulated"
+
+def _ollama_client():
+    # Imported on first use, so workers without a configured model never load requests
+    from ollama_client import get_ollama_client
+    return get_ollama_client()
+
+def generate_text(prompt: str) -> str:
+    """Uncached language model call, blocking until the whole response is in."""
+    start = time.perf_counter()
+    if OLLAMA_MODEL:
+        response = _ollama_client().generate_sync(prompt, OLLAMA_MODEL)
+    else:
+        response = simulate_language_model(prompt)
+    observe_generation(LANGUAGE_MODEL, time.perf_counter() - start, response)
+    return response
+
 def call_language_model(prompt: str) -> str:
+    """Language model call, answered from the response cache when possible."""
+    return get_response_cache().get_or_generate(
+        LANGUAGE_MODEL, prompt, lambda: generate_text(prompt)
+    )
+
+def stream_language_model(prompt: str) -> Iterator[str]:
+    """Yields a language model response chunk by chunk, caching the full text."""
+    cache = get_response_cache()
+    cached = cache.get(LANGUAGE_MODEL, prompt)
+    if cached is not None:
+        yield cached
+        return
+    
+    if OLLAMA_MODEL:
+        source = _ollama_client().stream(prompt, OLLAMA_MODEL)
+    else:
+        source = re.findall(r"\S+\s*", simulate_language_model(prompt))
+    
+    start = time.perf_counter()
+    chunks = []
+    for chunk in source:
+        chunks.append(chunk)
+        yield chunk
+    response = "".join(chunks)
+    observe_generation(LANGUAGE_MODEL, time.perf_counter() - start, response)
+    cache.set(LANGUAGE_MODEL, prompt, response)
+
+def simulate_language_model(prompt: str) -> str:
     """Simulated language model call that returns predefined responses."""
     if "COVID-19" in prompt:
         return "COVID-19 is a respiratory illness that commonly causes fever, cough, fatigue, and shortness of breath. Some people may lose their sense of taste or smell. It emerged from Asia and Europe and has spread globally. Most people experience mild symptoms and recover at home, but it can be more serious for older adults and those with existing health conditions. Practicing good hygiene, wearing masks in crowded places, and staying home when sick can help reduce spread."
@@ -64,59 +131,72 @@ def call_language_model(prompt: str) -> str:
     else:
         return f"Information about this disease is limited. Please consult healthcare professionals for accurate information."
 
-def fact_check_disease_info(text: str, disease_data: DiseaseVector) -> str:
+def get_fact_check_matcher(disease_data: DiseaseVector) -> DiseaseMatcher:
+    """Returns the compiled matcher used to fact-check posts about a disease."""
+    return get_disease_matcher(
+        disease_data, COMMON_SYMPTOMS, COMMON_LOCATIONS, ORIGIN_CUES, AFFECTED_CUES
+    )
+
+def fact_check_disease_info(
+    text: str,
+    disease_data: DiseaseVector,
+    matcher: Optional[DiseaseMatcher] = None
+) -> str:
     """Checks text for disease misinformation and adds corrections with a condescending tone."""
     corrections = []
     correct_symptoms = list(disease_data.symptoms.keys()) if disease_data.symptoms else []
     wrong_symptoms = []
     
-    # Check disease name consistency
+    # Find every name, symptom and location hit in one pass over the text
     disease_name = disease_data.disease_name
-    pattern = r'([A-Za-z0-9\-]+(?:\s+[A-Za-z0-9\-]+)*)'
-    disease_mentions = re.findall(pattern, text)
-    incorrect_names = [name for name in disease_mentions 
-                      if name.lower() != disease_name.lower() 
-                      and any(word in name.lower() for word in disease_name.lower().split())]
+    with stage_timer("scan"):
+        matcher = matcher or get_fact_check_matcher(disease_data)
+        matches = matcher.scan(text)
     
-    for incorrect_name in incorrect_names:
-        text = text.replace(incorrect_name, disease_name)
-        corrections.append((f"disease name '{incorrect_name}'", f"'{disease_name}'"))
+    # Check disease name consistency
+    with stage_timer("name_check"):
+        for incorrect_name in matches.incorrect_names:
+            corrections.append((f"disease name '{incorrect_name}'", f"'{disease_name}'"))
     
     # Simplified symptom checking for demonstration
-    if disease_data.symptoms:
-        actual_symptoms = set(disease_data.symptoms.keys())
-        # Common symptoms to check against
-        common_symptoms = {
-            "fever", "cough", "fatigue", "shortness of breath", "loss of taste", "loss of smell", 
-            "headache", "sore throat", "chills", "muscle pain", "nausea", "vomiting", "diarrhea",
-            "rash", "joint pain", "confusion", "dizziness", "fainting", "seizures", "paralysis"
-        }
-        
-        for symptom in common_symptoms:
-            if symptom not in actual_symptoms and symptom.lower() in text.lower():
+    with stage_timer("symptom_check"):
+        if disease_data.symptoms:
+            actual_symptoms = ", ".join(correct_symptoms)
+            for symptom in matches.wrong_symptoms:
                 wrong_symptoms.append(symptom)
-                corrections.append((f"symptom '{symptom}'", f"actual symptoms: {', '.join(actual_symptoms)}"))
+                corrections.append((f"symptom '{symptom}'", f"actual symptoms: {actual_symptoms}"))
     
     # Check origin and affected locations (simplified for demonstration)
-    if disease_data.transmission and disease_data.transmission.from_locations:
-        actual_origins = set(disease_data.transmission.from_locations.keys())
-        for location in ["Africa", "South America", "North America", "Europe", "Asia", "Australia"]:
-            if location not in actual_origins and f"from {location}" in text or f"in {location}" in text:
-                corrections.append((f"origin '{location}'", f"actual origins: {', '.join(actual_origins)}"))
-    
-    if disease_data.transmission and disease_data.transmission.to_locations:
-        actual_affected = set(disease_data.transmission.to_locations.keys())
-        for location in ["Africa", "South America", "North America", "Europe", "Asia", "Australia"]:
-            if location not in actual_affected and f"affecting {location}" in text or f"to {location}" in text:
-                corrections.append((f"affected area '{location}'", f"actual affected areas: {', '.join(actual_affected)}"))
+    with stage_timer("location_check"):
+        if disease_data.transmission and disease_data.transmission.from_locations:
+            origins_text = ", ".join(disease_data.transmission.from_locations.keys())
+            for location in matches.origin_mentions:
+                if location.casefold() not in matcher.origin_keys:
+                    corrections.append((f"origin '{location}'", f"actual origins: {origins_text}"))
+        
+        if disease_data.transmission and disease_data.transmission.to_locations:
+            affected_text = ", ".join(disease_data.transmission.to_locations.keys())
+            for location in matches.affected_mentions:
+                if location.casefold() not in matcher.affected_keys:
+                    corrections.append((f"affected area '{location}'", f"actual affected areas: {affected_text}"))
+    
+    with stage_timer("apply_edits"):
+        text = apply_edits(text, [(start, end, disease_name) for start, end in matches.name_spans])
     
     # If corrections needed, generate a condescending correction
     if corrections:
-        correction_note = create_correction_response(disease_data, corrections, wrong_symptoms, correct_symptoms)
+        with stage_timer("correction"):
+            correction_note = create_correction_response(disease_data, corrections, wrong_symptoms, correct_symptoms)
         text += "\n\n" + correction_note
     
     return text
 
+def fact_check_many(posts: Iterable[str], disease_data: DiseaseVector) -> Iterator[str]:
+    """Fact-checks a stream of posts about one disease, compiling its matcher once."""
+    matcher = get_fact_check_matcher(disease_data)
+    for post in posts:
+        yield fact_check_disease_info(post, disease_data, matcher)
+
 def create_correction_response(disease_data, corrections, wrong_symptoms, correct_symptoms):
     """Simulated condescending correction"""
     response = f"uhmm actwaully... as THE expert on {disease_data.disease_name}, I need to correct some things. "
@@ -162,5 +242,35 @@ def generate_and_verify_disease_summary(
         transmission=normalize_transmission_data(transmission_from, transmission_to)
     )
     
-    initial_summary = call_language_model(build_disease_prompt(disease_data))
-    return fact_check_disease_info(initial_summary, disease_data)
\ No newline at end of file
+    return summarize_and_verify(disease_data)
+
+def summarize_and_verify(disease_data: DiseaseVector, matcher: Optional[DiseaseMatcher] = None) -> str:
+    """Generates and fact-checks a summary for an already built DiseaseVector."""
+    with stage_timer("generate"):
+        initial_summary = call_language_model(build_disease_prompt(disease_data))
+    return fact_check_disease_info(initial_summary, disease_data, matcher)
+
+def generate_and_verify_disease_summary_stream(
+    disease_name: str,
+    symptoms: Optional[Dict[str, float]] = None,
+    transmission_from: Optional[Union[Dict[str, float], List[str], str]] = None,
+    transmission_to: Optional[Union[Dict[str, float], List[str], str]] = None
+) -> Iterator[Tuple[str, str]]:
+    """Streams ("token", chunk) events for the draft summary, then ("done", verified_text)."""
+    disease_data = DiseaseVector(
+        disease_name=disease_name,
+        symptoms=symptoms or {},
+        transmission=normalize_transmission_data(transmission_from, transmission_to)
+    )
+    yield from summarize_and_verify_stream(disease_data)
+
+def summarize_and_verify_stream(
+    disease_data: DiseaseVector,
+    matcher: Optional[DiseaseMatcher] = None
+) -> Iterator[Tuple[str, str]]:
+    """Streaming version of summarize_and_verify."""
+    chunks = []
+    for chunk in stream_language_model(build_disease_prompt(disease_data)):
+        chunks.append(chunk)
+        yield "token", chunk
+    yield "done", fact_check_disease_info("".join(chunks), disease_data, matcher)
@@ -0,0 +1,249 @@
+# disease_registry.py
+# Known diseases, compiled once and shared by every request
+
+import json
+import os
+import re
+import sys
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, List, Optional, Union
+
+from disease_misinformation import (
+    DiseaseMatcher, DiseaseVector, TransmissionInfo, get_fact_check_matcher
+)
+
+DISEASES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "diseases.json")
+
+# Species symptom severities written by backend/symptom_matrix.py
+SYMPTOM_MATRIX_PATH = os.environ.get(
+    "SYMPTOM_MATRIX_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "backend", "op", "symptom_matrix.npz")
+)
+
+# Confidence given to symptoms and locations supplied as plain lists
+DEFAULT_SYMPTOM_CONFIDENCE = 0.9
+DEFAULT_LOCATION_CONFIDENCE = 1.0
+
+Values = Union[Dict[str, float], List[str], str, None]
+
+
+def _interned_map(values: Values, default: float) -> Dict[str, float]:
+    """Converts a list, string or dict of names to an interned {name: confidence} dict."""
+    if isinstance(values, dict):
+        return {sys.intern(name): float(confidence) for name, confidence in values.items()}
+    if isinstance(values, str):
+        return {sys.intern(values): default}
+    return {sys.intern(name): default for name in values or ()}
+
+
+def disease_id_for(name: str) -> str:
+    """Derives a URL-safe id from a disease or species name."""
+    return re.sub(r"[^a-z0-9]+", "-", name.casefold()).strip("-")
+
+
+def _content_key(disease_name: str, symptoms: Values, origins: Values, affected: Values):
+    """Hashable identity of an ad-hoc disease definition."""
+    def freeze(values):
+        if isinstance(values, dict):
+            return tuple(values.items())
+        if isinstance(values, str):
+            return (values,)
+        return tuple(values or ())
+    return (disease_name, freeze(symptoms), freeze(origins), freeze(affected))
+
+
+@dataclass(frozen=True)
+class DiseaseRecord:
+    """Read-only, precompiled form of one disease.
+
+    ``vector`` is shared between requests and must not be mutated.
+    """
+    __slots__ = (
+        "disease_id", "disease_name", "vector", "matcher",
+        "symptom_keys", "origin_keys", "affected_keys"
+    )
+    disease_id: Optional[str]
+    disease_name: str
+    vector: DiseaseVector
+    matcher: DiseaseMatcher
+    symptom_keys: FrozenSet[str]
+    origin_keys: FrozenSet[str]
+    affected_keys: FrozenSet[str]
+
+    def __reduce__(self):
+        # Frozen with slots, so unpickling goes through __init__ instead of setattr
+        return DiseaseRecord, tuple(getattr(self, name) for name in self.__slots__)
+
+    def to_dict(self) -> Dict[str, object]:
+        """Returns the disease in the request/response JSON shape."""
+        return {
+            'id': self.disease_id,
+            'name': self.disease_name,
+            'symptoms': list(self.vector.symptoms),
+            'origins': list(self.vector.transmission.from_locations),
+            'affected': list(self.vector.transmission.to_locations)
+        }
+
+
+def compile_disease(
+    disease_name: str,
+    symptoms: Values = None,
+    origins: Values = None,
+    affected: Values = None,
+    disease_id: Optional[str] = None
+) -> DiseaseRecord:
+    """Builds a DiseaseRecord, compiling its matcher and lookup sets."""
+    vector = DiseaseVector(
+        disease_name=sys.intern(disease_name),
+        symptoms=_interned_map(symptoms, DEFAULT_SYMPTOM_CONFIDENCE),
+        transmission=TransmissionInfo(
+            from_locations=_interned_map(origins, DEFAULT_LOCATION_CONFIDENCE),
+            to_locations=_interned_map(affected, DEFAULT_LOCATION_CONFIDENCE)
+        )
+    )
+    matcher = get_fact_check_matcher(vector)
+
+    return DiseaseRecord(
+        disease_id=disease_id,
+        disease_name=vector.disease_name,
+        vector=vector,
+        matcher=matcher,
+        symptom_keys=frozenset(symptom.casefold() for symptom in vector.symptoms),
+        origin_keys=matcher.origin_keys,
+        affected_keys=matcher.affected_keys
+    )
+
+
+class DiseaseRegistry:
+    """Known diseases by id, plus a bounded cache of ad-hoc definitions.
+
+    Known diseases are compiled once when registered. Species from an
+    attached symptom matrix are known by id too, but each is only compiled
+    the first time it is looked up. Ad-hoc definitions sent inline with a
+    request are compiled on first sight and reused for identical
+    definitions, evicting the least recently used beyond ``max_adhoc``
+    entries.
+    """
+
+    def __init__(self, max_adhoc: int = 1024):
+        self.max_adhoc = max_adhoc
+        self._known: Dict[str, DiseaseRecord] = {}
+        self._adhoc: "OrderedDict[tuple, DiseaseRecord]" = OrderedDict()
+        self._matrix = None
+        self._matrix_species: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def register(
+        self,
+        disease_id: str,
+        disease_name: str,
+        symptoms: Values = None,
+        origins: Values = None,
+        affected: Values = None
+    ) -> DiseaseRecord:
+        """Compiles and stores a known disease under its id."""
+        return self.add(compile_disease(disease_name, symptoms, origins, affected, sys.intern(disease_id)))
+
+    def add(self, record: DiseaseRecord) -> DiseaseRecord:
+        """Stores an already compiled known disease (e.g. from the startup snapshot)."""
+        with self._lock:
+            self._known[record.disease_id] = record
+        return record
+
+    def load(self, path: str = DISEASES_PATH) -> int:
+        """Registers every disease in a JSON file and returns how many were loaded."""
+        with open(path) as f:
+            entries = json.load(f)
+
+        for entry in entries:
+            self.register(
+                entry['id'], entry['disease'],
+                entry.get('symptoms'), entry.get('origins'), entry.get('affected')
+            )
+        return len(entries)
+
+    def attach_symptom_matrix(self, matrix) -> int:
+        """Makes every species of a SymptomMatrix available by id and returns how many there are."""
+        species_by_id = {disease_id_for(species): species for species in matrix.species}
+        with self._lock:
+            self._matrix = matrix
+            self._matrix_species = species_by_id
+        return len(species_by_id)
+
+    def get(self, disease_id: str) -> Optional[DiseaseRecord]:
+        """Returns the known disease with this id, or None."""
+        record = self._known.get(disease_id)
+        if record is None and disease_id in self._matrix_species:
+            species = self._matrix_species[disease_id]
+            record = self.register(disease_id, species, self._matrix.row(species))
+        return record
+
+    def intern(
+        self,
+        disease_name: str,
+        symptoms: Values = None,
+        origins: Values = None,
+        affected: Values = None
+    ) -> DiseaseRecord:
+        """Returns the shared record for an ad-hoc disease definition."""
+        key = _content_key(disease_name, symptoms, origins, affected)
+        with self._lock:
+            record = self._adhoc.get(key)
+            if record is not None:
+                self._adhoc.move_to_end(key)
+                return record
+
+        record = compile_disease(disease_name, symptoms, origins, affected)
+        with self._lock:
+            record = self._adhoc.setdefault(key, record)
+            self._adhoc.move_to_end(key)
+            while len(self._adhoc) > self.max_adhoc:
+                self._adhoc.popitem(last=False)
+        return record
+
+    def known(self) -> List[DiseaseRecord]:
+        """Returns every known disease."""
+        return list(self._known.values())
+
+    def __contains__(self, disease_id) -> bool:
+        return disease_id in self._known or disease_id in self._matrix_species
+
+    def __len__(self) -> int:
+        return len(self._known)
+
+
+_default_registry: Optional[DiseaseRegistry] = None
+_default_registry_lock = threading.Lock()
+
+
+def get_disease_registry() -> DiseaseRegistry:
+    """Returns the process-wide registry, loading the known diseases on first use.
+
+    Diseases and the symptom matrix come precompiled from the startup
+    snapshot when one is attached, and from their source files otherwise.
+    """
+    global _default_registry
+    with _default_registry_lock:
+        if _default_registry is None:
+            from snapshot import get_snapshot
+            registry = DiseaseRegistry()
+            snapshot = get_snapshot()
+            
+            matrix = snapshot.symptom_matrix() if snapshot is not None else None
+            if matrix is None and os.path.exists(SYMPTOM_MATRIX_PATH):
+                # backend/ is on sys.path when running under app.py
+                from symptom_matrix import SymptomMatrix
+                matrix = SymptomMatrix.load(SYMPTOM_MATRIX_PATH)
+            if matrix is not None:
+                registry.attach_symptom_matrix(matrix)
+            
+            records = snapshot.disease_records() if snapshot is not None else None
+            if records is not None:
+                for record in records:
+                    registry.add(record)
+            elif os.path.exists(DISEASES_PATH):
+                registry.load(DISEASES_PATH)
+            _default_registry = registry
+        return _default_registry
@@ -0,0 +1,175 @@
+# load_test.py
+# Load test for /api/generate-reply against a local fake Ollama server
+#
+# Usage: python load_test.py [--clients 32] [--requests 500] [--fake-latency 0.5] [--max-in-flight 8]
+#        python load_test.py --url http://127.0.0.1:8000 --ollama-port 11500
+#          (test an already running app started with OLLAMA_URL=http://127.0.0.1:11500 OLLAMA_MODEL=fake)
+#
+# Starts a fake Ollama that streams a fixed reply over ``--fake-latency``
+# seconds, serves the app in serving mode against it (unless --url is
+# given), then fires requests from concurrent clients. Every request names
+# a different ad-hoc disease so the response cache cannot answer it. Prints
+# requests per second, latency percentiles of successful replies and how
+# many were shed with 503.
+
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+
+import requests
+
+FAKE_REPLY = (
+    "This illness commonly causes fever, cough and fatigue. It emerged from Asia "
+    "and is now common in Europe. Most people recover with rest and fluids."
+)
+
+
+class FakeOllamaHandler(BaseHTTPRequestHandler):
+    """Answers POST /api/generate with NDJSON chunks spread over the server's latency."""
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        words = FAKE_REPLY.split(" ")
+        delay = self.server.latency / len(words)
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for i, word in enumerate(words):
+            time.sleep(delay)
+            line = json.dumps({"response": word + (" " if i < len(words) - 1 else ""), "done": False}) + "\n"
+            self.wfile.write(f"{len(line.encode()):x}\r\n{line}\r\n".encode())
+        self.wfile.write(b"0\r\n\r\n")
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_fake_ollama(latency: float, port: int = 0) -> ThreadingHTTPServer:
+    """Runs the fake Ollama server on a daemon thread; the bound port is ``server_address[1]``."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), FakeOllamaHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_app(port: int, ollama_url: str, max_in_flight: int, cache_dir: str) -> subprocess.Popen:
+    """Starts serving.py in a subprocess and waits until it accepts connections."""
+    env = dict(
+        os.environ,
+        OLLAMA_URL=ollama_url,
+        OLLAMA_MODEL="fake",
+        GENERATION_MAX_IN_FLIGHT=str(max_in_flight),
+        LLM_CACHE_PATH=os.path.join(cache_dir, "llm_responses.sqlite3")
+    )
+    process = subprocess.Popen(
+        [sys.executable, "serving.py", "--port", str(port)],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return process
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("Server did not start within 30s")
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else float("nan")
+
+
+def run_load(url: str, clients: int, total: int, timeout: float = 120) -> Dict[str, object]:
+    """Sends ``total`` generate-reply requests from ``clients`` threads and summarizes them."""
+    local = threading.local()
+    latencies: List[float] = []
+    statuses: Dict[int, int] = {}
+    lock = threading.Lock()
+
+    def send(i):
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+        body = {"disease": f"Load Test Fever {i}", "symptoms": ["fever"], "post_text": ""}
+        start = time.perf_counter()
+        try:
+            status = session.post(f"{url}/api/generate-reply", json=body, timeout=timeout).status_code
+        except requests.RequestException:
+            status = 0
+        elapsed = time.perf_counter() - start
+        with lock:
+            statuses[status] = statuses.get(status, 0) + 1
+            if status == 200:
+                latencies.append(elapsed)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as executor:
+        list(executor.map(send, range(total)))
+    duration = time.perf_counter() - start
+
+    return {
+        "requests": total,
+        "clients": clients,
+        "duration_s": round(duration, 3),
+        "requests_per_s": round(total / duration, 2),
+        "ok_per_s": round(len(latencies) / duration, 2),
+        "p50_ms": round(percentile(latencies, 0.5) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 1),
+        "statuses": statuses
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test /api/generate-reply against a fake Ollama.")
+    parser.add_argument("--url", help="already running app (default: start serving.py locally)")
+    parser.add_argument("--clients", type=int, default=32, help="concurrent clients")
+    parser.add_argument("--requests", type=int, default=500, help="total requests")
+    parser.add_argument("--fake-latency", type=float, default=0.5, help="seconds per fake generation")
+    parser.add_argument("--ollama-port", type=int, default=0, help="fake Ollama port (default: any free port)")
+    parser.add_argument("--max-in-flight", type=int, default=8, help="GENERATION_MAX_IN_FLIGHT for the local app")
+    args = parser.parse_args(argv)
+
+    ollama = start_fake_ollama(args.fake_latency, args.ollama_port)
+    process = None
+    with tempfile.TemporaryDirectory() as cache_dir:
+        try:
+            url = args.url
+            if url is None:
+                port = free_port()
+                ollama_url = f"http://127.0.0.1:{ollama.server_address[1]}"
+                process = start_app(port, ollama_url, args.max_in_flight, cache_dir)
+                url = f"http://127.0.0.1:{port}"
+            print(json.dumps(run_load(url.rstrip("/"), args.clients, args.requests), indent=2))
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait()
+            ollama.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+# scheduler.py
+# Priority scheduler for reply generation: reach/urgency ordering, deadlines and per-disease batching
+#
+# Usage: get_generation_scheduler().submit(disease, priority=job_priority(reach, urgency), timeout=30)
+#
+# Model capacity is fixed, so queued replies are served by priority rather
+# than arrival order: a few worker threads pop the most urgent job from a
+# heap, and a job whose deadline passes while queued is dropped as expired
+# instead of spending the model on a reply nobody is waiting for. The
+# generation prompt depends only on the disease, so queued jobs for the same
+# disease are taken together and answered by one model call and one fact
+# check. Jobs are kept for a while after they finish so clients can poll
+# /api/reply-jobs/<id> or subscribe to its event stream.
+
+import heapq
+import itertools
+import math
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+from serving import MAX_IN_FLIGHT, RETRY_AFTER, Saturated
+
+WORKERS = int(os.environ.get("SCHEDULER_WORKERS", MAX_IN_FLIGHT))
+MAX_QUEUED = int(os.environ.get("SCHEDULER_MAX_QUEUED", 1000))
+MAX_BATCH = int(os.environ.get("SCHEDULER_MAX_BATCH", 32))
+DEFAULT_TIMEOUT = float(os.environ.get("SCHEDULER_DEFAULT_TIMEOUT", 120))
+MAX_FINISHED = 10000
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+EXPIRED = "expired"
+FINISHED = (DONE, FAILED, EXPIRED)
+EXPIRED_ERROR = "Deadline passed before the reply was generated"
+
+
+def job_priority(reach: float = 0, urgency: float = 0) -> float:
+    """Scheduling priority of a post; higher runs first.
+
+    Reach (followers, shares or views) counts logarithmically, so each
+    tenfold increase adds the same amount, and urgency is added as is.
+    """
+    return math.log10(1 + max(float(reach), 0.0)) + float(urgency)
+
+
+class GenerationJob:
+    """One queued reply; its status changes are visible to waiters."""
+
+    def __init__(self, disease, priority: float, deadline: float, post_text: str = ""):
+        self.id = uuid.uuid4().hex
+        self.disease = disease
+        self.priority = priority
+        self.deadline = deadline
+        self.post_text = post_text
+        self.status = QUEUED
+        self.result: Optional[str] = None
+        self.error: Optional[str] = None
+        self.batch_size = 0
+        self.submitted = time.monotonic()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.version = 0
+        self._changed = threading.Condition()
+
+    def _set(self, status: str, result: Optional[str] = None, error: Optional[str] = None):
+        with self._changed:
+            now = time.monotonic()
+            self.status = status
+            if status == RUNNING:
+                self.started = now
+            if status in FINISHED:
+                self.result = result
+                self.error = error
+                self.finished = now
+            self.version += 1
+            self._changed.notify_all()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Blocks until the job finishes; False if ``timeout`` ran out first."""
+        with self._changed:
+            return self._changed.wait_for(lambda: self.status in FINISHED, timeout)
+
+    def wait_for_change(self, version: int, timeout: Optional[float] = None) -> int:
+        """Blocks until the status moves past ``version``; returns the current version."""
+        with self._changed:
+            self._changed.wait_for(lambda: self.version != version, timeout)
+            return self.version
+
+    def to_dict(self) -> Dict[str, object]:
+        now = time.monotonic()
+        return {
+            'id': self.id,
+            'status': self.status,
+            'priority': round(self.priority, 4),
+            'disease_data': self.disease.to_dict(),
+            'post_text': self.post_text,
+            'reply': self.result,
+            'error': self.error,
+            'batch_size': self.batch_size,
+            'queued_s': round((self.started or self.finished or now) - self.submitted, 4),
+            'run_s': round((self.finished or now) - self.started, 4) if self.started else None,
+            'deadline_in_s': round(self.deadline - now, 4) if self.status == QUEUED else None
+        }
+
+
+class GenerationScheduler:
+    """Priority queue of reply jobs served by a fixed pool of worker threads.
+
+    ``generate`` turns one disease record into a verified reply; it runs once
+    per batch of same-disease jobs.
+    """
+
+    def __init__(
+        self,
+        generate: Callable[[object], str],
+        workers: int = WORKERS,
+        max_queued: int = MAX_QUEUED,
+        max_batch: int = MAX_BATCH,
+        retry_after: int = RETRY_AFTER
+    ):
+        self.generate = generate
+        self.workers = workers
+        self.max_queued = max_queued
+        self.max_batch = max_batch
+        self.retry_after = retry_after
+
+        self._heap: List[tuple] = []   # (-priority, deadline, sequence, job)
+        self._sequence = itertools.count()
+        self._queued = 0
+        self._running = 0
+        self._jobs: "OrderedDict[str, GenerationJob]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._ready = threading.Condition(self._lock)
+        self._threads: List[threading.Thread] = []
+        self.counts = {'submitted': 0, DONE: 0, FAILED: 0, EXPIRED: 0, 'rejected': 0, 'batches': 0}
+
+    def start(self):
+        with self._lock:
+            while len(self._threads) < self.workers:
+                thread = threading.Thread(
+                    target=self._work, name=f"generation-{len(self._threads)}", daemon=True
+                )
+                self._threads.append(thread)
+                thread.start()
+
+    def submit(
+        self,
+        disease,
+        priority: float = 0.0,
+        timeout: float = DEFAULT_TIMEOUT,
+        post_text: str = ""
+    ) -> GenerationJob:
+        """Queues a reply for ``disease``; raises Saturated when the queue is full."""
+        job = GenerationJob(disease, priority, time.monotonic() + timeout, post_text)
+        with self._lock:
+            if self._queued >= self.max_queued:
+                self.counts['rejected'] += 1
+                raise Saturated(self.retry_after)
+            heapq.heappush(self._heap, (-priority, job.deadline, next(self._sequence), job))
+            self._queued += 1
+            self.counts['submitted'] += 1
+            self._remember(job)
+            self._ready.notify()
+        if not self._threads:
+            self.start()
+        return job
+
+    def get(self, job_id: str) -> Optional[GenerationJob]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is not None and job.status == QUEUED and job.deadline < time.monotonic():
+            # Expired while waiting; the worker skips it when it surfaces
+            self._expire(job)
+        return job
+
+    def queue_position(self, job: GenerationJob) -> Optional[int]:
+        """Jobs ahead of ``job`` in the queue (0 = next), or None once it has left the queue."""
+        if job.status != QUEUED:
+            return None
+        with self._lock:
+            key = (-job.priority, job.deadline)
+            return sum(1 for entry in self._heap if entry[3].status == QUEUED and entry[:2] < key)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'queued': self._queued, 'running': self._running, 'workers': self.workers, **self.counts}
+
+    def _remember(self, job: GenerationJob):
+        # Called with the lock held; evicts the oldest finished jobs
+        self._jobs[job.id] = job
+        while len(self._jobs) > MAX_FINISHED:
+            oldest = next(iter(self._jobs.values()))
+            if oldest.status not in FINISHED:
+                break
+            self._jobs.popitem(last=False)
+
+    def _expire(self, job: GenerationJob):
+        with self._lock:
+            if job.status == QUEUED:
+                self._queued -= 1
+                self.counts[EXPIRED] += 1
+                job._set(EXPIRED, error=EXPIRED_ERROR)
+
+    def _next_batch(self) -> List[GenerationJob]:
+        """Pops the most urgent live job and every queued job for the same disease."""
+        with self._ready:
+            while True:
+                now = time.monotonic()
+                while self._heap:
+                    _, deadline, _, job = heapq.heappop(self._heap)
+                    if job.status != QUEUED:
+                        continue
+                    if deadline < now:
+                        self._queued -= 1
+                        self.counts[EXPIRED] += 1
+                        job._set(EXPIRED, error=EXPIRED_ERROR)
+                        continue
+                    batch = [job]
+                    kept = []
+                    for entry in self._heap:
+                        other = entry[3]
+                        if (
+                            len(batch) < self.max_batch and other.status == QUEUED
+                            and other.disease is job.disease and other.deadline >= now
+                        ):
+                            batch.append(other)
+                        else:
+                            kept.append(entry)
+                    if len(batch) > 1:
+                        heapq.heapify(kept)
+                        self._heap = kept
+                    self._queued -= len(batch)
+                    self._running += len(batch)
+                    self.counts['batches'] += 1
+                    for member in batch:
+                        member.batch_size = len(batch)
+                        member._set(RUNNING)
+                    return batch
+                self._ready.wait()
+
+    def _work(self):
+        while True:
+            batch = self._next_batch()
+            try:
+                reply, error, status = self.generate(batch[0].disease), None, DONE
+            except Exception as e:
+                reply, error, status = None, str(e), FAILED
+            with self._lock:
+                self._running -= len(batch)
+                self.counts[status] += len(batch)
+            for job in batch:
+                job._set(status, reply, error)
+
+
+_default_scheduler: Optional[GenerationScheduler] = None
+_default_scheduler_lock = threading.Lock()
+
+
+def get_generation_scheduler() -> GenerationScheduler:
+    """Returns the process-wide scheduler, creating it (and its workers) on first use."""
+    global _default_scheduler
+    with _default_scheduler_lock:
+        if _default_scheduler is None:
+            from disease_misinformation import summarize_and_verify
+            _default_scheduler = GenerationScheduler(
+                lambda disease: summarize_and_verify(disease.vector, disease.matcher)
+            )
+            _default_scheduler.start()
+        return _default_scheduler
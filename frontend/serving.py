@@ -0,0 +1,119 @@
+# serving.py
+# Production serving mode for app.py: gunicorn threaded workers and generation backpressure
+#
+# Usage: python serving.py [--host 0.0.0.0] [--port 8000] [--workers 1] [--threads 32]
+#    or: gunicorn -k gthread --threads 32 -b 0.0.0.0:8000 app:app
+#
+# Requires the async extra and gunicorn (pip install "Flask[async]" gunicorn).
+# Reply generation is an async view that waits, with a deadline, for the
+# generation scheduler or streams from the pooled Ollama client. At most
+# GENERATION_MAX_IN_FLIGHT such requests run per process; beyond that the API
+# answers 503 with a Retry-After header instead of queueing without bound.
+
+import argparse
+import os
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+MAX_IN_FLIGHT = int(os.environ.get("GENERATION_MAX_IN_FLIGHT", 8))
+GENERATION_TIMEOUT = float(os.environ.get("GENERATION_TIMEOUT", 60))
+RETRY_AFTER = int(os.environ.get("GENERATION_RETRY_AFTER", 2))
+
+
+class Saturated(Exception):
+    """Raised when every generation slot is taken."""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Too many generations in flight, retry later")
+        self.retry_after = retry_after
+
+
+class GenerationLimiter:
+    """Non-blocking cap on concurrent generations.
+
+    Flask runs each async view in its own event loop, so the count is kept
+    under a thread lock rather than an asyncio.Semaphore. ``acquire`` never
+    waits: a full limiter raises Saturated so the caller can shed load.
+    """
+
+    def __init__(self, max_in_flight: int = MAX_IN_FLIGHT, retry_after: int = RETRY_AFTER):
+        self.max_in_flight = max_in_flight
+        self.retry_after = retry_after
+        self.in_flight = 0
+        self.admitted = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            if self.in_flight >= self.max_in_flight:
+                self.rejected += 1
+                raise Saturated(self.retry_after)
+            self.in_flight += 1
+            self.admitted += 1
+
+    def release(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        """Holds a generation slot for the enclosed block."""
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "in_flight": self.in_flight,
+                "max_in_flight": self.max_in_flight,
+                "admitted": self.admitted,
+                "rejected": self.rejected
+            }
+
+
+_default_limiter: Optional[GenerationLimiter] = None
+_default_limiter_lock = threading.Lock()
+
+
+def get_generation_limiter() -> GenerationLimiter:
+    """Returns the process-wide generation limiter, creating it on first use."""
+    global _default_limiter
+    with _default_limiter_lock:
+        if _default_limiter is None:
+            _default_limiter = GenerationLimiter()
+        return _default_limiter
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the analysis API with gunicorn.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=1, help="worker processes")
+    parser.add_argument("--threads", type=int, default=32, help="request threads per worker")
+    parser.add_argument("--timeout", type=int, default=int(GENERATION_TIMEOUT) + 30, help="worker timeout (s)")
+    args = parser.parse_args(argv)
+
+    from gunicorn.app.base import BaseApplication
+
+    class Server(BaseApplication):
+        def load_config(self):
+            self.cfg.set("bind", f"{args.host}:{args.port}")
+            self.cfg.set("workers", args.workers)
+            self.cfg.set("worker_class", "gthread")
+            self.cfg.set("threads", args.threads)
+            self.cfg.set("timeout", args.timeout)
+
+        def load(self):
+            from app import app
+            return app
+
+    Server().run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,442 @@
+# snapshot.py
+# Precompiled, memory-mapped startup snapshot that every worker attaches to
+#
+# Usage: python snapshot.py build [-o data/startup.snapshot]
+#    or: python snapshot.py info [path]
+#
+# ``build`` does once what every worker would otherwise do on demand from
+# JSON, CSV and pandas: it compiles the known diseases and their fact-check
+# matchers, embeds (and for large corpora clusters) the known false claims,
+# and reads the species symptom matrix and its vocabulary, the airport
+# coordinates, the flight graph and the airport risk scores the incremental
+# scorer starts from. Each part is included when its sources exist.
+#
+# File layout: MAGIC, uint32 format, uint32 header length, a JSON header,
+# then every section at a 64-byte aligned offset. Arrays are raw
+# little-endian data that ``Snapshot`` exposes as read-only NumPy views of
+# one mmap, so all workers on a host share the same page-cache pages
+# instead of each holding a copy. Only the arrays are shared this way: the
+# compiled matchers, disease records and claim texts are small pickled
+# objects, and every worker unpickles its own copy of them.
+#
+# The header records a content version (hash of every section), the size
+# and mtime of each source, the files each source pattern matched (the
+# flight CSVs or the flight store's partitions), and a hash of the code that built the sections
+# and defines the pickled classes. A snapshot in another format, built from
+# sources that have changed, appeared or disappeared since, or built by different code is ignored,
+# and the app builds on demand as before. ``build`` replaces the file
+# atomically, so running workers keep their mapping of the old one.
+
+import argparse
+import glob
+import hashlib
+import json
+import mmap
+import os
+import pickle
+import struct
+import sys
+import threading
+import time
+import warnings
+from typing import Dict, List, Optional
+
+import numpy as np
+
+SNAPSHOT_PATH = os.environ.get(
+    "SNAPSHOT_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "startup.snapshot")
+)
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+BACKEND_DIR = os.path.join(ROOT_DIR, "backend")
+
+# Modules that compute the sections or define the pickled classes; a snapshot
+# built by other versions of them is not used
+CODE_FILES = tuple(os.path.join(ROOT_DIR, *parts) for parts in (
+    ("frontend", "snapshot.py"),
+    ("frontend", "disease_registry.py"),
+    ("frontend", "disease_misinformation.py"),
+    ("frontend", "claim_index.py"),
+    ("social agent", "fact_matcher.py"),
+    ("backend", "symptom_matrix.py"),
+    ("backend", "epidemic_sim.py"),
+    ("backend", "flight_risk.py"),
+    ("backend", "flight_store.py"),
+    ("backend", "incremental_risk.py")
+))
+
+MAGIC = b"AGISNAP\0"
+FORMAT_VERSION = 2
+ALIGNMENT = 64
+_PREAMBLE = struct.Struct("<8sII")
+
+
+class SnapshotError(Exception):
+    """Raised for a file that is not a usable snapshot."""
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def code_version(paths=CODE_FILES) -> str:
+    """Hash of the snapshot's code modules, as recorded in the header."""
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(os.path.relpath(path, ROOT_DIR).encode("utf-8"))
+        try:
+            with open(path, "rb") as f:
+                digest.update(f.read())
+        except OSError:
+            digest.update(b"\0missing")
+    return digest.hexdigest()[:16]
+
+
+def _json_float(value) -> Optional[float]:
+    value = float(value)
+    return None if np.isnan(value) else value
+
+
+def _source_stat(path: str) -> List[int]:
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def _source_set(pattern: str) -> List[str]:
+    return sorted(os.path.abspath(path) for path in glob.glob(pattern, recursive=True))
+
+
+class SnapshotWriter:
+    """Collects sections and writes them as one snapshot file."""
+
+    def __init__(self):
+        self._sections: List[tuple] = []   # (kind, name, spec, bytes)
+        self.sources: Dict[str, List[int]] = {}
+        self.source_sets: Dict[str, List[str]] = {}
+        self.meta: Dict[str, object] = {}
+
+    def add_array(self, name: str, array: np.ndarray):
+        array = np.ascontiguousarray(array)
+        array = array.astype(array.dtype.newbyteorder("<"), copy=False)
+        self._sections.append((
+            "arrays", name, {"dtype": array.dtype.str, "shape": list(array.shape)}, array.tobytes()
+        ))
+
+    def add_strings(self, name: str, values: List[str]):
+        """Stores a list of strings without newlines as one UTF-8 array."""
+        self.add_array(name, np.frombuffer("\n".join(values).encode("utf-8"), dtype=np.uint8))
+        self.meta[f"{name}.count"] = len(values)
+
+    def add_object(self, name: str, value):
+        self._sections.append(("objects", name, {}, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)))
+
+    def add_source(self, path: str):
+        self.sources[os.path.abspath(path)] = _source_stat(path)
+
+    def add_source_set(self, pattern: str):
+        """Records every file matching a glob as a source, and the set itself."""
+        paths = _source_set(pattern)
+        self.source_sets[os.path.abspath(pattern)] = paths
+        for path in paths:
+            self.add_source(path)
+
+    def write(self, path: str) -> Dict[str, object]:
+        """Writes the file atomically and returns its header."""
+        digest = hashlib.sha256()
+        header = {
+            "format": FORMAT_VERSION, "built": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "code": code_version(), "sources": self.sources,
+            "source_sets": self.source_sets, "meta": self.meta, "arrays": {}, "objects": {}
+        }
+        offset = 0
+        for kind, name, spec, data in self._sections:
+            offset = _aligned(offset)
+            header[kind][name] = {**spec, "offset": offset, "length": len(data)}
+            digest.update(name.encode("utf-8"))
+            digest.update(data)
+            offset += len(data)
+        header["version"] = digest.hexdigest()[:16]
+
+        encoded = json.dumps(header).encode("utf-8")
+        base = _aligned(_PREAMBLE.size + len(encoded))
+        temporary = f"{path}.tmp{os.getpid()}"
+        with open(temporary, "wb") as f:
+            f.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(encoded)))
+            f.write(encoded)
+            for kind, name, spec, data in self._sections:
+                f.seek(base + header[kind][name]["offset"])
+                f.write(data)
+        os.replace(temporary, path)
+        return header
+
+
+class Snapshot:
+    """Read-only view of a snapshot file; arrays are views of one shared mapping."""
+
+    def __init__(self, path: str = SNAPSHOT_PATH):
+        with open(path, "rb") as f:
+            try:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError as e:
+                raise SnapshotError(f"{path} is empty") from e
+        if len(self._map) < _PREAMBLE.size:
+            raise SnapshotError(f"{path} is truncated")
+        magic, version, header_length = _PREAMBLE.unpack_from(self._map)
+        if magic != MAGIC:
+            raise SnapshotError(f"{path} is not a snapshot")
+        if version != FORMAT_VERSION:
+            raise SnapshotError(f"{path} has format {version}, expected {FORMAT_VERSION}; rebuild it")
+
+        self.path = path
+        self.header = json.loads(self._map[_PREAMBLE.size:_PREAMBLE.size + header_length])
+        self.version: str = self.header["version"]
+        self._base = _aligned(_PREAMBLE.size + header_length)
+
+    def __contains__(self, name) -> bool:
+        return name in self.header["arrays"] or name in self.header["objects"]
+
+    def code_changed(self) -> bool:
+        """Whether the code modules differ from the ones that built the snapshot."""
+        return self.header.get("code") != code_version()
+
+    def stale_sources(self) -> List[str]:
+        """Sources changed or gone, and source patterns now matching other files, since the build."""
+        stale = [
+            pattern for pattern, recorded in self.header["source_sets"].items()
+            if _source_set(pattern) != recorded
+        ]
+        for path, recorded in self.header["sources"].items():
+            try:
+                if _source_stat(path) != recorded:
+                    stale.append(path)
+            except OSError:
+                stale.append(path)
+        return stale
+
+    def array(self, name: str) -> np.ndarray:
+        """Zero-copy, read-only view of a stored array."""
+        spec = self.header["arrays"][name]
+        dtype = np.dtype(spec["dtype"])
+        if not spec["length"]:
+            # frombuffer rejects an offset at the very end of the mapping
+            return np.empty(spec["shape"], dtype=dtype)
+        return np.frombuffer(
+            self._map, dtype=dtype, count=spec["length"] // dtype.itemsize, offset=self._base + spec["offset"]
+        ).reshape(spec["shape"])
+
+    def strings(self, name: str) -> List[str]:
+        if not self.header["meta"][f"{name}.count"]:
+            return []
+        return self.array(name).tobytes().decode("utf-8").split("\n")
+
+    def object(self, name: str):
+        spec = self.header["objects"][name]
+        start = self._base + spec["offset"]
+        return pickle.loads(self._map[start:start + spec["length"]])
+
+    # Domain objects, rebuilt around the shared arrays
+
+    def disease_records(self) -> Optional[list]:
+        return self.object("diseases") if "diseases" in self else None
+
+    def symptom_matrix(self):
+        if "symptoms.indptr" not in self:
+            return None
+        from symptom_matrix import SymptomMatrix, SymptomVocabulary
+        return SymptomMatrix(
+            self.strings("symptoms.species"),
+            SymptomVocabulary(self.strings("symptoms.vocabulary")),
+            self.array("symptoms.indptr"),
+            self.array("symptoms.indices"),
+            self.array("symptoms.data")
+        )
+
+    def claim_index(self):
+        if "claims" not in self:
+            return None
+        from claim_index import ClaimIndex, HashingEmbedder
+        meta = self.header["meta"]
+        embedder = HashingEmbedder(meta["claims.dim"], tuple(meta["claims.ngrams"]))
+        embedder.idf = self.array("claims.idf")
+        index = ClaimIndex(self.object("claims"), embedder, vectors=self.array("claims.vectors"))
+        if "claims.ivf.centroids" in self:
+            index.centroids = self.array("claims.ivf.centroids")
+            index.list_offsets = self.array("claims.ivf.offsets")
+            index.list_rows = self.array("claims.ivf.rows")
+            index.list_vectors = self.array("claims.ivf.vectors")
+        return index
+
+    def flight_graph(self):
+        if "graph.indptr" not in self:
+            return None
+        from scipy import sparse
+        from epidemic_sim import FlightGraph
+        codes = self.strings("graph.codes")
+        flights = sparse.csr_matrix(
+            (self.array("graph.data"), self.array("graph.indices"), self.array("graph.indptr")),
+            shape=(len(codes), len(codes)), copy=False
+        )
+        return FlightGraph(codes, self.array("graph.lat"), self.array("graph.lon"), flights)
+
+    def airports_frame(self):
+        """Airport coordinates in the flight_risk.load_airports layout (imports pandas)."""
+        if "airports.lat" not in self:
+            return None
+        import pandas as pd
+        index = pd.Index(self.strings("airports.codes"), name="Airport-Code")
+        return pd.DataFrame({"lat": self.array("airports.lat"), "lon": self.array("airports.lon")}, index=index)
+
+    def risk_records(self) -> Optional[List[Dict[str, object]]]:
+        """Airport risk scores of the stored flights in the /api/airport-risk JSON shape."""
+        if "risk.score" not in self:
+            return None
+        destination = self.header["meta"]["risk.destination"]
+        return [
+            {
+                destination: code, "risk_cluster": int(cluster), "risk_score": _json_float(score),
+                "lat": _json_float(lat), "lon": _json_float(lon)
+            }
+            for code, cluster, score, lat, lon in zip(
+                self.strings("risk.airports"), self.array("risk.cluster"), self.array("risk.score"),
+                self.array("risk.lat"), self.array("risk.lon")
+            )
+        ]
+
+
+def build_snapshot(path: str = SNAPSHOT_PATH) -> Dict[str, object]:
+    """Compiles every available startup artifact into a snapshot at ``path``."""
+    if BACKEND_DIR not in sys.path:
+        sys.path.append(BACKEND_DIR)
+    from claim_index import CLAIMS_PATH, IVF_MIN_CLAIMS, ClaimIndex
+    from disease_registry import DISEASES_PATH, SYMPTOM_MATRIX_PATH, DiseaseRegistry
+
+    writer = SnapshotWriter()
+
+    if os.path.exists(DISEASES_PATH):
+        registry = DiseaseRegistry()
+        registry.load(DISEASES_PATH)
+        writer.add_object("diseases", registry.known())
+        writer.add_source(DISEASES_PATH)
+
+    if os.path.exists(SYMPTOM_MATRIX_PATH):
+        from symptom_matrix import SymptomMatrix
+        matrix = SymptomMatrix.load(SYMPTOM_MATRIX_PATH)
+        writer.add_strings("symptoms.species", matrix.species)
+        writer.add_strings("symptoms.vocabulary", matrix.vocabulary.names)
+        writer.add_array("symptoms.indptr", matrix.indptr)
+        writer.add_array("symptoms.indices", matrix.indices)
+        writer.add_array("symptoms.data", matrix.data)
+        writer.add_source(SYMPTOM_MATRIX_PATH)
+
+    if os.path.exists(CLAIMS_PATH):
+        index = ClaimIndex.load(CLAIMS_PATH)
+        writer.add_object("claims", index.claims)
+        writer.add_array("claims.vectors", index.vectors)
+        writer.add_array("claims.idf", index.embedder.idf)
+        writer.meta["claims.dim"] = index.embedder.dim
+        writer.meta["claims.ngrams"] = list(index.embedder.ngrams)
+        if len(index) >= IVF_MIN_CLAIMS:
+            index.build_ivf()
+            writer.add_array("claims.ivf.centroids", index.centroids)
+            writer.add_array("claims.ivf.offsets", index.list_offsets)
+            writer.add_array("claims.ivf.rows", index.list_rows)
+            writer.add_array("claims.ivf.vectors", index.list_vectors)
+        writer.add_source(CLAIMS_PATH)
+
+    import flight_store
+    from flight_risk import AIRPORTS_PATH, DESTINATION, FLIGHTS_DIR, load_aggregates, load_airports
+    if os.path.exists(AIRPORTS_PATH):
+        airports = load_airports(AIRPORTS_PATH)
+        writer.add_strings("airports.codes", airports.index.tolist())
+        writer.add_array("airports.lat", airports["lat"].to_numpy(dtype="float64"))
+        writer.add_array("airports.lon", airports["lon"].to_numpy(dtype="float64"))
+        writer.add_source(AIRPORTS_PATH)
+
+        from epidemic_sim import load_flight_graph
+        from incremental_risk import IncrementalRiskScorer
+        try:
+            graph = load_flight_graph()
+            # What the first GET /api/airport-risk would compute from the stored flights
+            risk = IncrementalRiskScorer.from_aggregates(load_aggregates(), airports=airports).snapshot()
+        except (FileNotFoundError, ValueError):
+            graph = None
+        if graph is not None:
+            flights = graph.flights.tocsr()
+            writer.add_strings("graph.codes", graph.codes)
+            writer.add_array("graph.lat", np.asarray(graph.lat, dtype="float64"))
+            writer.add_array("graph.lon", np.asarray(graph.lon, dtype="float64"))
+            writer.add_array("graph.indptr", flights.indptr)
+            writer.add_array("graph.indices", flights.indices)
+            writer.add_array("graph.data", flights.data)
+            writer.add_strings("risk.airports", risk[DESTINATION].tolist())
+            writer.add_array("risk.cluster", risk["risk_cluster"].to_numpy(dtype="int32"))
+            writer.add_array("risk.score", risk["risk_score"].to_numpy(dtype="float64"))
+            writer.add_array("risk.lat", risk["lat"].to_numpy(dtype="float64"))
+            writer.add_array("risk.lon", risk["lon"].to_numpy(dtype="float64"))
+            writer.meta["risk.destination"] = DESTINATION
+            # The flights come from the store once anything is ingested, else
+            # from the CSVs; partitions appearing switches over, so the store
+            # is recorded either way
+            writer.add_source_set(os.path.join(flight_store.STORE_DIR, "**", "*.arrow"))
+            if not flight_store.store_exists():
+                writer.add_source_set(os.path.join(FLIGHTS_DIR, "*_*.csv"))
+
+    return writer.write(path)
+
+
+_default_snapshot: Optional[Snapshot] = None
+_default_snapshot_loaded = False
+_default_snapshot_lock = threading.Lock()
+
+
+def get_snapshot() -> Optional[Snapshot]:
+    """Returns the process-wide snapshot, attaching on first use; None if there is no usable one."""
+    global _default_snapshot, _default_snapshot_loaded
+    with _default_snapshot_lock:
+        if not _default_snapshot_loaded:
+            _default_snapshot_loaded = True
+            if os.path.exists(SNAPSHOT_PATH):
+                try:
+                    snapshot = Snapshot(SNAPSHOT_PATH)
+                except SnapshotError as e:
+                    warnings.warn(f"Ignoring startup snapshot: {e}")
+                else:
+                    stale = snapshot.stale_sources()
+                    if stale:
+                        warnings.warn(f"Ignoring startup snapshot {SNAPSHOT_PATH}: {stale[0]} changed since it was built")
+                    elif snapshot.code_changed():
+                        warnings.warn(f"Ignoring startup snapshot {SNAPSHOT_PATH}: built by a different version of the code")
+                    else:
+                        _default_snapshot = snapshot
+        return _default_snapshot
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or inspect the startup snapshot.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="compile the startup artifacts into a snapshot")
+    build.add_argument("-o", "--output", default=SNAPSHOT_PATH, help="snapshot file to write")
+    info = commands.add_parser("info", help="describe a snapshot")
+    info.add_argument("path", nargs="?", default=SNAPSHOT_PATH)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        start = time.perf_counter()
+        header = build_snapshot(args.output)
+        sections = sorted(header["arrays"]) + sorted(header["objects"])
+        print(f"Wrote {args.output} (version {header['version']}) in {time.perf_counter() - start:.2f}s")
+        print(f"{len(sections)} sections: {', '.join(sections)}")
+    else:
+        snapshot = Snapshot(args.path)
+        print(f"{args.path}: format {FORMAT_VERSION}, version {snapshot.version}, built {snapshot.header['built']}")
+        for kind in ("arrays", "objects"):
+            for name, spec in sorted(snapshot.header[kind].items()):
+                shape = f" {spec['dtype']}{spec['shape']}" if kind == "arrays" else ""
+                print(f"  {name:24s} {spec['length']:>12} B{shape}")
+        stale = snapshot.stale_sources()
+        print(f"stale sources: {', '.join(stale)}" if stale else "sources unchanged")
+        print("built by different code" if snapshot.code_changed() else "code unchanged")
+
+
+if __name__ == "__main__":
+    main()
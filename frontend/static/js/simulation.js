@@ -1,21 +1,18 @@
-// Sample US Airport Data (Latitude, Longitude, Name)
-const airports = [
-    { lat: 34.0522, lng: -118.2437, name: 'LAX', city: 'Los Angeles' },
-    { lat: 40.7128, lng: -74.0060, name: 'JFK', city: 'New York' },
-    { lat: 41.8781, lng: -87.6298, name: 'ORD', city: 'Chicago' },
-    { lat: 29.7604, lng: -95.3698, name: 'IAH', city: 'Houston' },
-    { lat: 33.4484, lng: -112.0740, name: 'PHX', city: 'Phoenix' },
-    { lat: 39.9526, lng: -75.1652, name: 'PHL', city: 'Philadelphia' },
-    { lat: 29.4241, lng: -98.4936, name: 'SAT', city: 'San Antonio' },
-    { lat: 32.7767, lng: -96.7970, name: 'DFW', city: 'Dallas' },
-    { lat: 37.7749, lng: -122.4194, name: 'SFO', city: 'San Francisco' },
-    { lat: 39.7392, lng: -104.9903, name: 'DEN', city: 'Denver' },
-    { lat: 47.6062, lng: -122.3321, name: 'SEA', city: 'Seattle' },
-    { lat: 38.9072, lng: -77.0369, name: 'DCA', city: 'Washington D.C.' },
-    { lat: 42.3601, lng: -71.0589, name: 'BOS', city: 'Boston' },
-    { lat: 33.7490, lng: -84.3880, name: 'ATL', city: 'Atlanta' },
-    { lat: 25.7617, lng: -80.1918, name: 'MIA', city: 'Miami' },
-];
+// Airports and the spread, streamed as binary frames from /api/simulation/frames
+let airports = [];
+let simulation = null;      // pending or finished load of the current run
+let totalSteps = 0;
+let deltaFrames = [];
+let streamDone = false;
+let streamId = 0;
+let pointsData = [];
+
+// Frame types; the layout is documented in backend/globe_frames.py
+const FRAME_KEY = 0;
+const FRAME_DELTA = 1;
+
+// Milliseconds between simulated days during playback
+const STEP_INTERVAL_MS = 250;
 
 let arcsData = [];
 let affectedLocations = [];
@@ -31,7 +28,9 @@ const closeDashboardButton = document.querySelector('.close-dashboard');
 
 let simulationIntervalId = null;
 let currentAirport = null; 
-let currentIndex = -1;   
+let activeIndex = -1;
+let styledActiveIndex = -1;
+let currentStep = 0;
 let simulationRunning = false;
 let simulationPaused = false;
 
@@ -40,10 +39,10 @@ const myGlobe = Globe()
     (document.getElementById('globeViz'))
     .globeImageUrl('//unpkg.com/three-globe/example/img/earth-night.jpg')
     .backgroundImageUrl('//unpkg.com/three-globe/example/img/night-sky.png')
-    .pointsData(airports)
+    .pointsData(pointsData)
     .pointAltitude('size')
     .pointColor('color')
-    .pointLabel(d => `${d.name} (${d.city})`)
+    .pointLabel(d => d.name)
     .pointRadius(0.15) 
     .arcsData(arcsData)
     .arcColor('color')
@@ -63,28 +62,130 @@ myGlobe.pointOfView({ lat: 39.6, lng: -98.5, altitude: 1.5 });
 
 // --- Simulation Control Functions ---
 
-function startSimulation() {
+async function startSimulation() {
     if (simulationRunning) return; 
 
     console.log("Starting simulation...");
     resetSimulationState(); 
 
+    if (!simulation) {
+        simulation = loadSimulation();
+    }
+    try {
+        await simulation;
+    } catch (error) {
+        console.error('Error loading simulation:', error);
+        simulation = null;
+        return;
+    }
     if (airports.length === 0) return;
 
-    // Initial state
-    currentIndex = 0;
-    currentAirport = airports[currentIndex];
-    affectedLocations.push(currentAirport);
-    addAffectedToList(currentAirport);
-    updateGlobePoints();
+    // Initial state: the outbreak origins
+    showArrivals(deltaFrames[0]);
+    updateGlobePoints(deltaFrames[0]);
     updateAffectedCount();
 
     simulationRunning = true;
     simulationPaused = false;
     updateButtonStates();
 
-    runSimulationStep(); 
-    simulationIntervalId = setInterval(runSimulationStep, 3000); 
+    simulationIntervalId = setInterval(runSimulationStep, STEP_INTERVAL_MS); 
+}
+
+function loadSimulation() {
+    // Resolves once the origins (step 0) are in; later steps keep streaming during playback
+    const id = ++streamId;
+    deltaFrames = [];
+    streamDone = false;
+
+    return new Promise((resolve, reject) => {
+        fetch('/api/simulation/frames', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({})
+        })
+        .then(async response => {
+            if (!response.ok) {
+                const data = await response.json();
+                throw new Error(data.error || `HTTP ${response.status}`);
+            }
+            await readFrames(response, frame => {
+                // Frames of a stream that a reset replaced are dropped
+                if (id !== streamId) return;
+                if (frame.type === FRAME_KEY) {
+                    applyKeyframe(frame);
+                } else {
+                    deltaFrames.push(frame);
+                    if (frame.step === 0) resolve();
+                }
+            });
+        })
+        .catch(reject)
+        .finally(() => {
+            if (id === streamId) streamDone = true;
+            resolve();
+        });
+    });
+}
+
+async function readFrames(response, onFrame) {
+    // Frames are a little-endian uint32 length and a body; chunks may split them anywhere
+    const reader = response.body.getReader();
+    let pending = new Uint8Array(0);
+
+    while (true) {
+        const { done, value } = await reader.read();
+        if (done) return;
+
+        const bytes = new Uint8Array(pending.length + value.length);
+        bytes.set(pending);
+        bytes.set(value, pending.length);
+
+        let offset = 0;
+        while (bytes.length - offset >= 4) {
+            const length = new DataView(bytes.buffer, offset, 4).getUint32(0, true);
+            if (bytes.length - offset - 4 < length) break;
+            // Copy the body into its own buffer so typed arrays start aligned
+            onFrame(decodeFrame(bytes.slice(offset + 4, offset + 4 + length).buffer));
+            offset += 4 + length;
+        }
+        pending = bytes.subarray(offset);
+    }
+}
+
+function decodeFrame(buffer) {
+    // Typed arrays read in platform byte order, which is little-endian in every browser
+    const header = new Uint32Array(buffer, 0, 4);
+    let offset = 16;
+
+    if (header[0] === FRAME_KEY) {
+        const n = header[1];
+        const lat = new Float32Array(buffer, offset, n);
+        const lng = new Float32Array(buffer, offset + 4 * n, n);
+        const nameBytes = new Uint8Array(buffer, offset + 8 * n, header[3]);
+        const names = new TextDecoder().decode(nameBytes).replace(/\0+$/, '').split('\n');
+        return { type: FRAME_KEY, steps: header[2], lat: lat, lng: lng, names: names };
+    }
+
+    const reachedCount = header[2];
+    const changedCount = header[3];
+    const reached = new Uint32Array(buffer, offset, reachedCount);
+    offset += 4 * reachedCount;
+    const source = new Int32Array(buffer, offset, reachedCount);
+    offset += 4 * reachedCount;
+    const changed = new Uint32Array(buffer, offset, changedCount);
+    offset += 4 * changedCount;
+    const levels = new Uint8Array(buffer, offset, changedCount);
+    return { type: FRAME_DELTA, step: header[1], reached: reached, source: source, changed: changed, levels: levels };
+}
+
+function applyKeyframe(frame) {
+    totalSteps = frame.steps;
+    airports = frame.names.map((name, index) => ({ name: name, lat: frame.lat[index], lng: frame.lng[index] }));
+    pointsData = airports.map(apt => ({ ...apt, affected: false, level: 0 }));
+    activeIndex = -1;
+    updateGlobePoints();
+    updateAffectedCount();
 }
 
 function pauseSimulation() {
@@ -103,13 +204,15 @@ function resumeSimulation() {
     console.log("Simulation resumed.");
     simulationPaused = false;
     updateButtonStates();
-    simulationIntervalId = setInterval(runSimulationStep, 3000); 
+    simulationIntervalId = setInterval(runSimulationStep, STEP_INTERVAL_MS); 
 }
 
 function resetSimulation() {
     console.log("Simulation reset.");
     pauseSimulation(); 
     resetSimulationState();
+    // Drop the finished run so the next start draws a fresh realization
+    simulation = null;
     updateGlobePoints(); 
     myGlobe.arcsData(arcsData); 
     affectedListElement.innerHTML = ''; 
@@ -125,7 +228,12 @@ function resetSimulationState() {
     arcsData = [];
     affectedLocations = [];
     currentAirport = null;
-    currentIndex = -1;
+    activeIndex = -1;
+    currentStep = 0;
+    pointsData.forEach(point => {
+        point.affected = false;
+        point.level = 0;
+    });
     if (simulationIntervalId) {
         clearInterval(simulationIntervalId);
         simulationIntervalId = null;
@@ -133,7 +241,7 @@ function resetSimulationState() {
 }
 
 function runSimulationStep() {
-    if (affectedLocations.length >= airports.length) {
+    if (currentStep >= totalSteps || affectedLocations.length >= airports.length) {
         console.log("Simulation complete.");
         pauseSimulation(); 
         simulationRunning = false; 
@@ -141,52 +249,61 @@ function runSimulationStep() {
         return;
     }
 
-    // Find the next *unaffected* airport
-    let nextAirport = null;
-    let nextIndex = (currentIndex + 1) % airports.length;
-    let initialNextIndex = nextIndex; 
-
-    while (affectedLocations.some(a => a.name === airports[nextIndex].name)) {
-        nextIndex = (nextIndex + 1) % airports.length;
-        // Safety break if all are somehow affected
-        if (nextIndex === initialNextIndex) {
-             console.error("Error finding next unaffected airport - looped back.");
-             pauseSimulation();
-             simulationRunning = false;
-             updateButtonStates();
-             return;
+    // Playback can catch up with the stream; wait for the next frame unless it has ended
+    if (currentStep + 1 >= deltaFrames.length) {
+        if (streamDone) {
+            console.log("Simulation stream ended.");
+            pauseSimulation();
+            simulationRunning = false;
+            updateButtonStates();
         }
+        return;
     }
-    nextAirport = airports[nextIndex];
-
-    // Add arc from current to next
-    arcsData.push({
-        startLat: currentAirport.lat,
-        startLng: currentAirport.lng,
-        endLat: nextAirport.lat,
-        endLng: nextAirport.lng,
-        color: 'yellow' 
-    });
 
-    // Add next airport to affected list
-    affectedLocations.push(nextAirport);
-    addAffectedToList(nextAirport);
-    updateAffectedCount();
+    currentStep += 1;
+    const frame = deltaFrames[currentStep];
+    const arrivals = showArrivals(frame);
 
-    // Update globe data
-    updateGlobePoints();
+    // Update globe data in place, touching only what this step changed
+    updateGlobePoints(frame);
+    if (arrivals.length === 0) return;
+
+    updateAffectedCount();
     myGlobe.arcsData(arcsData);
 
-    // Animate to the new airport view
+    // Animate to the latest airport reached
     myGlobe.pointOfView({ 
-        lat: nextAirport.lat, 
-        lng: nextAirport.lng, 
+        lat: currentAirport.lat, 
+        lng: currentAirport.lng, 
         altitude: 1.2 
     }, 1000);
+}
 
-    // Move to the next airport for the next iteration
-    currentAirport = nextAirport;
-    currentIndex = nextIndex;
+function showArrivals(frame) {
+    const arrivals = frame ? Array.from(frame.reached) : [];
+
+    arrivals.forEach((index, i) => {
+        const airport = airports[index];
+        const source = frame.source[i];
+
+        // Add arc from the airport that seeded this one
+        if (source >= 0) {
+            arcsData.push({
+                startLat: airports[source].lat,
+                startLng: airports[source].lng,
+                endLat: airport.lat,
+                endLng: airport.lng,
+                color: 'yellow' 
+            });
+        }
+
+        pointsData[index].affected = true;
+        affectedLocations.push(airport);
+        addAffectedToList(airport, frame.step);
+        currentAirport = airport;
+        activeIndex = index;
+    });
+    return arrivals;
 }
 
 function updateButtonStates() {
@@ -196,9 +313,9 @@ function updateButtonStates() {
     resetButton.style.display = (simulationRunning || simulationPaused) ? 'block' : 'none'; 
 }
 
-function addAffectedToList(airport) {
+function addAffectedToList(airport, day) {
     const listItem = document.createElement('li');
-    listItem.textContent = `${airport.name} (${airport.city})`;
+    listItem.textContent = `${airport.name} (day ${day})`;
     affectedListElement.appendChild(listItem);
     
     // Auto scroll to bottom
@@ -209,7 +326,7 @@ function updateAffectedCount() {
     affectedCountElement.textContent = `${affectedLocations.length}/${airports.length}`;
     
     // Update visual indicator (red color) based on percentage affected
-    const percentAffected = (affectedLocations.length / airports.length) * 100;
+    const percentAffected = airports.length ? (affectedLocations.length / airports.length) * 100 : 0;
     if (percentAffected > 75) {
         affectedCountElement.style.backgroundColor = 'rgba(255, 50, 50, 0.6)';
     } else if (percentAffected > 50) {
@@ -221,22 +338,32 @@ function updateAffectedCount() {
     }
 }
 
-function updateGlobePoints() {
-    const updatedPoints = airports.map(apt => {
-        // Check if this airport is affected
-        const isAffected = affectedLocations.some(a => a.name === apt.name);
-        
-        // Check if this is the currently active airport
-        const isActive = currentAirport && apt.name === currentAirport.name;
-        
-        return {
-            ...apt,
-            size: isAffected ? (isActive ? 0.15 : 0.08) : 0.01, 
-            color: isAffected ? (isActive ? '#ff5555' : '#ff8888') : '#ffff88'
-        };
-    });
-    
-    myGlobe.pointsData(updatedPoints);
+function stylePoint(point, isActive) {
+    // Taller points for more infectious people; the level grows by one as the count doubles
+    point.size = point.affected ? Math.max(isActive ? 0.15 : 0.08, 0.01 * point.level) : 0.01;
+    point.color = point.affected ? (isActive ? '#ff5555' : '#ff8888') : '#ffff88';
+}
+
+function updateGlobePoints(frame) {
+    if (frame) {
+        frame.changed.forEach((index, i) => { pointsData[index].level = frame.levels[i]; });
+    }
+
+    // Every point is restyled without a frame or when playback (re)starts; otherwise
+    // only the airports the frame touched and the previously active one
+    let touched;
+    if (frame && frame.step > 0) {
+        touched = Array.from(frame.changed).concat(Array.from(frame.reached));
+        if (styledActiveIndex >= 0) touched.push(styledActiveIndex);
+    } else {
+        touched = pointsData.map((_, index) => index);
+    }
+
+    touched.forEach(index => stylePoint(pointsData[index], index === activeIndex));
+    styledActiveIndex = activeIndex;
+
+    // The same objects are passed back, so the globe updates them rather than rebuilding
+    myGlobe.pointsData(pointsData);
 }
 
 // --- Event Listeners ---
@@ -284,6 +411,8 @@ window.addEventListener('resize', () => {
 });
 
 // --- Initial Setup ---
+simulation = loadSimulation();
+simulation.catch(error => console.error('Error loading simulation:', error));
 updateGlobePoints(); 
 updateButtonStates(); 
 updateAffectedCount();
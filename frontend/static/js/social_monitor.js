@@ -26,6 +26,13 @@ const diseasesData = {
     'post-3': "COVID-19 is a respiratory disease that commonly causes fever, cough, fatigue, shortness of breath, and loss of taste or smell. It emerged from Asia and Europe and has spread globally. Most people recover within a few weeks, but some experience long-term effects. Stay informed and follow health guidelines."
   };
   
+  // Followers reached by each post; wider-reaching posts are answered first
+  const postReach = {
+    'post-1': 250000,
+    'post-2': 12000,
+    'post-3': 800
+  };
+  
   const generatedReplies = {
     'post-1': "Hi there! I wanted to share some information about COVID-19. The disease is actually called COVID-19 rather than Corona-20, and research shows it emerged primarily from regions in Asia and Europe. The main symptoms typically include fever, cough, fatigue, shortness of breath, and loss of taste or smell rather than seizures or rash. Also, it has affected populations globally, not just in Australia and Europe. Hope this helps clarify things!",
     
@@ -172,43 +179,186 @@ const diseasesData = {
     
     const targetPostId = postId || selectedPostId;
     showLoading();
+    updateAnalysisPanel(targetPostId);
     
-    // In a real implementation, this would make an AJAX call to the backend API
-    // For demonstration, we'll use the sample data with a simulated delay
-    
-    // Sample API call (commented out):
-    // fetch('/api/generate-reply', {
-    //   method: 'POST',
-    //   headers: {
-    //     'Content-Type': 'application/json'
-    //   },
-    //   body: JSON.stringify({
-    //     post_text: postContents[targetPostId],
-    //     disease: diseasesData[targetPostId].disease,
-    //     symptoms: diseasesData[targetPostId].symptoms,
-    //     origins: diseasesData[targetPostId].origins,
-    //     affected: diseasesData[targetPostId].affected
-    //   })
-    // })
-    // .then(response => response.json())
-    // .then(data => {
-    //   // Process data and update UI
-    //   hideLoading();
-    // })
-    // .catch(error => {
-    //   console.error('Error:', error);
-    //   hideLoading();
-    //   alert('An error occurred while generating a reply');
-    // });
+    // Queue the reply behind posts with more reach, then follow the job until it is done
+    queueReply({
+      post_text: postContents[targetPostId],
+      disease: diseasesData[targetPostId].disease,
+      symptoms: diseasesData[targetPostId].symptoms,
+      origins: diseasesData[targetPostId].origins,
+      affected: diseasesData[targetPostId].affected,
+      reach: postReach[targetPostId]
+    });
+  }
+  
+  function showReply(text) {
+    hideLoading();
+    document.getElementById('reply-content').textContent = text;
+    document.querySelector('.generated-reply').scrollIntoView({ behavior: 'smooth' });
+  }
+  
+  function handleJobStatus(job) {
+    if (job.status === 'done') {
+      showReply(job.reply);
+      return true;
+    }
+    if (job.status === 'failed' || job.status === 'expired') {
+      throw new Error(job.error || 'Reply job ' + job.status);
+    }
+    return false;
+  }
+  
+  function pollReplyJob(statusUrl) {
+    return fetch(statusUrl)
+      .then(response => response.json())
+      .then(job => {
+        if (!handleJobStatus(job)) {
+          return new Promise(resolve => setTimeout(resolve, 1000)).then(() => pollReplyJob(statusUrl));
+        }
+      });
+  }
+  
+  function followReplyJob(job) {
+    // Subscribe to status events where supported, otherwise poll
+    if (!window.EventSource) {
+      return pollReplyJob(job.status_url);
+    }
+    return new Promise((resolve, reject) => {
+      const source = new EventSource(job.events_url);
+      source.addEventListener('status', event => {
+        try {
+          if (handleJobStatus(JSON.parse(event.data))) {
+            source.close();
+            resolve();
+          }
+        } catch (error) {
+          source.close();
+          reject(error);
+        }
+      });
+      source.onerror = () => {
+        // The stream closes after the final status; fall back to polling if it broke earlier
+        source.close();
+        pollReplyJob(job.status_url).then(resolve, reject);
+      };
+    });
+  }
+  
+  function queueReply(payload) {
+    return fetch('/api/reply-jobs', {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json'
+      },
+      body: JSON.stringify(payload)
+    })
+    .then(response => {
+      if (response.status !== 202) {
+        throw new Error('Request failed with status ' + response.status);
+      }
+      return response.json();
+    })
+    .then(job => {
+      if (!handleJobStatus(job)) {
+        return followReplyJob(job);
+      }
+    })
+    .catch(error => {
+      console.error('Error:', error);
+      hideLoading();
+      alert('An error occurred while generating a reply');
+    });
+  }
+  
+  function parseServerSentEvent(block) {
+    let event = 'message';
+    const dataLines = [];
+    block.split('\n').forEach(line => {
+      if (line.startsWith('event:')) {
+        event = line.slice(6).trim();
+      } else if (line.startsWith('data:')) {
+        dataLines.push(line.slice(5).trim());
+      }
+    });
+    return { event: event, data: dataLines.length ? JSON.parse(dataLines.join('\n')) : {} };
+  }
+  
+  function streamReply(payload) {
+    const replyContent = document.getElementById('reply-content');
+    let started = false;
+    let inCorrection = false;
     
-    // Simulate API call delay
-    setTimeout(() => {
-      updateAnalysisPanel(targetPostId);
+    // Reveal the reply panel on the first token instead of after the whole reply
+    function startReply() {
+      if (started) {
+        return;
+      }
+      started = true;
+      replyContent.textContent = '';
       hideLoading();
-      
-      // Scroll to reply section
       document.querySelector('.generated-reply').scrollIntoView({ behavior: 'smooth' });
-    }, 1500);
+    }
+    
+    function handleEvent(message) {
+      startReply();
+      if (message.event === 'token') {
+        replyContent.appendChild(document.createTextNode(message.data.text));
+      } else if (message.event === 'correction') {
+        if (!inCorrection) {
+          inCorrection = true;
+          replyContent.appendChild(document.createTextNode('\n\n'));
+        }
+        replyContent.appendChild(document.createTextNode(message.data.text));
+      } else if (message.event === 'done') {
+        // The verified text replaces the draft, since fact-checking may have edited it
+        replyContent.textContent = message.data.text;
+      } else if (message.event === 'error') {
+        throw new Error(message.data.error);
+      }
+    }
+    
+    return fetch('/api/generate-reply', {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+        'Accept': 'text/event-stream'
+      },
+      body: JSON.stringify(payload)
+    })
+    .then(response => {
+      if (!response.ok || !response.body) {
+        throw new Error('Request failed with status ' + response.status);
+      }
+      
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '';
+      
+      function read() {
+        return reader.read().then(({ done, value }) => {
+          if (done) {
+            return;
+          }
+          buffer += decoder.decode(value, { stream: true });
+          
+          let boundary = buffer.indexOf('\n\n');
+          while (boundary !== -1) {
+            handleEvent(parseServerSentEvent(buffer.slice(0, boundary)));
+            buffer = buffer.slice(boundary + 2);
+            boundary = buffer.indexOf('\n\n');
+          }
+          return read();
+        });
+      }
+      
+      return read();
+    })
+    .catch(error => {
+      console.error('Error:', error);
+      hideLoading();
+      alert('An error occurred while generating a reply');
+    });
   }
   
   function copyReply() {
@@ -232,78 +382,29 @@ const diseasesData = {
     const affected = document.getElementById('affected-input').value.split(',').map(s => s.trim());
     const postText = document.getElementById('post-input').value;
     
-    // In a real implementation, this would call the API with these values
-    // Here we'll simulate a response
+    // Update the disease info in the UI
+    document.getElementById('disease-name').textContent = disease;
     
-    // Sample API call (commented out):
-    // fetch('/api/generate-reply', {
-    //   method: 'POST',
-    //   headers: {
-    //     'Content-Type': 'application/json'
-    //   },
-    //   body: JSON.stringify({
-    //     post_text: postText,
-    //     disease: disease,
-    //     symptoms: symptoms,
-    //     origins: origins,
-    //     affected: affected
-    //   })
-    // })
-    // .then(response => response.json())
-    // .then(data => {
-    //   // Update the reply content with the generated reply
-    //   document.getElementById('reply-content').textContent = data.reply;
-    //   hideLoading();
-    //   // Scroll to reply section
-    //   document.querySelector('.generated-reply').scrollIntoView({ behavior: 'smooth' });
-    // })
-    // .catch(error => {
-    //   console.error('Error:', error);
-    //   hideLoading();
-    //   alert('An error occurred while generating a custom reply');
-    // });
+    // Update symptoms tags
+    const symptomsContainer = document.getElementById('symptoms-tags');
+    symptomsContainer.innerHTML = '';
+    symptoms.forEach(symptom => {
+      const tag = document.createElement('span');
+      tag.className = 'tag symptom';
+      tag.textContent = symptom;
+      symptomsContainer.appendChild(tag);
+    });
     
-    // Simulate API response
-    setTimeout(() => {
-      // Create custom reply based on input values
-      let customReply = "uhmm actwaully... as THE expert on " + disease + ", I need to correct some things. ";
-      
-      // Check for disease name mismatch
-      if (!postText.includes(disease)) {
-        customReply += "First, the disease is called " + disease + ". ";
-      }
-      
-      // Check for symptom mismatches
-      customReply += "The real symptoms include " + symptoms.join(", ") + ". ";
-      
-      // Check for origin mismatches
-      customReply += "It originated from " + origins.join(", ") + " and affects " + affected.join(", ") + ". ";
-      
-      customReply += "Please verify your facts before posting health information online!";
-      
-      // Update the reply in the UI
-      document.getElementById('reply-content').textContent = customReply;
-      
-      // Update the disease info in the UI
-      document.getElementById('disease-name').textContent = disease;
-      
-      // Update symptoms tags
-      const symptomsContainer = document.getElementById('symptoms-tags');
-      symptomsContainer.innerHTML = '';
-      symptoms.forEach(symptom => {
-        const tag = document.createElement('span');
-        tag.className = 'tag symptom';
-        tag.textContent = symptom;
-        symptomsContainer.appendChild(tag);
-      });
-      
-      // Update locations
-      document.getElementById('origin-locations').textContent = origins.join(', ');
-      document.getElementById('affected-locations').textContent = affected.join(', ');
-      
-      hideLoading();
-      
-      // Scroll to reply section
-      document.querySelector('.generated-reply').scrollIntoView({ behavior: 'smooth' });
-    }, 1500);
+    // Update locations
+    document.getElementById('origin-locations').textContent = origins.join(', ');
+    document.getElementById('affected-locations').textContent = affected.join(', ');
+    
+    // Stream the custom reply from the backend
+    streamReply({
+      post_text: postText,
+      disease: disease,
+      symptoms: symptoms,
+      origins: origins,
+      affected: affected
+    });
   }
\ No newline at end of file
@@ -0,0 +1,25 @@
+# test_airport_risk.py
+# Tests for the request errors of the airport risk endpoint
+#
+# Usage: python -m pytest frontend
+
+import pytest
+
+import app
+
+@pytest.fixture
+def client():
+    return app.app.test_client()
+
+@pytest.mark.parametrize("body", ['[]', '[{"flights": []}]', 'null', '"flights"', 'not json'])
+def test_update_with_a_non_object_body_is_a_json_400(client, body):
+    response = client.post('/api/airport-risk', data=body, content_type='application/json')
+
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'Expected a JSON object with a flights list'}
+
+def test_update_with_non_list_flights_is_a_json_400(client):
+    response = client.post('/api/airport-risk', json={'flights': {'origin': 'SEA'}})
+
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'flights must be a list of flight records'}
@@ -0,0 +1,104 @@
+# test_claim_index.py
+# Tests for the known false claim index and batched claim matching
+#
+# Usage: python -m pytest frontend
+
+import json
+
+import numpy as np
+import pytest
+
+import app
+import claim_index
+from claim_index import Claim, ClaimIndex, HashingEmbedder
+
+CLAIMS = [
+    Claim("covid-19", "5G towers spread the coronavirus", "Viruses cannot travel on radio waves."),
+    Claim("covid-19", "Drinking bleach cures the virus", "Bleach is a poison."),
+    Claim("zika", "Zika is spread by genetically modified mosquitoes", "Wild mosquitoes carry Zika."),
+    Claim("zika", "The Zika vaccine causes microcephaly", "There is no licensed Zika vaccine.")
+]
+
+POSTS = [
+    "Did you know 5G towers are spreading the coronavirus? Stay safe.",
+    "They say drinking bleach cures the virus.",
+    "Genetically modified mosquitoes spread Zika!",
+    "Lovely weather today."
+]
+
+@pytest.fixture
+def index():
+    return ClaimIndex(CLAIMS)
+
+def claim_texts(matches):
+    return [match.claim.claim for match in matches]
+
+def test_batched_embedding_matches_one_text_at_a_time(monkeypatch):
+    monkeypatch.setattr(claim_index, "EMBED_BATCH", 3)
+    texts = ["", "a", "Héllo, wörld!", "Zika is spread by mosquitoes", "x" * 200, "東京 flu"]
+    embedder = HashingEmbedder().fit(texts)
+
+    batched = embedder.embed(texts)
+
+    assert batched.dtype == np.float32
+    np.testing.assert_allclose(batched, [embedder.embed_one(text) for text in texts], atol=1e-6)
+    np.testing.assert_allclose(np.linalg.norm(batched, axis=1), 1, atol=1e-5)
+
+def test_paraphrases_match_their_diseases_claims(index):
+    assert claim_texts(index.search([POSTS[0]], disease_id="covid-19")[0]) == ["5G towers spread the coronavirus"]
+    assert index.search([POSTS[0]], disease_id="zika") == [[]]
+    assert index.search([POSTS[0]], disease_id="measles") == [[]]
+    assert index.search([POSTS[3]]) == [[]]
+
+def test_batch_with_a_disease_per_post_matches_one_search_per_post(index):
+    disease_ids = ["covid-19", "covid-19", "zika", None]
+
+    batched = index.search(POSTS, disease_ids=disease_ids)
+    single = [index.search([post], disease_id=d)[0] for post, d in zip(POSTS, disease_ids)]
+
+    assert [claim_texts(matches) for matches in batched] == [claim_texts(matches) for matches in single]
+    assert [[round(match.score, 4) for match in matches] for matches in batched] == \
+        [[round(match.score, 4) for match in matches] for matches in single]
+    assert [len(matches) for matches in batched] == [1, 1, 1, 0]
+
+def test_large_searches_use_the_inverted_file(monkeypatch, index):
+    monkeypatch.setattr(claim_index, "IVF_MIN_CLAIMS", 3)
+    index.build_ivf(n_lists=2)
+    probed = []
+    search_ivf = index._search_ivf
+    monkeypatch.setattr(index, "_search_ivf", lambda *args: probed.append(args[1:]) or search_ivf(*args))
+
+    assert claim_texts(index.search([POSTS[2]])[0]) == ["Zika is spread by genetically modified mosquitoes"]
+    assert len(probed) == 1
+    # Exact below the threshold, and when asked for
+    index.search([POSTS[2]], disease_id="zika")
+    index.search([POSTS[2]], nprobe=0)
+    assert len(probed) == 1
+
+def test_default_index_clusters_large_corpora(monkeypatch, tmp_path):
+    path = tmp_path / "claims.json"
+    path.write_text(json.dumps([claim.__dict__ for claim in CLAIMS]))
+    monkeypatch.setattr(claim_index, "CLAIMS_PATH", str(path))
+    monkeypatch.setattr(claim_index, "IVF_MIN_CLAIMS", 4)
+    monkeypatch.setattr(claim_index, "_default_index", None)
+    monkeypatch.setattr("snapshot.get_snapshot", lambda: None)
+
+    assert claim_index.get_claim_index().centroids is not None
+
+def test_batch_endpoint_matches_the_single_post_endpoint():
+    client = app.app.test_client()
+    posts = [
+        {'disease': 'COVID-19', 'post_text': "5G towers spread the coronavirus, share this!"},
+        {'disease': None},
+        {'disease_id': 'covid-19', 'post_text': "Drinking bleach cures the virus."},
+        {'disease': 'Flu', 'post_text': "Flu causes fever."}
+    ]
+
+    lines = client.post('/api/analyze-posts', json=posts).get_data(as_text=True).splitlines()
+
+    assert [json.loads(line)['index'] for line in lines] == [0, 1, 2, 3]
+    for post, line in zip(posts, lines):
+        single = client.post('/api/analyze-post', json=post).get_json()
+        result = json.loads(line)
+        del result['index']
+        assert result == single
@@ -0,0 +1,102 @@
+# test_disease_registry.py
+# Tests for disease lookup by id and the request errors around it
+#
+# Usage: python -m pytest frontend
+
+import pytest
+
+import app
+from disease_registry import DiseaseRegistry, disease_id_for
+
+class FakeMatrix:
+    """Just enough of a SymptomMatrix: species names and their symptom rows."""
+    species = ["Influenza A virus", "Zika virus"]
+
+    def __init__(self):
+        self.rows = []
+
+    def row(self, species):
+        self.rows.append(species)
+        return {"fever": 0.8, "rash": 0.4} if species == "Zika virus" else {"fever": 0.9}
+
+@pytest.fixture
+def registry():
+    registry = DiseaseRegistry(max_adhoc=2)
+    registry.register("covid-19", "COVID-19", ["fever", "cough"], ["Asia"], ["Global"])
+    return registry
+
+@pytest.fixture
+def client():
+    return app.app.test_client()
+
+def test_disease_id_for_is_url_safe():
+    assert disease_id_for("Influenza A virus") == "influenza-a-virus"
+    assert disease_id_for("  COVID-19 (SARS-CoV-2) ") == "covid-19-sars-cov-2"
+
+def test_known_disease_is_found_by_id(registry):
+    record = registry.get("covid-19")
+
+    assert record.disease_name == "COVID-19"
+    assert record.to_dict() == {
+        'id': "covid-19", 'name': "COVID-19", 'symptoms': ["fever", "cough"],
+        'origins': ["Asia"], 'affected': ["Global"]
+    }
+    assert registry.get("covid-19") is record
+    assert registry.get("ebola") is None
+    assert "covid-19" in registry and "ebola" not in registry
+
+def test_matrix_species_are_compiled_on_first_lookup(registry):
+    matrix = FakeMatrix()
+    assert registry.attach_symptom_matrix(matrix) == 2
+    assert "zika-virus" in registry and len(registry) == 1
+
+    record = registry.get("zika-virus")
+
+    assert record.disease_name == "Zika virus"
+    assert record.symptom_keys == {"fever", "rash"}
+    assert registry.get("zika-virus") is record
+    assert matrix.rows == ["Zika virus"]
+
+def test_identical_adhoc_definitions_share_a_record(registry):
+    first = registry.intern("Measles", ["rash", "fever"])
+
+    assert registry.intern("Measles", ["rash", "fever"]) is first
+    assert registry.intern("Measles", ["rash"]) is not first
+    assert first.disease_id is None
+
+def test_adhoc_cache_evicts_the_least_recently_used(registry):
+    measles = registry.intern("Measles", ["rash"])
+    registry.intern("Mumps", ["fever"])
+    registry.intern("Measles", ["rash"])
+    registry.intern("Rubella", ["rash"])
+
+    assert registry.intern("Measles", ["rash"]) is measles
+    assert len(registry._adhoc) == 2
+
+def test_unknown_id_is_a_json_404(client):
+    response = client.post('/api/analyze-post', json={'disease_id': 'no-such-disease', 'post_text': 'hi'})
+
+    assert response.status_code == 404
+    assert response.get_json() == {'error': "Unknown disease id 'no-such-disease'"}
+
+@pytest.mark.parametrize("body, message", [
+    ({'disease': None, 'post_text': 'hi'}, "'disease' must be a string"),
+    ({'disease': 'Flu', 'symptoms': [['a']], 'post_text': 'hi'}, "'symptoms' must be"),
+    ({'disease': 'Flu', 'origins': {'Asia': 'high'}, 'post_text': 'hi'}, "'origins' must be"),
+    ({'disease_id': ['covid-19'], 'post_text': 'hi'}, "'disease_id' must be a string"),
+    ([{'disease': 'Flu'}], "Expected a JSON object")
+])
+@pytest.mark.parametrize("path", ['/api/analyze-post', '/api/generate-reply', '/api/reply-jobs'])
+def test_malformed_definitions_are_a_json_400(client, path, body, message):
+    response = client.post(path, json=body)
+
+    assert response.status_code == 400
+    assert response.get_json()['error'].startswith(message)
+
+def test_malformed_post_in_a_batch_is_reported_in_place(client):
+    response = client.post('/api/analyze-posts', json=[{'disease': None}, {'disease': 'Flu', 'post_text': 'hi'}])
+    results = [line for line in response.get_data(as_text=True).splitlines()]
+
+    assert response.status_code == 200
+    assert '"error": "\'disease\' must be a string"' in results[0]
+    assert '"index": 1' in results[1] and 'error' not in results[1]
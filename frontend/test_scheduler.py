@@ -0,0 +1,115 @@
+# test_scheduler.py
+# Tests for the reply generation scheduler
+#
+# Usage: python -m pytest frontend
+
+import pytest
+
+import scheduler
+from scheduler import DONE, EXPIRED, FAILED, QUEUED, RUNNING, GenerationScheduler, job_priority
+from serving import Saturated
+
+@pytest.fixture
+def paused():
+    """A scheduler without workers; tests pop its batches with _next_batch."""
+    return GenerationScheduler(lambda disease: f"reply about {disease}", workers=0)
+
+def popped(paused):
+    return [(job.disease, job.post_text) for job in paused._next_batch()]
+
+def test_reach_counts_logarithmically_and_urgency_as_is():
+    assert job_priority() == 0
+    assert job_priority(reach=9) == pytest.approx(1)
+    assert job_priority(reach=999, urgency=2) == pytest.approx(5)
+    assert job_priority(reach=-5) == 0
+
+def test_most_urgent_job_runs_first(paused):
+    paused.submit("flu", priority=1, post_text="low")
+    paused.submit("zika", priority=3, post_text="high")
+    paused.submit("ebola", priority=2, post_text="middle")
+    paused.submit("measles", priority=3, post_text="high, later deadline", timeout=600)
+
+    assert popped(paused) == [("zika", "high")]
+    assert popped(paused) == [("measles", "high, later deadline")]
+    assert popped(paused) == [("ebola", "middle")]
+    assert popped(paused) == [("flu", "low")]
+
+def test_jobs_past_their_deadline_are_dropped(paused):
+    stale = paused.submit("zika", priority=5, timeout=-1)
+    live = paused.submit("flu", priority=1)
+
+    assert paused._next_batch() == [live]
+    assert stale.status == EXPIRED and stale.error == scheduler.EXPIRED_ERROR
+    assert live.status == RUNNING
+    assert paused.stats()['expired'] == 1 and paused.stats()['queued'] == 0
+
+def test_polling_an_expired_job_reports_it(paused):
+    job = paused.submit("flu", timeout=-1)
+
+    assert paused.get(job.id).status == EXPIRED
+    assert paused.queue_position(job) is None
+    assert paused.stats()['queued'] == 0
+
+def test_queued_jobs_for_the_same_disease_run_as_one_batch(paused):
+    first = paused.submit("flu", priority=2)
+    other = paused.submit("zika", priority=1)
+    second = paused.submit("flu", priority=0)
+
+    assert paused.queue_position(second) == 2
+    assert paused._next_batch() == [first, second]
+    assert first.batch_size == second.batch_size == 2
+    assert paused.queue_position(other) == 0 and other.status == QUEUED
+    assert paused._next_batch() == [other]
+
+def test_batches_are_capped(paused):
+    paused.max_batch = 2
+    jobs = [paused.submit("flu") for _ in range(3)]
+
+    assert paused._next_batch() == jobs[:2]
+    assert paused._next_batch() == jobs[2:]
+
+def test_full_queue_is_saturated(paused):
+    paused.max_queued = 1
+    paused.submit("flu")
+
+    with pytest.raises(Saturated):
+        paused.submit("flu")
+    assert paused.stats()['rejected'] == 1
+
+def test_workers_generate_once_per_batch():
+    calls = []
+    running = GenerationScheduler(lambda disease: calls.append(disease) or f"reply about {disease}", workers=1)
+
+    job = running.submit("flu")
+
+    assert job.wait(5)
+    assert (job.status, job.result) == (DONE, "reply about flu")
+    assert calls == ["flu"]
+
+def test_generation_errors_fail_the_job():
+    def generate(disease):
+        raise RuntimeError("model unavailable")
+
+    job = GenerationScheduler(generate, workers=1).submit("flu")
+
+    assert job.wait(5)
+    assert (job.status, job.error) == (FAILED, "model unavailable")
+
+def test_oldest_finished_jobs_are_forgotten(monkeypatch):
+    monkeypatch.setattr(scheduler, "MAX_FINISHED", 2)
+    running = GenerationScheduler(lambda disease: "reply", workers=1)
+
+    jobs = []
+    for disease in ("flu", "zika", "ebola"):
+        jobs.append(running.submit(disease))
+        assert jobs[-1].wait(5)
+
+    assert running.get(jobs[0].id) is None
+    assert [running.get(job.id) for job in jobs[1:]] == jobs[1:]
+
+def test_unfinished_jobs_are_never_forgotten(monkeypatch, paused):
+    monkeypatch.setattr(scheduler, "MAX_FINISHED", 1)
+
+    jobs = [paused.submit(disease) for disease in ("flu", "zika", "ebola")]
+
+    assert [paused.get(job.id) for job in jobs] == jobs
@@ -0,0 +1,65 @@
+# test_snapshot.py
+# Tests for writing, attaching to and invalidating the startup snapshot
+#
+# Usage: python -m pytest frontend
+
+import os
+
+import numpy as np
+import pytest
+
+from snapshot import Snapshot, SnapshotWriter
+
+@pytest.fixture
+def store(tmp_path):
+    partition = tmp_path / "store" / "origin=SEA" / "carrier=AA" / "month=2024-01"
+    partition.mkdir(parents=True)
+    (partition / "SEA_AA-0.arrow").write_bytes(b"flights")
+    return tmp_path / "store"
+
+def write_snapshot(tmp_path, store):
+    writer = SnapshotWriter()
+    writer.add_array("risk.score", np.array([0.5, 1.0]))
+    writer.add_source_set(os.path.join(store, "**", "*.arrow"))
+    writer.write(str(tmp_path / "startup.snapshot"))
+    return Snapshot(str(tmp_path / "startup.snapshot"))
+
+def test_arrays_are_read_only_views(tmp_path, store):
+    snapshot = write_snapshot(tmp_path, store)
+
+    assert snapshot.array("risk.score").tolist() == [0.5, 1.0]
+    assert not snapshot.array("risk.score").flags.writeable
+    assert snapshot.stale_sources() == []
+
+def test_changed_partition_makes_the_snapshot_stale(tmp_path, store):
+    snapshot = write_snapshot(tmp_path, store)
+    partition = store / "origin=SEA" / "carrier=AA" / "month=2024-01" / "SEA_AA-0.arrow"
+
+    partition.write_bytes(b"more flights")
+
+    assert snapshot.stale_sources() == [str(partition)]
+
+def test_ingested_partition_makes_the_snapshot_stale(tmp_path, store):
+    snapshot = write_snapshot(tmp_path, store)
+    partition = store / "origin=SEA" / "carrier=AA" / "month=2024-02"
+    partition.mkdir()
+
+    (partition / "SEA_AA-0.arrow").write_bytes(b"flights")
+
+    assert snapshot.stale_sources() == [os.path.join(str(store), "**", "*.arrow")]
+
+def test_removed_partition_makes_the_snapshot_stale(tmp_path, store):
+    snapshot = write_snapshot(tmp_path, store)
+    partition = store / "origin=SEA" / "carrier=AA" / "month=2024-01" / "SEA_AA-0.arrow"
+
+    partition.unlink()
+
+    assert snapshot.stale_sources() == [os.path.join(str(store), "**", "*.arrow"), str(partition)]
+
+def test_store_created_after_the_build_makes_the_snapshot_stale(tmp_path):
+    snapshot = write_snapshot(tmp_path, tmp_path / "store")
+
+    (tmp_path / "store").mkdir()
+    (tmp_path / "store" / "SEA_AA-0.arrow").write_bytes(b"flights")
+
+    assert snapshot.stale_sources() == [os.path.join(str(tmp_path / "store"), "**", "*.arrow")]
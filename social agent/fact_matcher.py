@@ -0,0 +1,284 @@
+# fact_matcher.py
+# Compiled single-pass phrase matching used by fact_check_disease_info
+
+import re
+from collections import deque
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
+
+TOKEN_PATTERN = re.compile(r"[\w\-]+")
+
+# Text allowed between a cue ("emerged in", "affecting") and a location, or
+# between two locations of the same list ("Asia, Europe and Africa"), with
+# qualifiers such as "affects primarily Europe". Every alternative is one
+# separator character or one whole word between word boundaries, so a gap
+# can be read only one way and a failed match backtracks in linear time.
+LIST_GAP_PATTERN = re.compile(
+    r"(?:[\s,]|\b(?:and|or|in|from|the|mainly|mostly|primarily|largely|especially|particularly)\b)*",
+    re.IGNORECASE
+)
+
+NAME = "name"
+SYMPTOM = "symptom"
+KNOWN_SYMPTOM = "known_symptom"
+SYMPTOM_CUE = "symptom_cue"
+LOCATION = "location"
+ORIGIN_CUE = "origin_cue"
+AFFECTED_CUE = "affected_cue"
+
+def tokenize(text: str) -> Tuple[List[str], List[Tuple[int, int]]]:
+    """Splits text into case-folded word tokens and their character spans."""
+    words = []
+    spans = []
+    for match in TOKEN_PATTERN.finditer(text):
+        words.append(match.group().casefold())
+        spans.append(match.span())
+    return words, spans
+
+def phrase_key(phrase: str) -> Tuple[str, ...]:
+    """Returns the case-folded token sequence for a vocabulary phrase."""
+    return tuple(word.casefold() for word in TOKEN_PATTERN.findall(phrase))
+
+def apply_edits(text: str, edits: Iterable[Tuple[int, int, str]]) -> str:
+    """Applies non-overlapping (start, end, replacement) edits in a single join."""
+    parts = []
+    position = 0
+    for start, end, replacement in sorted(edits):
+        if start < position:
+            continue
+        parts.append(text[position:start])
+        parts.append(replacement)
+        position = end
+    parts.append(text[position:])
+    return "".join(parts)
+
+class PhraseMatcher:
+    """Aho-Corasick automaton over word tokens.
+
+    Every phrase is a (kind, value, phrase) triple. Matching walks the token
+    list once and reports every phrase occurrence, including overlapping ones,
+    so the cost per text does not depend on how many phrases were compiled.
+    """
+
+    def __init__(self, phrases: Iterable[Tuple[str, object, str]]):
+        goto: List[Dict[str, int]] = [{}]
+        outputs: List[List[Tuple[str, object, int]]] = [[]]
+        seen = set()
+
+        for kind, value, phrase in phrases:
+            key = phrase_key(phrase)
+            if not key or (kind, key) in seen:
+                continue
+            seen.add((kind, key))
+
+            state = 0
+            for word in key:
+                next_state = goto[state].get(word)
+                if next_state is None:
+                    next_state = len(goto)
+                    goto[state][word] = next_state
+                    goto.append({})
+                    outputs.append([])
+                state = next_state
+            outputs[state].append((kind, value, len(key)))
+
+        # Breadth-first pass to fill in failure links and merged outputs
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for word, next_state in goto[state].items():
+                queue.append(next_state)
+                fallback = fail[state]
+                while fallback and word not in goto[fallback]:
+                    fallback = fail[fallback]
+                fail[next_state] = goto[fallback].get(word, 0)
+                outputs[next_state] = outputs[next_state] + outputs[fail[next_state]]
+
+        self._goto = goto
+        self._fail = fail
+        self._outputs = outputs
+
+    def iter_matches(self, words: Sequence[str]) -> Iterator[Tuple[str, object, int, int]]:
+        """Yields (kind, value, first_token, last_token) in order of last token."""
+        goto = self._goto
+        fail = self._fail
+        outputs = self._outputs
+        state = 0
+
+        for index, word in enumerate(words):
+            while state and word not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(word, 0)
+            for kind, value, length in outputs[state]:
+                yield kind, value, index - length + 1, index
+
+@dataclass
+class MatchResult:
+    """Everything fact_check_disease_info needs from one scan of a post."""
+    incorrect_names: List[str] = field(default_factory=list)
+    name_spans: List[Tuple[int, int]] = field(default_factory=list)
+    wrong_symptoms: List[str] = field(default_factory=list)
+    wrong_symptom_spans: List[Tuple[str, int, int]] = field(default_factory=list)
+    symptom_sections: List[int] = field(default_factory=list)
+    origin_mentions: List[str] = field(default_factory=list)
+    affected_mentions: List[str] = field(default_factory=list)
+
+class DiseaseMatcher:
+    """Matcher compiled for one disease and one checking vocabulary."""
+
+    def __init__(
+        self,
+        disease_name: str,
+        symptoms: Iterable[str],
+        origins: Iterable[str],
+        affected: Iterable[str],
+        symptom_vocabulary: Iterable[str],
+        location_vocabulary: Iterable[str],
+        origin_cues: Iterable[str],
+        affected_cues: Iterable[str]
+    ):
+        symptoms = tuple(symptoms)
+        origins = tuple(origins)
+        affected = tuple(affected)
+        self.name_key = phrase_key(disease_name)
+        self.actual_symptoms = frozenset(phrase_key(symptom) for symptom in symptoms)
+        self.origin_keys = frozenset(location.casefold() for location in origins)
+        self.affected_keys = frozenset(location.casefold() for location in affected)
+
+        phrases = [(NAME, position, word) for position, word in enumerate(self.name_key)]
+        phrases += [(KNOWN_SYMPTOM, symptom, symptom) for symptom in symptoms]
+        phrases += [
+            (SYMPTOM, symptom, symptom) for symptom in symptom_vocabulary
+            if phrase_key(symptom) not in self.actual_symptoms
+        ]
+        phrases.append((SYMPTOM_CUE, None, "symptoms"))
+        phrases += [(LOCATION, location, location) for location in origins + affected]
+        phrases += [(LOCATION, location, location) for location in location_vocabulary]
+        phrases += [(ORIGIN_CUE, None, cue) for cue in origin_cues]
+        phrases += [(AFFECTED_CUE, None, cue) for cue in affected_cues]
+        self._phrases = PhraseMatcher(phrases)
+
+    def scan(self, text: str) -> MatchResult:
+        """Finds name, symptom and location hits in one pass over the text."""
+        words, spans = tokenize(text)
+        result = MatchResult()
+        covered = set()
+        symptom_hits = []
+        name_windows = []
+        anchor = None
+        anchor_end = 0
+
+        for kind, value, first, last in self._phrases.iter_matches(words):
+            if kind == KNOWN_SYMPTOM:
+                covered.update(range(first, last + 1))
+            elif kind == SYMPTOM:
+                symptom_hits.append((value, first, last))
+            elif kind == SYMPTOM_CUE:
+                result.symptom_sections.append(spans[last][1])
+            elif kind == NAME:
+                name_windows.append(self._name_candidate(text, spans, last, value))
+            elif kind in (ORIGIN_CUE, AFFECTED_CUE):
+                anchor = kind
+                anchor_end = spans[last][1]
+            elif kind == LOCATION and anchor:
+                if LIST_GAP_PATTERN.fullmatch(text, anchor_end, spans[first][0]):
+                    mentions = result.origin_mentions if anchor == ORIGIN_CUE else result.affected_mentions
+                    mentions.append(value)
+                    anchor_end = spans[last][1]
+                else:
+                    anchor = None
+
+        # A vocabulary symptom inside one of the disease's own symptoms
+        # ("loss of taste" in "loss of taste or smell") is not misinformation
+        for symptom, first, last in symptom_hits:
+            if not covered.issuperset(range(first, last + 1)):
+                result.wrong_symptom_spans.append((symptom, spans[first][0], spans[last][1]))
+
+        result.name_spans = [
+            (spans[first][0], spans[last][1]) for first, last in _merge_windows(name_windows)
+            if not self._names_disease(words[first:last + 1])
+        ]
+        result.incorrect_names = list(dict.fromkeys(text[start:end] for start, end in result.name_spans))
+        result.wrong_symptoms = list(dict.fromkeys(symptom for symptom, _, _ in result.wrong_symptom_spans))
+        result.origin_mentions = list(dict.fromkeys(result.origin_mentions))
+        result.affected_mentions = list(dict.fromkeys(result.affected_mentions))
+        return result
+
+    def _names_disease(self, words: Sequence[str]) -> bool:
+        """Whether a mention holds every word of the name in order ("Avian seasonal Influenza").
+
+        Qualifiers around or inside the full name are allowed; a mention that
+        replaces part of the name ("Avian Flu", "seasonal Influenza") is not.
+        """
+        remaining = iter(words)
+        return all(word in remaining for word in self.name_key)
+
+    def _name_candidate(self, text, spans, index, position):
+        """Aligns a name-word hit with the full disease name inside its phrase."""
+        first = index - position
+        last = first + len(self.name_key) - 1
+        first = max(first, 0)
+        last = min(last, len(spans) - 1)
+
+        # Names never span punctuation, so stay within the hit's phrase
+        for current in range(index, first, -1):
+            if not text[spans[current - 1][1]:spans[current][0]].isspace():
+                first = current
+                break
+        for current in range(index, last):
+            if not text[spans[current][1]:spans[current + 1][0]].isspace():
+                last = current
+                break
+        return first, last
+
+def _merge_windows(windows: Iterable[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Merges overlapping (first, last) token windows, so each mention is judged and rewritten once."""
+    merged: List[Tuple[int, int]] = []
+    for first, last in sorted(windows):
+        if merged and first <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], last))
+        else:
+            merged.append((first, last))
+    return merged
+
+@lru_cache(maxsize=256)
+def _compile_disease_matcher(
+    disease_name: str,
+    symptoms: Tuple[str, ...],
+    origins: Tuple[str, ...],
+    affected: Tuple[str, ...],
+    symptom_vocabulary: Tuple[str, ...],
+    location_vocabulary: Tuple[str, ...],
+    origin_cues: Tuple[str, ...],
+    affected_cues: Tuple[str, ...]
+) -> DiseaseMatcher:
+    return DiseaseMatcher(
+        disease_name, symptoms, origins, affected,
+        symptom_vocabulary, location_vocabulary,
+        origin_cues, affected_cues
+    )
+
+def get_disease_matcher(
+    disease_data,
+    symptom_vocabulary: Iterable[str],
+    location_vocabulary: Iterable[str],
+    origin_cues: Iterable[str],
+    affected_cues: Iterable[str]
+) -> DiseaseMatcher:
+    """Returns the cached matcher for a DiseaseVector, compiling it on first use."""
+    transmission = disease_data.transmission
+    origins = tuple(transmission.from_locations or ()) if transmission else ()
+    affected = tuple(transmission.to_locations or ()) if transmission else ()
+
+    return _compile_disease_matcher(
+        disease_data.disease_name,
+        tuple(disease_data.symptoms or ()),
+        origins,
+        affected,
+        tuple(symptom_vocabulary),
+        tuple(location_vocabulary),
+        tuple(origin_cues),
+        tuple(affected_cues)
+    )
@@ -1,8 +1,20 @@
-import json
-import re
 import requests
-from typing import Dict, List, Optional, Union
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+from bisect import bisect_right
 from dataclasses import dataclass, field
+from fact_matcher import apply_edits, get_disease_matcher
+from ollama_client import DEFAULT_MODEL, get_ollama_client
+from response_cache import get_response_cache
+
+# Vocabulary the fact checker looks for in posts
+COMMON_SYMPTOMS = (
+    "fever", "cough", "fatigue", "shortness of breath", "loss of taste", "loss of smell",
+    "headache", "sore throat", "chills", "muscle pain", "nausea", "vomiting", "diarrhea",
+    "rash", "joint pain", "confusion", "dizziness", "fainting", "seizures", "paralysis"
+)
+COMMON_LOCATIONS = ("Africa", "South America", "North America", "Europe", "Asia", "Australia")
+ORIGIN_CUES = ("emerged", "originated", "came from", "started in", "first appeared in", "began in")
+AFFECTED_CUES = ("affects", "impacting", "spreading to", "prevalent in", "common in")
 
 @dataclass
 class TransmissionInfo:
@@ -50,19 +62,54 @@ def build_disease_prompt(disease_data: DiseaseVector) -> str:
     - do not say anuthing like "meets your requirements" or "fulfills your criteria" etc at the beginning of the text
     """
 
-def call_ollama_api(prompt: str, model: str = "llama3.2") -> str:
+def call_ollama_api(prompt: str, model: str = DEFAULT_MODEL) -> str:
     """Makes a request to the Ollama API and returns the response."""
-    url = "http://localhost:11434/api/generate"
-    data = {"model": model, "prompt": prompt}
+    try:
+        response = get_response_cache().get_or_generate(
+            model, prompt, lambda: get_ollama_client().generate_sync(prompt, model)
+        )
+        return response or "No response received from Ollama."
+    except requests.RequestException as e:
+        return f"Error: Unable to generate content. {str(e)}"
+
+async def call_ollama_api_async(prompt: str, model: str = DEFAULT_MODEL) -> str:
+    """Awaitable version of call_ollama_api that does not block the event loop."""
+    cache = get_response_cache()
+    response = cache.get(model, prompt)
+    if response is not None:
+        return response
     
     try:
-        response = requests.post(url, json=data, stream=True)
-        response.raise_for_status()
-        
-        return "".join(json.loads(line).get("response", "") 
-                      for line in response.iter_lines() if line) or "No response received from Ollama."
+        response = await get_ollama_client().generate(prompt, model)
     except requests.RequestException as e:
         return f"Error: Unable to generate content. {str(e)}"
+    
+    if not response:
+        return "No response received from Ollama."
+    cache.set(model, prompt, response)
+    return response
+
+def call_ollama_api_stream(prompt: str, model: str = DEFAULT_MODEL) -> Iterator[str]:
+    """Yields the Ollama response as it is generated, caching the full text."""
+    cache = get_response_cache()
+    cached = cache.get(model, prompt)
+    if cached is not None:
+        yield cached
+        return
+    
+    chunks = []
+    try:
+        for chunk in get_ollama_client().stream(prompt, model):
+            chunks.append(chunk)
+            yield chunk
+    except requests.RequestException as e:
+        yield f"Error: Unable to generate content. {str(e)}"
+        return
+    
+    if chunks:
+        cache.set(model, prompt, "".join(chunks))
+    else:
+        yield "No response received from Ollama."
 
 def generate_disease_summary(
     disease_name: str,
@@ -80,51 +127,62 @@ def generate_disease_summary(
 
 def fact_check_disease_info(text: str, disease_data: DiseaseVector) -> str:
     """Checks text for disease misinformation and adds corrections with a condescending tone."""
+    text, correction_prompt = prepare_fact_check(text, disease_data)
+    
+    # Only generate correction if needed
+    if correction_prompt:
+        text += "\n\n" + call_ollama_api(correction_prompt)
+    
+    return text
+
+async def fact_check_disease_info_async(text: str, disease_data: DiseaseVector) -> str:
+    """Awaitable version of fact_check_disease_info."""
+    text, correction_prompt = prepare_fact_check(text, disease_data)
+    
+    if correction_prompt:
+        text += "\n\n" + await call_ollama_api_async(correction_prompt)
+    
+    return text
+
+def prepare_fact_check(text: str, disease_data: DiseaseVector) -> Tuple[str, Optional[str]]:
+    """Applies in-text corrections and returns the text with its correction prompt, or None."""
     corrections = []
     correct_symptoms = list(disease_data.symptoms.keys()) if disease_data.symptoms else []
     wrong_symptoms = []
     
-    # Check disease name consistency
+    # Find every name, symptom and location hit in one pass over the text
     disease_name = disease_data.disease_name
-    pattern = r'([A-Za-z0-9\-]+(?:\s+[A-Za-z0-9\-]+)*)'
-    disease_mentions = re.findall(pattern, text)
-    incorrect_names = [name for name in disease_mentions 
-                      if name.lower() != disease_name.lower() 
-                      and any(word in name.lower() for word in disease_name.lower().split())]
-    
-    for incorrect_name in incorrect_names:
-        text = text.replace(incorrect_name, disease_name)
+    matcher = get_disease_matcher(
+        disease_data, COMMON_SYMPTOMS, COMMON_LOCATIONS, ORIGIN_CUES, AFFECTED_CUES
+    )
+    matches = matcher.scan(text)
+    edits = []
+    
+    # Check disease name consistency
+    for start, end in matches.name_spans:
+        edits.append((start, end, disease_name))
+    for incorrect_name in matches.incorrect_names:
         corrections.append((f"disease name '{incorrect_name}'", f"'{disease_name}'"))
     
     # Check symptoms accuracy
     if disease_data.symptoms:
-        actual_symptoms = set(disease_data.symptoms.keys())
-        # Common symptoms to check against
-        common_symptoms = {
-            "fever", "cough", "fatigue", "shortness of breath", "loss of taste", "loss of smell", 
-            "headache", "sore throat", "chills", "muscle pain", "nausea", "vomiting", "diarrhea",
-            "rash", "joint pain", "confusion", "dizziness", "fainting", "seizures", "paralysis"
-        }
-        
-        for symptom in common_symptoms:
-            if symptom not in actual_symptoms and symptom.lower() in text.lower():
-                wrong_symptoms.append(symptom)
-                text = re.sub(
-                    r'symptoms(.*?)' + symptom, 
-                    f'symptoms\\1{", ".join(actual_symptoms)}', 
-                    text, 
-                    flags=re.IGNORECASE
-                )
-                corrections.append((f"symptom '{symptom}'", f"actual symptoms: {', '.join(actual_symptoms)}"))
+        actual_symptoms = ", ".join(correct_symptoms)
+        edits.extend(
+            (start, end, actual_symptoms)
+            for start, end in symptom_list_spans(text, matches)
+        )
+        for symptom in matches.wrong_symptoms:
+            wrong_symptoms.append(symptom)
+            corrections.append((f"symptom '{symptom}'", f"actual symptoms: {actual_symptoms}"))
     
     # Check transmission information
     if disease_data.transmission:
         # Check origin locations
         if disease_data.transmission.from_locations:
             check_locations(
-                text, 
-                set(disease_data.transmission.from_locations.keys()),
-                r'(emerged|originated|came from|started in|first appeared in|began in)\s+([A-Za-z]+(?:,\s+[A-Za-z]+)*)',
+                matches.origin_mentions,
+                disease_data.transmission.from_locations.keys(),
+                matcher.origin_keys,
                 "origin",
                 corrections
             )
@@ -132,43 +190,44 @@ def fact_check_disease_info(text: str, disease_data: DiseaseVector) -> str:
         # Check affected locations
         if disease_data.transmission.to_locations:
             check_locations(
-                text, 
-                set(disease_data.transmission.to_locations.keys()),
-                r'(affects|impacting|spreading to|prevalent in|common in)\s+([A-Za-z]+(?:,\s+[A-Za-z]+)*)',
+                matches.affected_mentions,
+                disease_data.transmission.to_locations.keys(),
+                matcher.affected_keys,
                 "affected area",
                 corrections
             )
     
-    # Only generate correction if needed
-    if corrections:
-        correction_prompt = create_correction_prompt(disease_data, corrections, wrong_symptoms, correct_symptoms)
-        correction_note = call_ollama_api(correction_prompt)
-        text += "\n\n" + correction_note
+    text = apply_edits(text, edits)
     
-    return text
+    if not corrections:
+        return text, None
+    return text, create_correction_prompt(disease_data, corrections, wrong_symptoms, correct_symptoms)
+
+def symptom_list_spans(text, matches):
+    """Finds wrong symptoms listed after a "symptoms" mention on the same line."""
+    spans = []
+    sections = matches.symptom_sections
+    consumed = {}
+    
+    for symptom, start, end in matches.wrong_symptom_spans:
+        index = bisect_right(sections, start) - 1
+        if index < 0:
+            continue
+        section = sections[index]
+        if section > consumed.get(symptom, -1) and "\n" not in text[section:start]:
+            spans.append((start, end))
+            consumed[symptom] = end
+    
+    return spans
 
-def check_locations(text, actual_locations, pattern, location_type, corrections):
+def check_locations(mentioned_locations, actual_locations, actual_keys, location_type, corrections):
     """Helper function to check location mentions in text."""
-    try:
-        location_matches = re.findall(pattern, text, re.IGNORECASE)
-        
-        for verb, locations_text in location_matches:
-            mentioned_locations = [loc.strip() for loc in locations_text.split(',')]
-            for loc in mentioned_locations:
-                if loc and loc not in actual_locations:
-                    correct_locations = ", ".join(actual_locations) if actual_locations else "unknown regions"
-                    corrections.append((
-                        f"{location_type} '{loc}'", 
-                        f"actual {location_type}: {correct_locations}"
-                    ))
-    except Exception as e:
-        # If there's any error in processing the locations, log it but don't crash
-        print(f"Error checking {location_type} locations: {str(e)}")
-        # Still add a generic correction if needed
-        if actual_locations:
-            correct_locations = ", ".join(actual_locations)
+    correct_locations = ", ".join(actual_locations) if actual_locations else "unknown regions"
+    
+    for loc in mentioned_locations:
+        if loc.casefold() not in actual_keys:
             corrections.append((
-                f"incorrect {location_type}", 
+                f"{location_type} '{loc}'", 
                 f"actual {location_type}: {correct_locations}"
             ))
 
@@ -239,6 +298,59 @@ def generate_and_verify_disease_summary(
     initial_summary = call_ollama_api(build_disease_prompt(disease_data))
     return fact_check_disease_info(initial_summary, disease_data)
 
+async def generate_and_verify_disease_summary_async(
+    disease_name: str,
+    symptoms: Optional[Dict[str, float]] = None,
+    transmission_from: Optional[Union[Dict[str, float], List[str], str]] = None,
+    transmission_to: Optional[Union[Dict[str, float], List[str], str]] = None
+) -> str:
+    """Awaitable version of generate_and_verify_disease_summary.
+    
+    The correction depends on the generated summary, so the two model calls stay
+    sequential here; concurrency comes from running many summaries at once.
+    """
+    disease_data = DiseaseVector(
+        disease_name=disease_name,
+        symptoms=symptoms or {},
+        transmission=normalize_transmission_data(transmission_from, transmission_to)
+    )
+    
+    initial_summary = await call_ollama_api_async(build_disease_prompt(disease_data))
+    return await fact_check_disease_info_async(initial_summary, disease_data)
+
+def generate_and_verify_disease_summary_stream(
+    disease_name: str,
+    symptoms: Optional[Dict[str, float]] = None,
+    transmission_from: Optional[Union[Dict[str, float], List[str], str]] = None,
+    transmission_to: Optional[Union[Dict[str, float], List[str], str]] = None
+) -> Iterator[Tuple[str, str]]:
+    """Streams generation events for a verified disease summary.
+    
+    Yields ("token", chunk) while the draft summary is generated, then
+    ("correction", chunk) while a correction note is generated (only when the
+    draft needs one), and finally ("done", text) with the complete verified text.
+    """
+    disease_data = DiseaseVector(
+        disease_name=disease_name,
+        symptoms=symptoms or {},
+        transmission=normalize_transmission_data(transmission_from, transmission_to)
+    )
+    
+    chunks = []
+    for chunk in call_ollama_api_stream(build_disease_prompt(disease_data)):
+        chunks.append(chunk)
+        yield "token", chunk
+    
+    text, correction_prompt = prepare_fact_check("".join(chunks), disease_data)
+    if correction_prompt:
+        correction = []
+        for chunk in call_ollama_api_stream(correction_prompt):
+            correction.append(chunk)
+            yield "correction", chunk
+        text += "\n\n" + "".join(correction)
+    
+    yield "done", text
+
 if __name__ == "__main__":
     # Test cases
     print("===== TEST CASE 1: ACCURATE INFORMATION =====")
@@ -0,0 +1,127 @@
+# ollama_client.py
+# Pooled, concurrency-bounded Ollama client shared by the generation helpers
+
+import asyncio
+import json
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterator, Optional, Tuple, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+
+OLLAMA_URL = os.environ.get("OLLAMA_URL", "http://localhost:11434")
+DEFAULT_MODEL = "llama3.2"
+
+# (connect, read) seconds; the read timeout applies between streamed chunks
+DEFAULT_TIMEOUT = (5.0, 120.0)
+DEFAULT_MAX_CONCURRENCY = 4
+
+
+class OllamaClient:
+    """Keep-alive Ollama client with bounded concurrency and request coalescing.
+
+    Generations run on a small worker pool that shares one pooled HTTP
+    session, so at most ``max_concurrency`` requests reach the model at once
+    and the rest queue. Identical (model, prompt) requests that are already
+    in flight are coalesced onto the same upstream call. ``generate`` is the
+    asyncio entry point and ``generate_sync`` the blocking one; both share
+    the same pool and in-flight table.
+    """
+
+    def __init__(
+        self,
+        base_url: str = OLLAMA_URL,
+        timeout: Union[float, Tuple[float, float]] = DEFAULT_TIMEOUT,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_concurrency)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="ollama")
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._lock = threading.RLock()
+        self._in_flight: Dict[Tuple[str, str], Future] = {}
+
+    def submit(self, prompt: str, model: str = DEFAULT_MODEL) -> Future:
+        """Schedules a generation, joining an identical one already in flight."""
+        key = (model, prompt)
+        with self._lock:
+            future = self._in_flight.get(key)
+            if future is None:
+                future = self._executor.submit(self._generate, prompt, model)
+                self._in_flight[key] = future
+                future.add_done_callback(lambda done, key=key: self._forget(key, done))
+        return future
+
+    async def generate(self, prompt: str, model: str = DEFAULT_MODEL) -> str:
+        """Generates a completion without blocking the event loop.
+
+        Cancelling one caller leaves the shared upstream call running for
+        any other caller coalesced onto it.
+        """
+        return await asyncio.shield(asyncio.wrap_future(self.submit(prompt, model)))
+
+    def generate_sync(self, prompt: str, model: str = DEFAULT_MODEL) -> str:
+        """Generates a completion, blocking the calling thread until it is done."""
+        return self.submit(prompt, model).result()
+
+    def stream(self, prompt: str, model: str = DEFAULT_MODEL) -> Iterator[str]:
+        """Yields response chunks as the model produces them.
+
+        Streams are not coalesced, but they count against the same
+        concurrency limit as buffered generations.
+        """
+        with self._slots:
+            yield from self._iter_chunks(prompt, model)
+
+    def in_flight(self) -> int:
+        """Returns the number of distinct generations queued or running."""
+        with self._lock:
+            return len(self._in_flight)
+
+    def close(self):
+        """Waits for queued generations and releases pooled connections."""
+        self._executor.shutdown(wait=True)
+        self.session.close()
+
+    def _forget(self, key, future):
+        with self._lock:
+            if self._in_flight.get(key) is future:
+                del self._in_flight[key]
+
+    def _generate(self, prompt: str, model: str) -> str:
+        with self._slots:
+            return "".join(self._iter_chunks(prompt, model))
+
+    def _iter_chunks(self, prompt: str, model: str) -> Iterator[str]:
+        data = {"model": model, "prompt": prompt}
+        with self.session.post(
+            f"{self.base_url}/api/generate", json=data, stream=True, timeout=self.timeout
+        ) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if line:
+                    chunk = json.loads(line).get("response", "")
+                    if chunk:
+                        yield chunk
+
+
+_default_client: Optional[OllamaClient] = None
+_default_client_lock = threading.Lock()
+
+
+def get_ollama_client() -> OllamaClient:
+    """Returns the process-wide client, creating it on first use."""
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = OllamaClient()
+        return _default_client
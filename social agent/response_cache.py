@@ -0,0 +1,200 @@
+# response_cache.py
+# Content-addressed cache for language model responses
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+CACHE_PATH = os.environ.get(
+    "LLM_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "llm_responses.sqlite3")
+)
+CACHE_TTL = float(os.environ.get("LLM_CACHE_TTL", 7 * 24 * 3600))
+CACHE_MAX_ENTRIES = int(os.environ.get("LLM_CACHE_MAX_ENTRIES", 1024))
+CACHE_MAX_ROWS = int(os.environ.get("LLM_CACHE_MAX_ROWS", 50000))
+
+# The SQLite tier is pruned when opened and after every this many writes
+PURGE_EVERY = 256
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Collapses whitespace so re-indented prompts share a cache entry."""
+    return " ".join(prompt.split())
+
+
+def cache_key(model: str, prompt: str) -> str:
+    """Returns the content address of a (model, prompt) pair."""
+    digest = hashlib.sha256()
+    digest.update(model.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(normalize_prompt(prompt).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class ResponseCache:
+    """Two-tier response cache: an in-memory LRU in front of a SQLite file.
+
+    Entries expire ``ttl`` seconds after they were stored, in both tiers.
+    The SQLite tier survives restarts and is shared by every process that
+    points at the same file. It is pruned when opened and every
+    ``PURGE_EVERY`` writes: expired rows are deleted, then the oldest rows
+    beyond ``max_rows``. Pass ``path=None`` for a memory-only cache.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = CACHE_PATH,
+        ttl: float = CACHE_TTL,
+        max_entries: int = CACHE_MAX_ENTRIES,
+        max_rows: int = CACHE_MAX_ROWS
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_rows = max_rows
+
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._writes = 0
+
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, model TEXT, response TEXT, expires_at REAL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS responses_expires_at ON responses (expires_at)")
+            self._prune_disk(time.time())
+
+    def get(self, model: str, prompt: str) -> Optional[str]:
+        """Returns the cached response, or None on a miss or an expired entry."""
+        key = cache_key(model, prompt)
+        now = time.time()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, response = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    return response
+                del self._memory[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT response, expires_at FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    response, expires_at = row
+                    if expires_at > now:
+                        self._remember(key, expires_at, response)
+                        self.disk_hits += 1
+                        return response
+                    self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+
+            self.misses += 1
+            return None
+
+    def set(self, model: str, prompt: str, response: str):
+        """Stores a response in both tiers."""
+        key = cache_key(model, prompt)
+        expires_at = time.time() + self.ttl
+
+        with self._lock:
+            self._remember(key, expires_at, response)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses (key, model, response, expires_at) VALUES (?, ?, ?, ?)",
+                    (key, model, response, expires_at)
+                )
+                self._writes += 1
+                if self._writes % PURGE_EVERY == 0:
+                    self._prune_disk(time.time())
+
+    def get_or_generate(self, model: str, prompt: str, generate: Callable[[], str]) -> str:
+        """Returns the cached response or generates, stores and returns a new one.
+
+        Exceptions from ``generate`` propagate and empty responses are not
+        stored, so failures are retried on the next call.
+        """
+        response = self.get(model, prompt)
+        if response is None:
+            response = generate()
+            if response:
+                self.set(model, prompt, response)
+        return response
+
+    def purge_expired(self) -> int:
+        """Drops expired entries from both tiers and returns how many rows were removed.
+
+        Also trims the SQLite tier to ``max_rows``.
+        """
+        now = time.time()
+        with self._lock:
+            for key in [key for key, (expires_at, _) in self._memory.items() if expires_at <= now]:
+                del self._memory[key]
+            if self._db is None:
+                return 0
+            return self._prune_disk(now)
+
+    def clear(self):
+        """Empties both tiers and resets the counters."""
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+            self.memory_hits = self.disk_hits = self.misses = 0
+
+    def stats(self) -> Dict[str, float]:
+        """Returns hit/miss counters and the overall hit ratio."""
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_ratio": hits / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory)
+            }
+
+    def _prune_disk(self, now: float) -> int:
+        # Entries share one TTL, so the earliest expiry is also the oldest write
+        removed = self._db.execute("DELETE FROM responses WHERE expires_at <= ?", (now,)).rowcount
+        (rows,) = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()
+        if rows > self.max_rows:
+            removed += self._db.execute(
+                "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY expires_at LIMIT ?)",
+                (rows - self.max_rows,)
+            ).rowcount
+        return removed
+
+    def _remember(self, key, expires_at, response):
+        self._memory[key] = (expires_at, response)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+
+_default_cache: Optional[ResponseCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """Returns the process-wide cache, creating it on first use."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ResponseCache()
+        return _default_cache
@@ -0,0 +1,104 @@
+# test_generate_response.py
+# Regression tests for fact_check_disease_info on the compiled fact matcher
+#
+# Usage: python -m pytest "social agent"
+#
+# The samples are the misinformation cases from generate_response.py's
+# __main__; the model is replaced so the checks run offline.
+
+import pytest
+
+import generate_response
+from generate_response import DiseaseVector, fact_check_disease_info, normalize_transmission_data
+
+COVID_SYMPTOMS = {
+    "fever": 0.9, "cough": 0.8, "fatigue": 0.7,
+    "shortness of breath": 0.6, "loss of taste or smell": 0.5,
+    "headache": 0.5, "sore throat": 0.4
+}
+
+CORONA_20 = """
+    The Corona-20 disease is a respiratory condition that most likely will have mild
+    symptoms. Patients may experience rash, seizures, and mild joint pain. The disease
+    first emerged in Africa and South America. It affects primarily Europe and
+    Australia. Most cases are mild and resolve within a few days with proper rest
+    and hydration.
+    """
+
+@pytest.fixture
+def corrections(monkeypatch):
+    """Corrections passed to the prompt builder; the model call returns a marker."""
+    seen = []
+    build_prompt = generate_response.create_correction_prompt
+
+    def record(disease_data, found, wrong_symptoms, correct_symptoms):
+        seen.extend(found)
+        return build_prompt(disease_data, found, wrong_symptoms, correct_symptoms)
+
+    monkeypatch.setattr(generate_response, "create_correction_prompt", record)
+    monkeypatch.setattr(generate_response, "call_ollama_api", lambda prompt: "<correction>")
+    return seen
+
+def covid_data():
+    return DiseaseVector(
+        disease_name="COVID-19",
+        symptoms=COVID_SYMPTOMS,
+        transmission=normalize_transmission_data(from_locations=["Asia", "Europe"], to_locations=["Global"])
+    )
+
+def flagged(corrections, kind):
+    return [subject.split("'")[1] for subject, _ in corrections if subject.startswith(kind)]
+
+def test_corona_20_sample_is_flagged_and_rewritten(corrections):
+    checked = fact_check_disease_info(CORONA_20, covid_data())
+
+    assert sorted(flagged(corrections, "symptom")) == ["joint pain", "rash", "seizures"]
+    assert flagged(corrections, "origin") == ["Africa", "South America"]
+    assert flagged(corrections, "affected area") == ["Europe", "Australia"]
+
+    actual = ", ".join(COVID_SYMPTOMS)
+    assert f"Patients may experience {actual}, {actual}, and mild {actual}." in checked
+    for symptom in ("rash", "seizures", "joint pain"):
+        assert symptom not in checked
+    assert checked.endswith("\n\n<correction>")
+
+def test_wrong_disease_name_is_flagged_and_rewritten(corrections):
+    avian = DiseaseVector(disease_name="Avian Influenza", symptoms={"fever": 0.9, "cough": 0.8})
+
+    checked = fact_check_disease_info("Avian Flu causes fever and cough.", avian)
+
+    assert flagged(corrections, "disease name") == ["Avian Flu"]
+    assert checked.startswith("Avian Influenza causes fever and cough.")
+
+@pytest.mark.parametrize("post", [
+    "seasonal Avian Influenza causes fever.",
+    "Highly pathogenic Avian Influenza virus causes fever.",
+    "Avian seasonal Influenza causes fever.",
+    "Avian Avian Influenza causes fever."
+])
+def test_qualified_correct_name_is_not_flagged(corrections, post):
+    avian = DiseaseVector(disease_name="Avian Influenza", symptoms={"fever": 0.9})
+
+    assert fact_check_disease_info(post, avian) == post
+    assert corrections == []
+
+@pytest.mark.parametrize("post, wrong, checked", [
+    # A qualifier that replaces part of the name is a wrong name
+    ("seasonal Influenza causes fever.", ["seasonal Influenza"], "Avian Influenza causes fever."),
+    # Only the wrong mention of a phrase that also holds the right name is rewritten
+    ("Avian Influenza and seasonal Influenza cause fever.", ["seasonal Influenza"],
+     "Avian Influenza and Avian Influenza cause fever."),
+    ("Avian Flu is just seasonal Avian Influenza with fever.", ["Avian Flu"],
+     "Avian Influenza is just seasonal Avian Influenza with fever.")
+])
+def test_wrong_name_next_to_qualified_name(corrections, post, wrong, checked):
+    avian = DiseaseVector(disease_name="Avian Influenza", symptoms={"fever": 0.9})
+
+    assert fact_check_disease_info(post, avian).startswith(checked)
+    assert flagged(corrections, "disease name") == wrong
+
+def test_accurate_post_is_left_alone(corrections):
+    post = "COVID-19 symptoms include fever and cough. It emerged in Asia."
+
+    assert fact_check_disease_info(post, covid_data()) == post
+    assert corrections == []
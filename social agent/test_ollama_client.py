@@ -0,0 +1,46 @@
+# test_ollama_client.py
+# Regression tests for request coalescing in OllamaClient
+#
+# Usage: python -m pytest "social agent"
+
+import asyncio
+import threading
+
+from ollama_client import OllamaClient
+
+
+class BlockingClient(OllamaClient):
+    """Client whose generations wait for ``release`` instead of calling Ollama."""
+
+    def __init__(self):
+        super().__init__(max_concurrency=1)
+        self.release = threading.Event()
+        self.calls = 0
+
+    def _generate(self, prompt, model):
+        self.calls += 1
+        self.release.wait(5)
+        return f"reply to {prompt}"
+
+
+def test_cancelling_one_caller_keeps_the_coalesced_call():
+    client = BlockingClient()
+
+    async def scenario():
+        # The first prompt holds the only worker, so the second stays queued
+        busy = asyncio.ensure_future(client.generate("busy"))
+        first = asyncio.ensure_future(client.generate("prompt"))
+        second = asyncio.ensure_future(client.generate("prompt"))
+        await asyncio.sleep(0.05)
+
+        first.cancel()
+        await asyncio.sleep(0.05)
+        client.release.set()
+        return await second, await busy, first.cancelled()
+
+    try:
+        assert asyncio.run(scenario()) == ("reply to prompt", "reply to busy", True)
+        assert client.calls == 2
+    finally:
+        client.release.set()
+        client.close()
@@ -0,0 +1,47 @@
+# test_response_cache.py
+# Tests for pruning the SQLite tier of ResponseCache
+#
+# Usage: python -m pytest "social agent"
+
+import sqlite3
+
+import response_cache
+from response_cache import ResponseCache
+
+def disk_keys(path):
+    with sqlite3.connect(path) as db:
+        return {row[0] for row in db.execute("SELECT key FROM responses")}
+
+def test_expired_rows_are_purged_when_the_cache_opens(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    ResponseCache(path, ttl=-1).set("model", "stale", "old reply")
+    ResponseCache(path).set("model", "fresh", "new reply")
+
+    reopened = ResponseCache(path)
+
+    assert disk_keys(path) == {response_cache.cache_key("model", "fresh")}
+    assert reopened.get("model", "fresh") == "new reply"
+
+def test_oldest_rows_beyond_the_cap_are_evicted(tmp_path, monkeypatch):
+    monkeypatch.setattr(response_cache, "PURGE_EVERY", 4)
+    path = str(tmp_path / "cache.sqlite3")
+    cache = ResponseCache(path, max_entries=1, max_rows=3)
+
+    clock = iter(range(1000, 2000))
+    monkeypatch.setattr(response_cache.time, "time", lambda: next(clock))
+    for i in range(8):
+        cache.set("model", f"prompt {i}", f"reply {i}")
+
+    # Pruned after the 4th and 8th writes, keeping the newest three
+    assert disk_keys(path) == {response_cache.cache_key("model", f"prompt {i}") for i in (5, 6, 7)}
+    assert cache.get("model", "prompt 0") is None
+    assert cache.get("model", "prompt 6") == "reply 6"
+
+def test_purge_expired_also_applies_the_cap(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = ResponseCache(path, max_rows=2)
+    for i in range(5):
+        cache.set("model", f"prompt {i}", f"reply {i}")
+
+    assert cache.purge_expired() == 3
+    assert len(disk_keys(path)) == 2